@@ -0,0 +1,141 @@
+#!/usr/bin/python3
+
+import logging
+from models.HighRiseApartments.BuildingConfig import BuildingConfig
+from models.HighRiseApartments.BuildingResident import BuildingResident
+from models.common.ElevatorBank import ElevatorBank
+from models.common.ActivityReader import loadElevatorRequestTrace
+from models.common.DispatchPolicies import NearestCarPolicy, CollectiveControlPolicy, \
+    ZoningPolicy, LobbyReturnPolicy, PredictivePositioningPolicy, NeuralNetFloorPredictor
+from ElevatorReplayDriver import replayElevatorRequests
+import argparse
+import concurrent.futures
+import time
+import json
+
+
+POLICY_NAMES = [ 'nearest', 'collective', 'zoning', 'lobby-return', 'predictive' ]
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Compare elevator dispatch policies on a simulated trace")
+    parser.add_argument('activities_file', help="Output of HighRiseDriver.py (.json, .jsonl, .npy, optionally .gz)")
+    parser.add_argument('--policies', help="Comma separated policies to run, from " + ", ".join(POLICY_NAMES),
+        default="nearest,collective,zoning,lobby-return")
+    parser.add_argument('--neuralnet-xml', help="Network from pybrain/createNetFromJson.py, " +
+        "required for the predictive policy")
+    parser.add_argument('--workers', help="Number of policies to run at once", type=int, default=1)
+    buildingGroup = parser.add_mutually_exclusive_group()
+    buildingGroup.add_argument('--preset', help="Building the trace was simulated for",
+        choices=sorted(BuildingConfig.PRESETS.keys()), default=BuildingConfig.DEFAULT_PRESET)
+    buildingGroup.add_argument('--building-config', help="JSON building config the trace was " +
+        "simulated with, instead of a preset")
+    parser.add_argument('--cars', help="Number of elevator cars (default from the building)", type=int)
+    parser.add_argument('--capacity', help="Riders per car (default from the building)", type=int)
+    parser.add_argument('--results-json', help="Also write results to this JSON file")
+    return parser.parse_args()
+
+
+def main():
+    args = parseArgs()
+
+    policyNames = args.policies.split(",")
+    for currPolicyName in policyNames:
+        if currPolicyName not in POLICY_NAMES:
+            raise ValueError("Unknown dispatch policy {0}, choose from {1}".format(
+                currPolicyName, ", ".join(POLICY_NAMES)) )
+
+    if 'predictive' in policyNames and args.neuralnet_xml is None:
+        raise ValueError("predictive policy needs --neuralnet-xml")
+
+    if args.building_config is not None:
+        with open(args.building_config, 'r') as configFile:
+            buildingConfig = BuildingConfig.load(configFile)
+    else:
+        buildingConfig = BuildingConfig.getPreset(args.preset)
+
+    if args.cars is None:
+        args.cars = buildingConfig.getElevatorCars()
+    if args.capacity is None:
+        args.capacity = buildingConfig.getElevatorCarCapacity()
+
+    # Plain values rather than the config, they go to worker processes
+    buildingTopology = buildingConfig.getTopology()
+    elevatorBankArgs = ( args.cars, args.capacity, buildingConfig.getElevatorDoorDwellSeconds(),
+        buildingConfig.getElevatorLobbyFloorIndex(), buildingTopology.getLowestFloorIndex(),
+        buildingTopology.getHighestFloorIndex() )
+
+    benchmarkArgs = [ (args.activities_file, currPolicyName, args.neuralnet_xml) + elevatorBankArgs
+        for currPolicyName in policyNames ]
+
+    # Every policy replays the same trace independently, so run them side by side
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.workers) as executor:
+        results = list( executor.map(benchmarkPolicy, *zip(*benchmarkArgs)) )
+
+    printResults(results)
+
+    if args.results_json is not None:
+        with open(args.results_json, 'w') as resultsFile:
+            json.dump(results, resultsFile, indent=4)
+
+
+def createPolicy(policyName, neuralNetXmlFile, lowestFloor, highestFloor):
+    # lowestFloor and highestFloor are the building's floor indices, G (1) through the top floor
+    if policyName == 'nearest':
+        return NearestCarPolicy()
+    elif policyName == 'collective':
+        return CollectiveControlPolicy()
+    elif policyName == 'zoning':
+        return ZoningPolicy(lowestFloor, highestFloor)
+    elif policyName == 'lobby-return':
+        return LobbyReturnPolicy()
+    else:
+        return PredictivePositioningPolicy(NeuralNetFloorPredictor(neuralNetXmlFile),
+            lowestFloor, highestFloor)
+
+
+def benchmarkPolicy(activitiesFile, policyName, neuralNetXmlFile, numberOfCars, carCapacity,
+        doorDwellSeconds, lobbyFloor, lowestFloor, highestFloor):
+    trace = loadElevatorRequestTrace(activitiesFile)
+
+    elevatorBank = ElevatorBank(numberOfCars, carCapacity,
+        doorDwellSeconds,
+        BuildingResident.ELEVATOR_SECONDS_PER_FLOOR,
+        lobbyFloor,
+        createPolicy(policyName, neuralNetXmlFile, lowestFloor, highestFloor) )
+
+    startTime = time.perf_counter()
+    replayElevatorRequests(elevatorBank, trace)
+    elevatorBank.finish()
+    runtimeSeconds = time.perf_counter() - startTime
+
+    summary = elevatorBank.getSummary()
+
+    return {
+        'policy':           policyName,
+        'requests':         summary['requests'],
+        'wait_mean':        summary['wait_mean'],
+        'wait_p95':         summary['wait_p95'],
+        'wait_p99':         summary['wait_p99'],
+        'ride_mean':        summary['ride_mean'],
+        'ride_p95':         summary['ride_p95'],
+        'floors_travelled': summary['floors_travelled'],
+        'runtime_seconds':  runtimeSeconds,
+    }
+
+
+def printResults(results):
+    print( "{0:>14s} {1:>9s} {2:>10s} {3:>9s} {4:>9s} {5:>10s} {6:>9s} {7:>16s} {8:>11s}".format(
+        "policy", "requests", "wait mean", "wait p95", "wait p99", "ride mean", "ride p95",
+        "floors travelled", "runtime (s)") )
+
+    for currResult in results:
+        print( "{0:>14s} {1:9d} {2:10.2f} {3:9.1f} {4:9.1f} {5:10.2f} {6:9.1f} {7:16d} {8:11.3f}".format(
+            currResult['policy'], currResult['requests'], currResult['wait_mean'],
+            currResult['wait_p95'], currResult['wait_p99'], currResult['ride_mean'],
+            currResult['ride_p95'], currResult['floors_travelled'], currResult['runtime_seconds']) )
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    main()
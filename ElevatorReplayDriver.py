@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+
+import logging
+from models.HighRiseApartments.BuildingConfig import BuildingConfig
+from models.HighRiseApartments.BuildingResident import BuildingResident
+from models.common.ElevatorBank import ElevatorBank
+from models.common.ActivityReader import loadElevatorRequestTrace
+import argparse
+import datetime
+import json
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Replay simulated elevator requests against an elevator bank")
+    parser.add_argument('activities_file', help="Output of HighRiseDriver.py (.json, .jsonl, .npy, optionally .gz)")
+    buildingGroup = parser.add_mutually_exclusive_group()
+    buildingGroup.add_argument('--preset', help="Building the trace was simulated for, sets the " +
+        "elevator bank defaults", choices=sorted(BuildingConfig.PRESETS.keys()),
+        default=BuildingConfig.DEFAULT_PRESET)
+    buildingGroup.add_argument('--building-config', help="JSON building config the trace was " +
+        "simulated with, instead of a preset")
+    parser.add_argument('--cars', help="Number of elevator cars (default from the building)", type=int)
+    parser.add_argument('--capacity', help="Riders per car (default from the building)", type=int)
+    parser.add_argument('--door-dwell', help="Seconds doors stay open per stop (default from " +
+        "the building)", type=float)
+    parser.add_argument('--seconds-per-floor', help="Travel time per floor", type=float,
+        default=BuildingResident.ELEVATOR_SECONDS_PER_FLOOR)
+    parser.add_argument('--lobby-floor', help="Floor index cars start at (default from the " +
+        "building)", type=int)
+    parser.add_argument('--results-csv', help="Write per-request wait and ride times to this CSV")
+    return parser.parse_args()
+
+
+def main():
+    args = parseArgs()
+
+    if args.building_config is not None:
+        with open(args.building_config, 'r') as configFile:
+            buildingConfig = BuildingConfig.load(configFile)
+    else:
+        buildingConfig = BuildingConfig.getPreset(args.preset)
+
+    # Anything not given on the command line comes from the building
+    if args.cars is None:
+        args.cars = buildingConfig.getElevatorCars()
+    if args.capacity is None:
+        args.capacity = buildingConfig.getElevatorCarCapacity()
+    if args.door_dwell is None:
+        args.door_dwell = buildingConfig.getElevatorDoorDwellSeconds()
+    if args.lobby_floor is None:
+        args.lobby_floor = buildingConfig.getElevatorLobbyFloorIndex()
+
+    trace = loadElevatorRequestTrace(args.activities_file)
+    logging.info("Loaded {0} elevator requests from {1}".format(len(trace), args.activities_file) )
+
+    elevatorBank = ElevatorBank(args.cars, args.capacity, args.door_dwell, args.seconds_per_floor,
+        args.lobby_floor)
+
+    startTime = datetime.datetime.utcnow()
+
+    replayElevatorRequests(elevatorBank, trace)
+    elevatorBank.finish()
+
+    logging.info("Replayed {0} requests in {1}".format(len(trace),
+        datetime.datetime.utcnow() - startTime) )
+
+    print( json.dumps(elevatorBank.getSummary(), sort_keys=True, indent=4) )
+
+    if args.results_csv is not None:
+        with open(args.results_csv, 'w', newline='') as resultsCsv:
+            elevatorBank.writeRequestResults(resultsCsv)
+
+
+def replayElevatorRequests(elevatorBank, trace):
+    # Pull columns out as plain lists once, indexing the structured array per request is slow
+    for (requestTime, startFloor, destinationFloor) in zip(
+            trace['epoch_seconds'].tolist(),
+            trace['start_floor'].tolist(),
+            trace['destination_floor'].tolist() ):
+        elevatorBank.requestElevator(requestTime, startFloor, destinationFloor)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
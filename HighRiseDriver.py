@@ -2,32 +2,210 @@
 
 import logging
 from models.HighRiseApartments.ApartmentBuilding import ApartmentBuilding
+from models.HighRiseApartments.BuildingConfig import BuildingConfig
+from models.HighRiseApartments.BuildingActivities import RequestElevator, ParkCar
+from models.common.ActivityWriters import JsonActivityWriter, JsonLinesActivityWriter
+from models.common.RunProfiler import RunProfiler
+from models.common.RunCheckpoint import RunCheckpoint, CheckpointedOutputFile
 import datetime
 import argparse
 import os.path
+import gzip
+import io
+
+
+# Short names for --activities
+ACTIVITY_TYPES = {
+    'elevator': RequestElevator.ACTIVITY_TYPE,
+    'parking':  ParkCar.ACTIVITY_TYPE,
+}
 
 
 def parseArgs():
     parser = argparse.ArgumentParser(description="Elevator simulation driver for high rise apts") 
     parser.add_argument('number_days', help="Number of days to simulation")
     parser.add_argument('json_dir', help="Directory for JSON output")
+    parser.add_argument('--workers', help="Number of processes to simulate days in parallel",
+        type=int, default=1)
+    parser.add_argument('--format', help="Output format: one JSON dictionary, JSON Lines " +
+        "written out a day at a time, or a NumPy .npy trace of elevator requests",
+        choices=[ 'json', 'jsonl', 'npy' ], default='json')
+    parser.add_argument('--compress', help="gzip the output file", action='store_true')
+    parser.add_argument('--elevator-csv', help="Run the building's elevator bank over the " +
+        "requests and write per-request wait and ride times to this CSV")
+    parser.add_argument('--quiet', help="Fast mode: only per-day summaries and warnings " +
+        "from the simulation", action='store_true')
+    parser.add_argument('--seed', help="Random seed, reuse one to reproduce a previous run",
+        type=int, default=None)
+    buildingGroup = parser.add_mutually_exclusive_group()
+    buildingGroup.add_argument('--preset', help="Built-in building layout and population density",
+        choices=sorted(BuildingConfig.PRESETS.keys()), default=BuildingConfig.DEFAULT_PRESET)
+    buildingGroup.add_argument('--building-config', help="JSON building config, holding the " +
+        "keys that differ from its \"preset\" (floors, services, garage, residents per floor, " +
+        "elevator bank, morning start hours)")
+    parser.add_argument('--population', help="Load the building's residents from this file " +
+        "instead of generating them")
+    parser.add_argument('--save-population', help="Write the building's residents to this " +
+        "file, to rerun later with --population")
+    parser.add_argument('--engine', help="How residents' days are generated: one actor at " +
+        "a time, or the whole population at once with NumPy (statistically equivalent, much " +
+        "faster for large buildings)", choices=ApartmentBuilding.ENGINES,
+        default=ApartmentBuilding.ENGINE_ACTORS)
+    parser.add_argument('--activities', help="Comma separated activity types to simulate " +
+        "and write out, from " + ", ".join(sorted(ACTIVITY_TYPES.keys())), default="elevator")
+    parser.add_argument('--cache-dir', help="Keep simulated days here and reuse them on reruns " +
+        "with the same seed and model, so only missing days are simulated")
+    parser.add_argument('--profile-json', help="Time each phase of each simulated day and " +
+        "write the run's performance report (JSON) to this file")
+    parser.add_argument('--profile-memory', help="Include peak traced memory in the " +
+        "performance report (slows the run down)", action='store_true')
+    parser.add_argument('--profile-cprofile-dir', help="Write a cProfile dump per phase to " +
+        "this directory, for pstats or snakeviz. Needs --workers 1")
+    parser.add_argument('--checkpoint-every', help="Save progress every this many simulated " +
+        "days, so a killed run can be picked up again with --resume", type=int, default=0)
+    parser.add_argument('--resume', help="Carry on a killed run from its last checkpoint, " +
+        "appending to its output. Seed, engine, building and population come from the " +
+        "checkpoint", action='store_true')
     return parser.parse_args()
 
 
 def main():
     args = parseArgs()
+
+    if args.quiet is True:
+        # Resident/activity chatter is most of a run's time at INFO. Keep the building's
+        #   per-day summary lines, the elevator report and the profile summary
+        logging.getLogger('models').setLevel(logging.WARNING)
+        logging.getLogger('models.common.Building').setLevel(logging.INFO)
+        logging.getLogger('models.common.ElevatorBank').setLevel(logging.INFO)
+        logging.getLogger('models.common.RunProfiler').setLevel(logging.INFO)
     
     if os.path.isdir(args.json_dir) is False:
         raise ValueError("{0} is not a valid directory for JSON output".format(
             args.json_dir) )
 
+    activityTypes = []
+    for currActivityName in args.activities.split(","):
+        if currActivityName not in ACTIVITY_TYPES:
+            raise ValueError("Unknown activity type {0}, choose from {1}".format(
+                currActivityName, ", ".join(sorted(ACTIVITY_TYPES.keys()))) )
+        activityTypes.append(ACTIVITY_TYPES[currActivityName])
+
+    if args.building_config is not None:
+        with open(args.building_config, 'r') as configFile:
+            buildingConfig = BuildingConfig.load(configFile)
+    else:
+        buildingConfig = BuildingConfig.getPreset(args.preset)
+
+    if args.format == 'npy' and args.compress is True:
+        raise ValueError("npy traces are memory-mapped by readers and cannot be compressed")
+
     timeToRun = datetime.timedelta(days=int(args.number_days))
 
     currDate = datetime.date( 2016, 12, 15 )
-    with open( os.path.join(args.json_dir, "{0}{1}{2}.json".format(
-            currDate.year, currDate.month, currDate.day)), "w") as outfile:
-        bldg = ApartmentBuilding( "High Rise Apts", "Anywhere, USA" )
-        bldg.runModel ( currDate, currDate + timeToRun, outfile )
+    outputFilename = os.path.join(args.json_dir, "{0}{1}{2}.{3}".format(
+        currDate.year, currDate.month, currDate.day, args.format) )
+
+    outputMode = "wt"
+    if args.compress is True:
+        outputFilename += ".gz"
+        openOutputFile = gzip.open
+    else:
+        openOutputFile = open
+
+    if args.format == 'npy':
+        outputMode = "wb"
+
+    # Checkpoint sits next to the output it describes
+    checkpointFilename = outputFilename + ".checkpoint"
+    checkpointState = None
+    populationText = None
+    if args.resume is True:
+        checkpointState = RunCheckpoint.load(checkpointFilename)
+        if checkpointState is None:
+            raise ValueError("No checkpoint at {0} to resume from".format(checkpointFilename) )
+
+        if args.seed is not None and args.seed != checkpointState['random_seed']:
+            raise ValueError("Checkpoint was run with seed {0}, not {1}".format(
+                checkpointState['random_seed'], args.seed) )
+
+        args.seed = checkpointState['random_seed']
+        args.engine = checkpointState['model_parameters']['engine']
+        buildingConfig = BuildingConfig(checkpointState['model_parameters']['config'])
+        populationText = checkpointState['population']
+
+        if args.checkpoint_every == 0:
+            args.checkpoint_every = checkpointState['checkpoint_every']
+
+    if args.checkpoint_every > 0:
+        outfile = CheckpointedOutputFile(outputFilename, args.format == 'npy', args.compress,
+            checkpointState['output_offset'] if checkpointState is not None else None)
+    else:
+        outfile = openOutputFile(outputFilename, outputMode)
+
+    with outfile:
+        if args.format == 'jsonl':
+            activityWriter = JsonLinesActivityWriter(outfile)
+        elif args.format == 'npy':
+            # NumPy only needed for this format
+            from models.common.ElevatorRequestTrace import ElevatorRequestTraceWriter
+            activityWriter = ElevatorRequestTraceWriter(outfile)
+        else:
+            activityWriter = JsonActivityWriter(outfile)
+
+        if populationText is not None:
+            bldg = ApartmentBuilding( "High Rise Apts", "Anywhere, USA", args.seed,
+                io.StringIO(populationText), args.engine, buildingConfig )
+        elif args.population is not None:
+            with open(args.population, 'r') as populationFile:
+                bldg = ApartmentBuilding( "High Rise Apts", "Anywhere, USA", args.seed, populationFile,
+                    args.engine, buildingConfig )
+        else:
+            bldg = ApartmentBuilding( "High Rise Apts", "Anywhere, USA", args.seed, engine=args.engine,
+                buildingConfig=buildingConfig )
+        logging.info("Simulating with random seed {0}".format(bldg.getRandomSeed()) )
+        bldg.setSubscribedActivityTypes(activityTypes)
+
+        # Elevator model only runs for the CSV, plain request generation doesn't need it
+        bldg.setElevatorModelEnabled(args.elevator_csv is not None)
+
+        if args.cache_dir is not None:
+            # NumPy only needed for the cache
+            from models.common.DayCache import DayCache
+            bldg.setDayCache( DayCache(args.cache_dir) )
+
+        if args.save_population is not None:
+            with open(args.save_population, 'w') as populationFile:
+                bldg.getPopulation().save(populationFile)
+
+        profiler = None
+        if args.profile_json is not None or args.profile_memory is True or \
+                args.profile_cprofile_dir is not None:
+            profiler = RunProfiler(args.profile_memory, args.profile_cprofile_dir)
+            bldg.setProfiler(profiler)
+
+        runCheckpoint = None
+        if args.checkpoint_every > 0:
+            runCheckpoint = RunCheckpoint(checkpointFilename, outfile, args.checkpoint_every)
+            runCheckpoint.setResumeState(checkpointState)
+            bldg.setCheckpoint(runCheckpoint)
+
+        bldg.runModel ( currDate, currDate + timeToRun, activityWriter, args.workers )
+
+    # Output's complete, nothing left to resume
+    if runCheckpoint is not None:
+        runCheckpoint.remove()
+
+    elevatorModel = bldg.getElevatorModel()
+    if elevatorModel is not None and args.elevator_csv is not None:
+        with open(args.elevator_csv, 'w', newline='') as elevatorCsv:
+            elevatorModel.writeRequestResults(elevatorCsv)
+
+    if profiler is not None:
+        profiler.logSummary()
+        if args.profile_json is not None:
+            with open(args.profile_json, 'w') as profileFile:
+                profiler.writeSummary(profileFile)
 
 
 if __name__ == '__main__':
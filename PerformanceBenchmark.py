@@ -0,0 +1,427 @@
+#!/usr/bin/python3
+
+import logging
+from models.HighRiseApartments.ApartmentBuilding import ApartmentBuilding
+from models.HighRiseApartments.BuildingConfig import BuildingConfig
+from models.common.ActivityWriters import JsonActivityWriter
+from models.common.RunProfiler import RunProfiler
+import argparse
+import concurrent.futures
+import contextlib
+import datetime
+import importlib.util
+import io
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+
+
+# Same inputs every run, so timings are comparable between commits
+BENCHMARK_SEED = 20161215
+START_DATE = datetime.date(2016, 12, 15)
+
+# Scaled-up building: every resident of the default population copied this many times
+SCALED_POPULATION_COPIES = 10
+
+# Days simulated in the 60 floor, 3,000 resident tower
+TOWER_DAYS = 7
+
+# Days simulated for the training workloads' data (not itself timed)
+TRAINING_DAYS = 30
+
+# Date writeNetResults predicts a day for
+NET_RESULTS_DATE = "20170115"
+
+PYBRAIN_SCRIPT_DIR = os.path.join( os.path.dirname(os.path.abspath(__file__)), "pybrain" )
+
+# Results compared against when no --baseline is given. Written by the first run on a
+#   machine (timings only mean something on the machine they came from, so it isn't checked
+#   in) and by --update-baseline
+DEFAULT_BASELINE_FILENAME = os.path.join( os.path.dirname(os.path.abspath(__file__)),
+    "benchmark-baseline.json" )
+
+WORKLOAD_NAMES = [ 'simulate_1d', 'simulate_30d', 'simulate_365d', 'simulate_scaled',
+    'simulate_scaled_vectorized', 'simulate_tower_60', 'simulate_morning_rush', 'create_dataset',
+    'train_epoch', 'train_epoch_numpy', 'write_net_results', 'test_fit' ]
+
+
+def parseArgs():
+    parser = argparse.ArgumentParser(description="Time the simulation and neural net paths on " +
+        "fixed-seed workloads")
+    parser.add_argument('results_json', help="Write results to this JSON file")
+    parser.add_argument('--workloads', help="Comma separated workloads to run, from " +
+        ", ".join(WORKLOAD_NAMES), default=",".join(WORKLOAD_NAMES))
+    parser.add_argument('--repeat', help="Runs per workload, the fastest one is kept",
+        type=int, default=1)
+    parser.add_argument('--baseline', help="Earlier results JSON to compare against, created " +
+        "from this run if it doesn't exist yet (default: %(default)s)", default=DEFAULT_BASELINE_FILENAME)
+    parser.add_argument('--update-baseline', help="Replace the baseline's results with this " +
+        "run's, after comparing", action='store_true')
+    parser.add_argument('--tolerance', help="Fraction slower than the baseline that counts " +
+        "as a regression", type=float, default=0.10)
+    parser.add_argument('--work-dir', help="Keep generated data here instead of a temporary " +
+        "directory, so the training data is only simulated once across invocations")
+    return parser.parse_args()
+
+
+def main():
+    args = parseArgs()
+
+    workloadNames = args.workloads.split(",")
+    for currWorkloadName in workloadNames:
+        if currWorkloadName not in WORKLOAD_NAMES:
+            raise ValueError("Unknown workload {0}, choose from {1}".format(
+                currWorkloadName, ", ".join(WORKLOAD_NAMES)) )
+
+    if args.repeat < 1:
+        raise ValueError("Need at least one run per workload, got {0}".format(args.repeat) )
+
+    with contextlib.ExitStack() as exitStack:
+        workDir = args.work_dir
+        if workDir is None:
+            workDir = exitStack.enter_context( tempfile.TemporaryDirectory() )
+        elif os.path.isdir(workDir) is False:
+            os.makedirs(workDir)
+
+        results = {
+            'seed':         BENCHMARK_SEED,
+            'python':       platform.python_version(),
+            'machine':      platform.machine(),
+            'processor':    platform.processor(),
+            'cpu_count':    os.cpu_count(),
+            'timestamp':    datetime.datetime.utcnow().isoformat(),
+            'workloads':    {},
+        }
+
+        for currWorkloadName in workloadNames:
+            results['workloads'][currWorkloadName] = runWorkload(currWorkloadName, workDir,
+                args.repeat)
+
+    printResults(results['workloads'])
+
+    with open(args.results_json, 'w') as resultsFile:
+        json.dump(results, resultsFile, indent=4)
+
+    try:
+        with open(args.baseline, 'r') as baselineFile:
+            baselineResults = json.load(baselineFile)
+    except FileNotFoundError:
+        logging.info("No baseline at %s yet, saving this run as the baseline", args.baseline)
+        saveBaseline(args.baseline, results)
+        return
+
+    for currField in ( 'machine', 'processor', 'cpu_count', 'python' ):
+        if baselineResults.get(currField) != results[currField]:
+            logging.warning("Baseline %s is from a different %s (%s, now %s), timings may not compare",
+                args.baseline, currField, baselineResults.get(currField), results[currField])
+
+    noRegressions = compareResults(baselineResults['workloads'], results['workloads'], args.tolerance)
+
+    if args.update_baseline is True:
+        baselineResults = results
+    else:
+        # Workloads the baseline doesn't have yet start their history with this run
+        newWorkloadNames = [ currWorkloadName for currWorkloadName in results['workloads']
+            if currWorkloadName not in baselineResults['workloads'] ]
+        for currWorkloadName in newWorkloadNames:
+            baselineResults['workloads'][currWorkloadName] = results['workloads'][currWorkloadName]
+
+        if len(newWorkloadNames) == 0:
+            baselineResults = None
+
+    if baselineResults is not None:
+        saveBaseline(args.baseline, baselineResults)
+
+    if noRegressions is False:
+        sys.exit(1)
+
+
+def saveBaseline(baselineFilename, baselineResults):
+    # Written to a temporary file and moved into place, an interrupted run keeps the old one
+    partialFilename = baselineFilename + ".partial"
+    with open(partialFilename, 'w') as baselineFile:
+        json.dump(baselineResults, baselineFile, indent=4)
+    os.replace(partialFilename, baselineFilename)
+
+    logging.info("Saved baseline %s", baselineFilename)
+
+
+def runWorkload(workloadName, workDir, repeat):
+    bestResult = None
+    for i in range(repeat):
+        # Fresh process per run, so peak RSS belongs to this workload alone and nothing
+        #   imported or cached by an earlier one speeds it up
+        with concurrent.futures.ProcessPoolExecutor(max_workers=1,
+                mp_context=multiprocessing.get_context('spawn')) as executor:
+            currResult = executor.submit(_runWorkloadInProcess, workloadName, workDir).result()
+
+        if 'skipped' in currResult:
+            logging.warning("Skipped %s: %s", workloadName, currResult['skipped'])
+            return currResult
+
+        logging.info("%s run %d / %d: %.3fs", workloadName, i + 1, repeat, currResult['wall_seconds'])
+
+        if bestResult is None or currResult['wall_seconds'] < bestResult['wall_seconds']:
+            if bestResult is not None:
+                currResult['peak_rss_bytes'] = max(currResult['peak_rss_bytes'], bestResult['peak_rss_bytes'])
+            bestResult = currResult
+        else:
+            bestResult['peak_rss_bytes'] = max(currResult['peak_rss_bytes'], bestResult['peak_rss_bytes'])
+
+    bestResult['runs'] = repeat
+    return bestResult
+
+
+def _runWorkloadInProcess(workloadName, workDir):
+    logging.basicConfig(level=logging.WARNING)
+
+    workloads = {
+        'simulate_1d':                  lambda: benchmarkSimulation(workDir, 1),
+        'simulate_30d':                 lambda: benchmarkSimulation(workDir, 30),
+        'simulate_365d':                lambda: benchmarkSimulation(workDir, 365),
+        'simulate_scaled':              lambda: benchmarkSimulation(workDir, 30,
+            SCALED_POPULATION_COPIES),
+        'simulate_scaled_vectorized':   lambda: benchmarkSimulation(workDir, 30,
+            SCALED_POPULATION_COPIES, ApartmentBuilding.ENGINE_VECTORIZED),
+        'simulate_tower_60':            lambda: benchmarkSimulation(workDir, TOWER_DAYS,
+            presetName='tower-60'),
+        'simulate_morning_rush':        lambda: benchmarkSimulation(workDir, TOWER_DAYS,
+            presetName='morning-rush'),
+        'create_dataset':               lambda: benchmarkCreateDataset(workDir),
+        'train_epoch':                  lambda: benchmarkTrainEpoch(workDir, 'backprop'),
+        'train_epoch_numpy':            lambda: benchmarkTrainEpoch(workDir, 'numpy'),
+        'write_net_results':            lambda: benchmarkWriteNetResults(workDir),
+        'test_fit':                     lambda: benchmarkTestFit(workDir),
+    }
+
+    try:
+        (wallSeconds, events, details) = workloads[workloadName]()
+    except ImportError as e:
+        # Neural net workloads need PyBrain, the simulation ones don't
+        return { 'skipped': str(e) }
+
+    result = {
+        'wall_seconds':         wallSeconds,
+        'events':               events,
+        'events_per_second':    events / wallSeconds if wallSeconds > 0 else None,
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_bytes':       resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024,
+    }
+    result.update(details)
+
+    return result
+
+
+def benchmarkSimulation(workDir, numberDays, populationCopies=1,
+        engine=ApartmentBuilding.ENGINE_ACTORS, presetName=BuildingConfig.DEFAULT_PRESET):
+    bldg = _createBuilding(workDir, populationCopies, engine, presetName)
+    profiler = RunProfiler()
+    bldg.setProfiler(profiler)
+
+    outputFilename = os.path.join(workDir, "simulate-{0}.json".format(os.getpid()) )
+    try:
+        with open(outputFilename, 'w') as outputFile:
+            bldg.runModel( START_DATE, START_DATE + datetime.timedelta(days=numberDays - 1),
+                JsonActivityWriter(outputFile) )
+    finally:
+        os.unlink(outputFilename)
+
+    summary = profiler.getSummary()
+    return (summary['wall_seconds'], summary['activities'], {
+        'residents':    bldg.getPopulation().getResidentCount(),
+        'phases':       { phaseName: phaseTotals['seconds'] for (phaseName, phaseTotals) in
+            summary['phases'].items() },
+    } )
+
+
+def benchmarkCreateDataset(workDir):
+    createNetFromJson = _loadPybrainScript('createNetFromJson')
+    trainingDir = _prepareTrainingData(workDir)
+
+    startTime = time.perf_counter()
+    with contextlib.redirect_stdout( io.StringIO() ):
+        (dataset, normalizationStats) = createNetFromJson.createDataset(trainingDir)
+    wallSeconds = time.perf_counter() - startTime
+
+    return (wallSeconds, len(dataset), {})
+
+
+def benchmarkTrainEpoch(workDir, trainerName):
+    createNetFromJson = _loadPybrainScript('createNetFromJson')
+
+    trainingDir = _prepareTrainingData(workDir)
+    with contextlib.redirect_stdout( io.StringIO() ):
+        (dataset, normalizationStats) = createNetFromJson.createDataset(trainingDir)
+    neuralNet = _createSeededNet(createNetFromJson)
+    trainer = createNetFromJson.createTrainer(trainerName, neuralNet, dataset)
+
+    startTime = time.perf_counter()
+    with contextlib.redirect_stdout( io.StringIO() ):
+        trainer.train()
+    wallSeconds = time.perf_counter() - startTime
+
+    return (wallSeconds, len(dataset), {})
+
+
+def benchmarkWriteNetResults(workDir):
+    createNetFromJson = _loadPybrainScript('createNetFromJson')
+    netSingleDay = _loadPybrainScript('netSingleDay')
+
+    neuralNet = _createSeededNet(createNetFromJson)
+    csvFilename = os.path.join(workDir, "net-results-{0}.csv".format(os.getpid()) )
+
+    startTime = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout( io.StringIO() ):
+            netSingleDay.writeNetResults(neuralNet, NET_RESULTS_DATE, csvFilename)
+        wallSeconds = time.perf_counter() - startTime
+
+        with open(csvFilename, 'r') as csvFile:
+            # Less the header row
+            events = sum( 1 for currLine in csvFile ) - 1
+    finally:
+        os.unlink(csvFilename)
+
+    return (wallSeconds, events, {})
+
+
+def benchmarkTestFit(workDir):
+    createNetFromJson = _loadPybrainScript('createNetFromJson')
+    testNetworkFit = _loadPybrainScript('testNetworkFit')
+
+    activitiesFile = os.path.join(_prepareTrainingData(workDir), "20161215.json")
+    neuralNet = _createSeededNet(createNetFromJson)
+    csvFilename = os.path.join(workDir, "test-fit-{0}.csv".format(os.getpid()) )
+
+    # Reading the activities is part of testFit's real cost, they're streamed in as it goes
+    startTime = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout( io.StringIO() ):
+            stats = testNetworkFit.testFit(testNetworkFit.readActivities(activitiesFile), neuralNet,
+                csvFilename)
+        wallSeconds = time.perf_counter() - startTime
+    finally:
+        os.unlink(csvFilename)
+
+    return (wallSeconds, stats['numDatapoints'], {})
+
+
+def _createBuilding(workDir, populationCopies, engine, presetName):
+    if populationCopies == 1:
+        return ApartmentBuilding("Benchmark Apts", "Anywhere, USA", BENCHMARK_SEED, engine=engine,
+            buildingConfig=BuildingConfig.getPreset(presetName))
+
+    # Every resident of the preset's population, repeated as extra residents of the same
+    #   apartment. Same building layout, populationCopies times the elevator traffic
+    bldg = ApartmentBuilding("Benchmark Apts", "Anywhere, USA", BENCHMARK_SEED,
+        buildingConfig=BuildingConfig.getPreset(presetName))
+    populationBuffer = io.StringIO()
+    bldg.getPopulation().save(populationBuffer)
+
+    scaledRecords = []
+    for currRecord in json.loads(populationBuffer.getvalue()):
+        for currCopy in range(populationCopies):
+            scaledRecord = dict(currRecord)
+            scaledRecord['resident_id'] = currCopy + 1
+            scaledRecords.append(scaledRecord)
+
+    return ApartmentBuilding("Benchmark Apts", "Anywhere, USA", BENCHMARK_SEED,
+        io.StringIO(json.dumps(scaledRecords)), engine, bldg.getConfig())
+
+
+def _prepareTrainingData(workDir):
+    # Simulated once per work directory and shared by the neural net workloads
+    trainingDir = os.path.join(workDir, "training")
+    trainingFilename = os.path.join(trainingDir, "20161215.json")
+    if os.path.isfile(trainingFilename) is True:
+        return trainingDir
+
+    os.makedirs(trainingDir, exist_ok=True)
+    bldg = ApartmentBuilding("Benchmark Apts", "Anywhere, USA", BENCHMARK_SEED)
+
+    # Written under a temporary name and moved into place, so an interrupted run doesn't
+    #   leave half a file for the next one to train on
+    partialFilename = trainingFilename + ".partial"
+    with open(partialFilename, 'w') as outputFile:
+        bldg.runModel( START_DATE, START_DATE + datetime.timedelta(days=TRAINING_DAYS - 1),
+            JsonActivityWriter(outputFile) )
+    os.replace(partialFilename, trainingFilename)
+
+    return trainingDir
+
+
+def _loadPybrainScript(scriptName):
+    # The scripts in pybrain/ aren't a package (the directory would shadow PyBrain itself)
+    #   and import their helpers as top level modules
+    if PYBRAIN_SCRIPT_DIR not in sys.path:
+        sys.path.append(PYBRAIN_SCRIPT_DIR)
+
+    moduleSpec = importlib.util.spec_from_file_location(scriptName,
+        os.path.join(PYBRAIN_SCRIPT_DIR, scriptName + ".py") )
+    module = importlib.util.module_from_spec(moduleSpec)
+    moduleSpec.loader.exec_module(module)
+
+    return module
+
+
+def _createSeededNet(createNetFromJson):
+    # PyBrain draws its initial weights from NumPy's global generator
+    import numpy as np
+    np.random.seed(BENCHMARK_SEED)
+    random.seed(BENCHMARK_SEED)
+
+    return createNetFromJson.createNet()
+
+
+def printResults(workloadResults):
+    print( "{0:>27s} {1:>11s} {2:>10s} {3:>11s} {4:>13s}".format(
+        "workload", "runtime (s)", "events", "events/s", "peak RSS (MB)") )
+
+    for (currWorkloadName, currResult) in workloadResults.items():
+        if 'skipped' in currResult:
+            print( "{0:>27s} skipped: {1}".format(currWorkloadName, currResult['skipped']) )
+            continue
+
+        print( "{0:>27s} {1:11.3f} {2:10d} {3:11.0f} {4:13.1f}".format(
+            currWorkloadName, currResult['wall_seconds'], currResult['events'],
+            currResult['events_per_second'] or 0.0, currResult['peak_rss_bytes'] / (1024 * 1024)) )
+
+
+def compareResults(baselineWorkloads, workloadResults, tolerance):
+    # True unless some workload got more than tolerance slower than the baseline
+    noRegressions = True
+
+    print( "\n{0:>27s} {1:>12s} {2:>11s} {3:>8s} {4:>9s}".format(
+        "workload", "baseline (s)", "runtime (s)", "ratio", "RSS ratio") )
+
+    for (currWorkloadName, currResult) in workloadResults.items():
+        baselineResult = baselineWorkloads.get(currWorkloadName)
+        if baselineResult is None or 'skipped' in baselineResult or 'skipped' in currResult:
+            continue
+
+        runtimeRatio = currResult['wall_seconds'] / baselineResult['wall_seconds']
+        rssRatio = currResult['peak_rss_bytes'] / baselineResult['peak_rss_bytes']
+
+        verdict = ""
+        if runtimeRatio > 1.0 + tolerance:
+            verdict = "REGRESSION"
+            noRegressions = False
+        elif runtimeRatio < 1.0 - tolerance:
+            verdict = "faster"
+
+        print( "{0:>27s} {1:12.3f} {2:11.3f} {3:8.2f} {4:9.2f} {5}".format(
+            currWorkloadName, baselineResult['wall_seconds'], currResult['wall_seconds'],
+            runtimeRatio, rssRatio, verdict) )
+
+    return noRegressions
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -3,24 +3,90 @@
 import logging
 from models.common.Building                        import Building
 from models.HighRiseApartments.BuildingResident    import BuildingResident
+from models.HighRiseApartments.BuildingActivities  import RequestElevator
 from models.common.Location                        import Location
+from models.common.ElevatorBank                    import ElevatorBank
+from models.HighRiseApartments.BuildingConfig      import BuildingConfig
+from models.HighRiseApartments.ResidentPopulation  import ResidentPopulation
+from models.common.ActivityWriters                 import JsonLinesActivityWriter
 import datetime
-import pprint
+import io
 import random
+import sys
 
 
 class ApartmentBuilding(Building):
 
+    # How residents' days get generated: one BuildingResident actor at a time, or the whole
+    #   population at once as NumPy arrays
+    ENGINE_ACTORS       = "actors"
+    ENGINE_VECTORIZED   = "vectorized"
+    ENGINES             = [ ENGINE_ACTORS, ENGINE_VECTORIZED ]
 
-    def __init__(self, buildingName, buildingLocation):
+    # Bump whenever resident behaviour changes, so days cached by older code aren't reused.
+    #   The layout is part of the BuildingConfig, which is in the cache key already
+    MODEL_VERSION = 1
+
+
+    def __init__(self, buildingName, buildingLocation, randomSeed=None, populationFile=None,
+            engine=ENGINE_ACTORS, buildingConfig=None):
         self._log = logging.getLogger(__name__)
-        Building.__init__(self, buildingName, buildingLocation)
+        Building.__init__(self, buildingName, buildingLocation, randomSeed)
+
+        # Layout, population density and elevator bank. The topology is built once by the
+        #   config and every resident shares it
+        if buildingConfig is None:
+            buildingConfig = BuildingConfig.getPreset(BuildingConfig.DEFAULT_PRESET)
+        self._config = buildingConfig
+        self._topology = buildingConfig.getTopology()
+
+        # Same residents every day of the run. A generated population comes from the run's
+        #   seed, so reusing the seed reproduces it too
+        if populationFile is not None:
+            self._population = ResidentPopulation.load(populationFile, self._config)
+        else:
+            self._population = ResidentPopulation.generate(self._config,
+                random.Random("{0}-population".format(self.getRandomSeed())) )
+
+        if engine not in ApartmentBuilding.ENGINES:
+            raise ValueError("Unknown simulation engine {0}, choose from {1}".format(
+                engine, ", ".join(ApartmentBuilding.ENGINES)) )
+
+        if engine == ApartmentBuilding.ENGINE_VECTORIZED:
+            # NumPy only needed for this engine
+            from models.HighRiseApartments.VectorizedResidents import VectorizedResidentEngine
+            self._vectorizedEngine = VectorizedResidentEngine(self._population, self._topology)
+        else:
+            self._vectorizedEngine = None
+
+        self._engine = engine
+
+
+    def getConfig(self):
+        return self._config
+
+
+    def getTopology(self):
+        return self._topology
+
+
+    def getPopulation(self):
+        return self._population
+
+
+    def setSubscribedActivityTypes(self, activityTypes):
+        if self._vectorizedEngine is not None and \
+                frozenset(activityTypes) != frozenset( [ RequestElevator.ACTIVITY_TYPE ] ):
+            raise ValueError("Vectorized engine only generates elevator requests")
+
+        Building.setSubscribedActivityTypes(self, activityTypes)
 
 
     def _getBuildingLocations(self):
 
+        topFloor = self._topology.getFloorName( self._topology.getHighestFloorIndex() )
         buildingLocations = {
-            "Floor 8": Location("Floor 8"),
+            topFloor: Location(topFloor),
             "Not In Building": Location("Not In Building")
         }
 
@@ -28,36 +94,78 @@ class ApartmentBuilding(Building):
 
   
     def _getElevatorModel(self):
-        return None
+        return ElevatorBank(
+            self._config.getElevatorCars(),
+            self._config.getElevatorCarCapacity(),
+            self._config.getElevatorDoorDwellSeconds(),
+            BuildingResident.ELEVATOR_SECONDS_PER_FLOOR,
+            self._config.getElevatorLobbyFloorIndex() )
 
 
-    def _createActorsForDay(self, currDate, buildingLocations):
-        self._log.debug("Building {0} creating actors for date {1}".format(
-            self.getName(), currDate.isoformat()) )
+    def _simulateDailyActivities(self, currDate):
+        if self._vectorizedEngine is None:
+            return Building._simulateDailyActivities(self, currDate)
+
+        with self._profilePhase("generate_itineraries", currDate):
+            (requestTimes, startFloors, destinationFloors, actorIds) = self._vectorizedEngine.simulateDay(
+                currDate, self._getDailyRandomSeed(currDate))
+
+        self._log.info("day_summary building=\"%s\" date=%s residents=%d elevator_requests=%d",
+            self.getName(), currDate, self._vectorizedEngine.getResidentCount(), len(requestTimes))
+
+        # Rest of the run (writers, elevator model) works on activities, already in time order
+        with self._profilePhase("drain_events", currDate):
+            return _createElevatorRequests(requestTimes, startFloors, destinationFloors, actorIds)
+
 
-        # resident = BuildingResident("819", 1, currDate)
+    def _getActivitiesFromRecords(self, elevatorRequestRecords):
+        return _createElevatorRequests(elevatorRequestRecords['epoch_seconds'],
+            elevatorRequestRecords['start_floor'], elevatorRequestRecords['destination_floor'],
+            elevatorRequestRecords['actor_id'])
 
-        # buildingLocations[resident.getLocation()].addActorToLocation(
-        #    resident, datetime.datetime(currDate.year, currDate.month, currDate.day))
 
-        # Add residents by floor
-        actorList = {}
-        for currFloor in range(2, 9):
-            # Determine number of residents on this floor
-            numberResidentsOnFloor = random.randint(10, 30)
+    def _getCheckpointState(self, startDate, endDate, nextDate, carriedOverActivities, activityWriter):
+        # Residents too, so a resumed run has the same people even without the population file
+        checkpointState = Building._getCheckpointState(self, startDate, endDate, nextDate,
+            carriedOverActivities, activityWriter)
+
+        populationBuffer = io.StringIO()
+        self._population.save(populationBuffer)
+        checkpointState['population'] = populationBuffer.getvalue()
+
+        return checkpointState
+
+
+    def _getModelParameters(self):
+        modelParameters = Building._getModelParameters(self)
+        modelParameters.update( {
+            'model_version':    ApartmentBuilding.MODEL_VERSION,
+            'engine':           self._engine,
+            'population':       self._population.getFingerprint(),
+            'config':           self._config.toDict(),
+        } )
+        return modelParameters
+
+
+    def _createActorsForDay(self, currDate, buildingLocations):
+        self._log.debug("Building %s creating actors for date %s",
+            self.getName(), currDate)
 
-            for currFloorResident in range(1,numberResidentsOnFloor + 1):
-                newResident = BuildingResident( "{0}{1:02d}".format(
-                    currFloor, currFloorResident), 1, currDate)
+        # Residents persist across days, only their plans for the day are new
+        return { currResident.getName(): currResident for currResident in self._population.getResidents() }
 
-                actorList[ newResident.getName() ] = newResident
 
-        return actorList
 
+def _createElevatorRequests(requestTimes, startFloors, destinationFloors, actorIds):
+    # RequestElevator activities from parallel NumPy columns
+    return [ RequestElevator(requestTime, startFloor, destinationFloor, actorId)
+        for (requestTime, startFloor, destinationFloor, actorId) in zip(requestTimes.tolist(),
+            startFloors.tolist(), destinationFloors.tolist(), actorIds.tolist()) ]
 
 
 if __name__ == '__main__':
     logging.basicConfig(level=logging.INFO)
     building = ApartmentBuilding("High Rise Apts", "Anywhere, USA")
-    building.runModel( datetime.date(2016, 12, 15), datetime.date(2016, 12, 15) )
+    building.runModel( datetime.date(2016, 12, 15), datetime.date(2016, 12, 15),
+        JsonLinesActivityWriter(sys.stdout) )
         
@@ -2,19 +2,23 @@
 
 import logging
 from models.common.ScheduledActivity import ScheduledActivity
-import random
-import datetime
 
 
 class ParkCar(ScheduledActivity):
 
-    def __init__(self, carParkTime):
+    ACTIVITY_TYPE = "Park Car"
+
+    __slots__ = ( '_parkingFloor', )
+
+    JSON_KEYS = ( 'activity_time', 'activity_type', 'parking_floor' )
+
+    def __init__(self, carParkTime, parkingFloor):
         ScheduledActivity.__init__(self, carParkTime, carParkTime)
-        self._parkingFloor = ParkCar.getRandomParkingFloor()
+        self._parkingFloor = parkingFloor
 
 
     def getType(self):
-        return "Park Car"
+        return ParkCar.ACTIVITY_TYPE
 
 
     def getDescription(self):
@@ -25,44 +29,47 @@ class ParkCar(ScheduledActivity):
         return self._parkingFloor
 
 
+    def getJsonValues(self):
+        return ( self.getStartTimeString(), self.getType(), self._parkingFloor )
+
+
     @staticmethod
-    def getRandomParkingFloor():
-        # In this building, floors 2 and 1 are more heavily used than floor G
-        #
-        # 30% park on floor 2
-        # 45% park on floor 1
-        # 25% park on floor G
-        randomValue = random.random()
-
-        if randomValue < 0.25:
-            return "Floor G"
-        elif randomValue < 0.25 + 0.45:
-            return "Floor 1"
-        else:
-            return "Floor 2"
+    def getRandomParkingFloor(randomGenerator, parkingFloorProbabilities):
+        # parkingFloorProbabilities is the building topology's (floor name, probability) pairs
+        randomValue = randomGenerator.random()
+
+        cumulativeProbability = 0.0
+        for (parkingFloor, probability) in parkingFloorProbabilities:
+            cumulativeProbability += probability
+            if randomValue < cumulativeProbability:
+                return parkingFloor
+
+        return parkingFloorProbabilities[-1][0]
 
 
 class RequestElevator(ScheduledActivity):
 
-    def __init__(self, buttonPressTime, startFloorIndex, destinationFloorIndex):
+    ACTIVITY_TYPE = "Request Elevator"
+
+    __slots__ = ( '_startFloorIndex', '_destinationFloorIndex', '_actorId' )
+
+    JSON_KEYS = ( 'activity_time', 'activity_type', 'button_pressed', 'destination_floor',
+        'start_floor' )
+
+    def __init__(self, buttonPressTime, startFloorIndex, destinationFloorIndex, actorId=None):
         ScheduledActivity.__init__(self, buttonPressTime, buttonPressTime)
         self._startFloorIndex = startFloorIndex
         self._destinationFloorIndex = destinationFloorIndex
-        
-        floorDelta = destinationFloorIndex - startFloorIndex
-        if floorDelta > 0:
-            self._buttonPressed = "UP"
-        else:
-            self._buttonPressed = "DOWN"
+        self._actorId = actorId
 
 
     def getType(self):
-        return "Request Elevator"
+        return RequestElevator.ACTIVITY_TYPE
 
 
     def getDescription(self):
         return "Pressed {1} button to go from floor index {0} to floor index {2}".format(
-            self._startFloorIndex, self._buttonPressed, self._destinationFloorIndex)
+            self._startFloorIndex, self.getButtonPressed(), self._destinationFloorIndex)
         
 
     def getStartFloor(self):
@@ -74,15 +81,18 @@ class RequestElevator(ScheduledActivity):
 
 
     def getButtonPressed(self):
-        return self._buttonPressed
+        # Worked out from the floors rather than stored on every request
+        if self._destinationFloorIndex > self._startFloorIndex:
+            return "UP"
+        else:
+            return "DOWN"
+
+
+    def getActorId(self):
+        return self._actorId
 
 
-    def getJsonDictionary(self):
-        return {
-            'activity_time':        self.getStartTimeString(),
-            'activity_type':        self.getType(),
-            'button_pressed':       self.getButtonPressed(),
-            'start_floor':          self.getStartFloor(),
-            'destination_floor':    self.getDestinationFloor(),
-        }
+    def getJsonValues(self):
+        return ( self.getStartTimeString(), self.getType(), self.getButtonPressed(),
+            self._destinationFloorIndex, self._startFloorIndex )
             
@@ -0,0 +1,265 @@
+#!/usr/bin/python3
+
+import logging
+import copy
+import json
+from models.common.BuildingTopology import BuildingTopology
+
+
+# The building the model was written for: garage G-2, services on 3 and 4, apartments on 2-8
+_DEFAULT_CONFIG = {
+    # Floors are "Floor G" (floor index 1) then "Floor 1" up to "Floor <highest_floor>"
+    'highest_floor':        8,
+
+    # Apartments are numbered floor then resident on the floor, 819 = floor 8 resident 19
+    'resident_floors':      [ 2, 8 ],
+    'residents_per_floor':  [ 10, 30 ],
+
+    'services': {
+        'Leasing Office':   'Floor 4',
+        'Mail':             'Floor 3',
+        'Gym':              'Floor 3',
+        'Deliveries':       'Floor 4',
+    },
+
+    'pedestrian_entrances': [ 'Floor 4', 'Floor 3' ],
+    'grill_floors':         [ 'Floor 3', 'Floor 2' ],
+
+    # Garage levels and how likely a car is parked on each. In this building, floors 2 and 1
+    #   are more heavily used than floor G
+    'parking_floors': [
+        [ 'Floor G',    0.25 ],
+        [ 'Floor 1',    0.45 ],
+        [ 'Floor 2',    0.30 ],
+    ],
+
+    # Elevator bank serving every floor, cars wait at the lobby floor
+    'elevator': {
+        'cars':                 2,
+        'capacity':             12,
+        'door_dwell_seconds':   8,
+        'lobby_floor':          'Floor 4',
+    },
+
+    # Residents who wake up at home start their day at a random time in this range of hours
+    'morning_start_hours':  [ 5, 10 ],
+}
+
+
+def _createPreset(baseConfig, overrides):
+    # Nested dictionaries (services, elevator) are merged key by key, so overriding one of
+    #   their keys keeps the rest from the base
+    presetConfig = copy.deepcopy(baseConfig)
+
+    for (currKey, overrideValue) in overrides.items():
+        if isinstance(overrideValue, dict) and isinstance(presetConfig.get(currKey), dict):
+            presetConfig[currKey] = _createPreset(presetConfig[currKey], overrideValue)
+        else:
+            presetConfig[currKey] = copy.deepcopy(overrideValue)
+
+    return presetConfig
+
+
+def _checkConfigKeys(configValues, expectedValues, keyPrefix=""):
+    # Same keys as expectedValues, all the way down through its nested dictionaries
+    if isinstance(configValues, dict) is False:
+        raise ValueError("Building config {0} should be a dictionary, got {1}".format(
+            keyPrefix.rstrip("."), configValues) )
+
+    unknownKeys = set(configValues.keys()) - set(expectedValues.keys())
+    if len(unknownKeys) > 0:
+        raise ValueError("Unknown building config keys: {0}".format(", ".join(sorted(
+            [ keyPrefix + currKey for currKey in unknownKeys ]))) )
+
+    missingKeys = set(expectedValues.keys()) - set(configValues.keys())
+    if len(missingKeys) > 0:
+        raise ValueError("Missing building config keys: {0}".format(", ".join(sorted(
+            [ keyPrefix + currKey for currKey in missingKeys ]))) )
+
+    for (currKey, expectedValue) in expectedValues.items():
+        if isinstance(expectedValue, dict):
+            _checkConfigKeys(configValues[currKey], expectedValue, keyPrefix + currKey + ".")
+
+
+# 60 floor tower with about 3,000 residents
+_TOWER_60_CONFIG = _createPreset( _DEFAULT_CONFIG, {
+    'highest_floor':        59,
+    'resident_floors':      [ 6, 59 ],
+    'residents_per_floor':  [ 46, 65 ],
+
+    'services': {
+        'Leasing Office':   'Floor 4',
+        'Mail':             'Floor 4',
+        'Gym':              'Floor 5',
+        'Deliveries':       'Floor 4',
+    },
+
+    'pedestrian_entrances': [ 'Floor 4' ],
+    'grill_floors':         [ 'Floor 5' ],
+
+    'parking_floors': [
+        [ 'Floor G',    0.20 ],
+        [ 'Floor 1',    0.30 ],
+        [ 'Floor 2',    0.30 ],
+        [ 'Floor 3',    0.20 ],
+    ],
+
+    # Keeps waits under half a minute at the tower's normal spread of start times
+    'elevator': {
+        'cars':                 16,
+        'capacity':             20,
+        'door_dwell_seconds':   8,
+        'lobby_floor':          'Floor 4',
+    },
+} )
+
+# Same tower with everyone at home starting their day in the same hour, the peak load the
+#   dispatcher has to handle. The tower's elevator bank falls well behind on this one
+_MORNING_RUSH_CONFIG = _createPreset( _TOWER_60_CONFIG, {
+    'morning_start_hours':  [ 7, 7 ],
+} )
+
+
+class BuildingConfig:
+
+    # Everything about an ApartmentBuilding that isn't drawn from the run's seed: floors,
+    #   where services and garage levels are, how densely floors are populated, the elevator
+    #   bank and when residents' days start. Read-only once built; the building, its
+    #   residents and the vectorized engine all share one
+    #
+    # Config files are JSON holding only the keys that differ from a preset, named by an
+    #   optional "preset" key (default "default")
+
+    DEFAULT_PRESET = 'default'
+
+    PRESETS = {
+        'default':          _DEFAULT_CONFIG,
+        'tower-60':         _TOWER_60_CONFIG,
+        'morning-rush':     _MORNING_RUSH_CONFIG,
+    }
+
+    # Apartment numbers leave two digits for the resident on the floor
+    MAX_RESIDENTS_PER_FLOOR = 99
+
+    _log = logging.getLogger(__name__)
+
+    def __init__(self, configValues):
+        _checkConfigKeys(configValues, _DEFAULT_CONFIG)
+
+        self._configValues = copy.deepcopy(configValues)
+
+        highestFloor = configValues['highest_floor']
+        if highestFloor < 1:
+            raise ValueError("Building needs at least one floor above G, got {0}".format(highestFloor) )
+
+        # Highest floor first, like the original hand-written layout
+        floorIndex = { "Floor {0}".format(currFloor): currFloor + 1 for currFloor in
+            range(highestFloor, 0, -1) }
+        floorIndex["Floor G"] = 1
+
+        (lowestResidentFloor, highestResidentFloor) = configValues['resident_floors']
+        if lowestResidentFloor < 1 or highestResidentFloor > highestFloor or \
+                lowestResidentFloor > highestResidentFloor:
+            raise ValueError("Resident floors {0}-{1} aren't within floors 1-{2}".format(
+                lowestResidentFloor, highestResidentFloor, highestFloor) )
+
+        (minResidentsPerFloor, maxResidentsPerFloor) = configValues['residents_per_floor']
+        if minResidentsPerFloor < 0 or maxResidentsPerFloor > BuildingConfig.MAX_RESIDENTS_PER_FLOOR or \
+                minResidentsPerFloor > maxResidentsPerFloor:
+            raise ValueError("Residents per floor {0}-{1} must be within 0-{2}".format(
+                minResidentsPerFloor, maxResidentsPerFloor, BuildingConfig.MAX_RESIDENTS_PER_FLOOR) )
+
+        parkingProbabilityTotal = sum( [ probability for (currFloor, probability) in
+            configValues['parking_floors'] ] )
+        if abs(parkingProbabilityTotal - 1.0) > 1e-9:
+            raise ValueError("Parking floor probabilities add up to {0}, not 1".format(
+                parkingProbabilityTotal) )
+
+        (earliestStartHour, latestStartHour) = configValues['morning_start_hours']
+        if earliestStartHour < 0 or latestStartHour > 23 or earliestStartHour > latestStartHour:
+            raise ValueError("Morning start hours {0}-{1} must be within 0-23".format(
+                earliestStartHour, latestStartHour) )
+
+        namedFloors = list(configValues['services'].values()) + configValues['pedestrian_entrances'] + \
+            configValues['grill_floors'] + [ currFloor for (currFloor, probability) in
+                configValues['parking_floors'] ] + [ configValues['elevator']['lobby_floor'] ]
+        for currFloor in namedFloors:
+            if currFloor not in floorIndex:
+                raise ValueError("Unknown floor {0}, building has Floor G through Floor {1}".format(
+                    currFloor, highestFloor) )
+
+        self._topology = BuildingTopology(
+            floorIndex                      = floorIndex,
+            servicesFloor                   = configValues['services'],
+            pedestrianEntranceExitFloors    = configValues['pedestrian_entrances'],
+            grillFloors                     = configValues['grill_floors'],
+            garageFloors                    = [ currFloor for (currFloor, probability) in
+                configValues['parking_floors'] ],
+            parkingFloorProbabilities       = [ (currFloor, probability) for (currFloor, probability) in
+                configValues['parking_floors'] ] )
+
+
+    @staticmethod
+    def getPreset(presetName):
+        if presetName not in BuildingConfig.PRESETS:
+            raise ValueError("Unknown building preset {0}, choose from {1}".format(
+                presetName, ", ".join(sorted(BuildingConfig.PRESETS.keys()))) )
+
+        return BuildingConfig(BuildingConfig.PRESETS[presetName])
+
+
+    @staticmethod
+    def load(configFile):
+        configOverrides = json.load(configFile)
+        presetName = configOverrides.pop('preset', BuildingConfig.DEFAULT_PRESET)
+
+        if presetName not in BuildingConfig.PRESETS:
+            raise ValueError("Unknown building preset {0}, choose from {1}".format(
+                presetName, ", ".join(sorted(BuildingConfig.PRESETS.keys()))) )
+
+        BuildingConfig._log.info("Loaded building config from preset %s with overrides for %s",
+            presetName, ", ".join(sorted(configOverrides.keys())) )
+
+        return BuildingConfig( _createPreset(BuildingConfig.PRESETS[presetName], configOverrides) )
+
+
+    def save(self, configFile):
+        json.dump(self._configValues, configFile, sort_keys=True, indent=4)
+
+
+    def toDict(self):
+        # JSON-able copy, for model parameters and cache keys
+        return copy.deepcopy(self._configValues)
+
+
+    def getTopology(self):
+        return self._topology
+
+
+    def getResidentFloors(self):
+        (lowestResidentFloor, highestResidentFloor) = self._configValues['resident_floors']
+        return range(lowestResidentFloor, highestResidentFloor + 1)
+
+
+    def getResidentsPerFloorRange(self):
+        return tuple(self._configValues['residents_per_floor'])
+
+
+    def getMorningStartHours(self):
+        return tuple(self._configValues['morning_start_hours'])
+
+
+    def getElevatorCars(self):
+        return self._configValues['elevator']['cars']
+
+
+    def getElevatorCarCapacity(self):
+        return self._configValues['elevator']['capacity']
+
+
+    def getElevatorDoorDwellSeconds(self):
+        return self._configValues['elevator']['door_dwell_seconds']
+
+
+    def getElevatorLobbyFloorIndex(self):
+        return self._topology.getFloorIndex( self._configValues['elevator']['lobby_floor'] )
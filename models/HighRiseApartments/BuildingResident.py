@@ -1,98 +1,122 @@
 #!/usr/bin/python3
 
 from models.common.Actor import Actor
+import models.common.SimulationTime as SimulationTime
 import models.HighRiseApartments.BuildingActivities 
 import logging
 import datetime
-import random
 import pprint
 
 
 class BuildingResident(Actor):
 
+    # Approximating one second per floor for elevator rides
+    ELEVATOR_SECONDS_PER_FLOOR = 1.0
 
-    def __init__(self, apartmentNumber, apartmentResidentID, currDate):
+
+    # Things residents do at MOST once per day, and how likely they are to do them each time
+    #   the chance comes up
+    DAILY_ACTIVITY_PROBABILITIES = {
+        'checkMail':                0.25,
+        'retrievePackages':         0.05,
+        'workOut':                  0.20,
+        'goShopping':               0.10,
+        'primaryActivityWeekday':   0.98,
+        'earnPaycheckWeekend':      0.05,
+    }
+
+    # What a resident does with their weekdays, and how common each is
+    OCCUPATION_WORK             = "work"
+    OCCUPATION_STAY_AT_HOME     = "stayAtHome"
+    OCCUPATION_COLLEGE          = "college"
+    OCCUPATION_K12              = "k12"
+
+    OCCUPATION_PROBABILITIES = [
+        ( OCCUPATION_WORK,          0.80 ),
+        ( OCCUPATION_STAY_AT_HOME,  0.10 ),
+        ( OCCUPATION_COLLEGE,       0.08 ),
+        ( OCCUPATION_K12,           0.02 ),
+    ]
+
+    # Residents without a car get everywhere by mass transit or on foot
+    CAR_OWNERSHIP_PROBABILITY = 0.80
+
+    # Car owners park on their usual garage floor unless it's full
+    PREFERRED_PARKING_PROBABILITY = 0.75
+
+    # Hours a resident who wakes up at home starts their day in, unless the building's
+    #   config says otherwise
+    MORNING_START_HOURS = ( 5, 10 )
+
+    # Floor layout lives in the building's shared topology, residents only carry their own state
+    __slots__ = ( '_apartmentNumber', '_apartmentResidentID', '_homeFloor', '_parkingFloor',
+        '_completedDailyActivities', '_topology', '_occupation', '_ownsCar',
+        '_preferredParkingFloor', '_morningStartHours' )
+
+    def __init__(self, apartmentNumber, apartmentResidentID, buildingTopology, occupation,
+            ownsCar, preferredParkingFloor, morningStartHours=MORNING_START_HOURS):
 
         self._apartmentNumber = apartmentNumber
         self._apartmentResidentID = apartmentResidentID
+
+        # Last two digits are the apartment on the floor, 819 => Floor 8, 5903 => Floor 59
         self._homeFloor = "Floor {0}".format(
-            self._apartmentNumber[0] )
+            self._apartmentNumber[:-2] )
+        self._topology = buildingTopology
+        self._morningStartHours = morningStartHours
+
+        # Traits that stay the same every day of the run
+        self._occupation = occupation
+        self._ownsCar = ownsCar
+        self._preferredParkingFloor = preferredParkingFloor
+
+        # Daily state, reset by _resetDailyState
         self._parkingFloor = None
 
-        # These are things that residents do at MOST once per day
-        self._dailyActivities = {
-            'checkMail': { 
-                'completed':    False, 
-                'probability':  0.25
-            },
-
-            'retrievePackages': {
-                'completed':    False,
-                'probability':  0.05
-            },
-
-            'workOut': {
-                'completed':    False,
-                'probability':  0.20
-            },
-
-            'goShopping': {
-                'completed':    False,
-                'probability':  0.10
-            },
-
-            'primaryActivityWeekday': {
-                'completed':    False,
-                'probability':  0.98
-            },
-
-            'earnPaycheckWeekend': {
-                'completed':    False,
-                'probability':  0.05
-            },
-        }
-
-        self._floorIndex = { 
-            "Floor 8": 9,
-            "Floor 7": 8,
-            "Floor 6": 7,
-            "Floor 5": 6,
-            "Floor 4": 5,
-            "Floor 3": 4,
-            "Floor 2": 3,
-            "Floor 1": 2,
-            "Floor G": 1
-        }
-
-        self._servicesFloorIndex = {
-            "Leasing Office":   self._floorIndex["Floor 4"],
-            "Mail":             self._floorIndex["Floor 3"], 
-            "Gym":              self._floorIndex["Floor 3"], 
-        }
-
-        self._buildingPedestrianEntranceExitFloors = [
-            'Floor 4',
-            'Floor 3' ]
-
-        self._buildingGrillFloors = [
-            'Floor 3',
-            'Floor 2' ]
+        # Names of daily activities already done today
+        self._completedDailyActivities = set()
 
         Actor.__init__(self, "RES {0}-{1}".format(
-            apartmentNumber, apartmentResidentID), currDate )
+            apartmentNumber, apartmentResidentID) )
+
+
+    @staticmethod
+    def createRandomTraits(randomGenerator, buildingTopology):
+        # (occupation, owns car, preferred parking floor) for a new resident
+        occupationRoll = randomGenerator.random()
+        cumulativeProbability = 0.0
+        for (occupation, probability) in BuildingResident.OCCUPATION_PROBABILITIES:
+            cumulativeProbability += probability
+            if occupationRoll <= cumulativeProbability:
+                break
+
+        ownsCar = randomGenerator.random() <= BuildingResident.CAR_OWNERSHIP_PROBABILITY
+
+        if ownsCar is True:
+            preferredParkingFloor = models.HighRiseApartments.BuildingActivities.ParkCar.getRandomParkingFloor(
+                randomGenerator, buildingTopology.getParkingFloorProbabilities())
+        else:
+            preferredParkingFloor = None
+
+        return (occupation, ownsCar, preferredParkingFloor)
+
+
+    def _resetDailyState(self):
+        self._parkingFloor = None
+        self._completedDailyActivities.clear()
 
 
     def _createActivities(self):
-        self._log.debug("Creating activities for {0} on date {1}".format(
-            self.getName(), self.getDate().isoformat()) )
+        self._log.debug("Creating activities for %s on date %s",
+            self.getName(), self.getDate())
 
         # Starting location for a building resident will either be in apt or
         #   significant others' residence
-        self.setLocation( random.choice( 
-            [ self._getHomeFloor(), "Not In Building" ]) )
+        self.setLocation( self._random.choice( 
+            [ self.getHomeFloor(), "Not In Building" ]) )
 
-        self._log.debug("Starting location for {0} on date {1}: {2}".format(
-            self.getName(), self.getDate().isoformat(), self.getLocation()) )
+        self._log.debug("Starting location for %s on date %s: %s",
+            self.getName(), self.getDate(), self.getLocation())
 
         # All logic depends on day of the week
         if self._isWeekday():
@@ -100,84 +124,104 @@ class BuildingResident(Actor):
         else:
             self._createWeekendActivities()
 
-        self._log.debug("Created activities for {0} on date {1}".format(
-            self.getName(), self.getDate().isoformat()) )
-
-
-    def startDailyActivities(self, todaysDate):
-        self._setDate(todaysDate)
-        self._log.info("Starting daily activities for " + self.getName() +
-           " on " + self._getDate().strftime("%A, %Y-%m-%d"))
+        self._log.debug("Created activities for %s on date %s",
+            self.getName(), self.getDate())
 
 
     def getApartmentNumber(self):
         return self._apartmentNumber
 
 
-    def _getHomeFloor(self):
+    def getApartmentResidentID(self):
+        return self._apartmentResidentID
+
+
+    def getOccupation(self):
+        return self._occupation
+
+
+    def ownsCar(self):
+        return self._ownsCar
+
+
+    def getPreferredParkingFloor(self):
+        return self._preferredParkingFloor
+
+
+    def getMorningStartHours(self):
+        return self._morningStartHours
+
+
+    def getHomeFloor(self):
         return self._homeFloor
 
 
+    def getActorId(self):
+        # Numeric form of the name, apartment 819 resident 1 => 81901
+        return (int(self._apartmentNumber) * 100) + self._apartmentResidentID
+
+
     def _createWeekdayActivities(self):
-        self._log.debug("Creating weekday activities for {0} on {1} ({2})".format(
-            self.getName(), self.getDate(), self._getDayOfWeekString()) )
+        self._log.debug("Creating weekday activities for %s on %s (%s)",
+            self.getName(), self.getDate(), self._getDayOfWeekString())
 
         currDate = self.getDate()
 
         # Handle case where resident need to come home first
-        if self.getLocation() != self._getHomeFloor():
+        if self.getLocation() != self.getHomeFloor():
 
             # Set a reasonable time to park and come to home floor (6-9am)
-            returnTime = datetime.datetime(
-                currDate.year, currDate.month, currDate.day,
-                random.randint(6, 8),
-                random.randint(0, 59),
-                random.randint(0, 59)
+            returnTime = SimulationTime.getMidnight(currDate) + SimulationTime.getSeconds(
+                self._random.randint(6, 8),
+                self._random.randint(0, 59),
+                self._random.randint(0, 59)
             )
 
-            self._driveHomeGoToApartment(returnTime)
+            if self._ownsCar is True:
+                self._driveHomeGoToApartment(returnTime)
+            else:
+                self._walkHomeGoToApartment(returnTime)
         # We started out at home
         else:
-            # Initialize car to a sane floor
-            self._parkingFloor = models.HighRiseApartments.BuildingActivities.ParkCar.getRandomParkingFloor()
+            # Car is wherever they parked it last
+            if self._ownsCar is True:
+                self._parkingFloor = self._chooseParkingFloor()
 
-            self._log.debug("Starting out at home, car has been warped to {0}".format(
-                self._parkingFloor) )
+                self._log.debug("Starting out at home, car has been warped to %s",
+                    self._parkingFloor)
 
             # Set their start time to a sane time
-            self._earliestStartTime += datetime.timedelta(
-                hours =     random.randint(5, 10),
-                minutes =   random.randint(0, 59),
-                seconds =   random.randint(0, 59) )
+            self._earliestStartTime += SimulationTime.getSeconds(
+                hours =     self._random.randint(*self._morningStartHours),
+                minutes =   self._random.randint(0, 59),
+                seconds =   self._random.randint(0, 59) )
 
         # Common path -- person's at home, starting a weekday
-        self._log.info("Starting day for {0} at {1}".format(
-            self.getName(), self._earliestStartTime) )
+        self._log.info("Starting day for %s at %s",
+            self.getName(), SimulationTime.LogTime(self._earliestStartTime))
 
         # Should we go to the gym first thing?
         if self._testDailyActivity('workOut') is True:
             self._workOut()
 
         # Get cleaned up and ready for day
-        self._earliestStartTime += datetime.timedelta(
-            minutes =   random.randint(20, 89),
-            seconds =   random.randint(0, 59) )
+        self._earliestStartTime += SimulationTime.getSeconds(
+            minutes =   self._random.randint(20, 89),
+            seconds =   self._random.randint(0, 59) )
 
         # Do we do our primary activity?
         if self._testDailyActivity('primaryActivityWeekday') is True:
-            # What is that primary activity?
-            primaryActivity = random.random()
 
             # Have a job
-            if primaryActivity <= 0.80:
+            if self._occupation == BuildingResident.OCCUPATION_WORK:
                 self._goToWork()
 
             # Stay at home 
-            elif primaryActivity <= 0.90:
+            elif self._occupation == BuildingResident.OCCUPATION_STAY_AT_HOME:
                 self._stayAtHomeParent()
             
             # College student
-            elif primaryActivity <= 0.98:
+            elif self._occupation == BuildingResident.OCCUPATION_COLLEGE:
                 self._goToClassCollege()
         
             # K12 student
@@ -186,24 +230,23 @@ class BuildingResident(Actor):
 
         # Did we do enough stuff to get us to evening hours?  If not, warp ahead
         currDate = self.getDate()
-        fivePmToday = datetime.datetime(
-            currDate.year, currDate.month, currDate.day, 17, 0, 0)
+        fivePmToday = SimulationTime.getMidnight(currDate) + SimulationTime.getSeconds(17, 0, 0)
         if self._getEarliestStartTime() < fivePmToday:
             self._earliestStartTime  = fivePmToday
 
         # Delay after primary activity.
-        self._earliestStartTime += datetime.timedelta(
-            minutes=random.randint( 5, 60),
-            seconds=random.randint( 0, 59))
+        self._earliestStartTime += SimulationTime.getSeconds(
+            minutes=self._random.randint( 5, 60),
+            seconds=self._random.randint( 0, 59))
 
         # Test if we are going to consider work out before dinner?
-        if random.random() < 0.60:
+        if self._random.random() < 0.60:
             if self._testDailyActivity('workOut') is True:
                self._workOut()
 
-            self._earliestStartTime += datetime.timedelta(
-                minutes=random.randint( 5, 119),
-                seconds=random.randint( 0, 59) )
+            self._earliestStartTime += SimulationTime.getSeconds(
+                minutes=self._random.randint( 5, 119),
+                seconds=self._random.randint( 0, 59) )
 
             self._eatMeal()
 
@@ -211,31 +254,35 @@ class BuildingResident(Actor):
             self._eatMeal()
 
             if self._testDailyActivity('workOut') is True:
-                self._earliestStartTime += datetime.timedelta(
-                    hours  =random.randint( 1,  2),
-                    minutes=random.randint( 0, 59),
-                    seconds=random.randint( 0, 59) )
+                self._earliestStartTime += SimulationTime.getSeconds(
+                    hours  =self._random.randint( 1,  2),
+                    minutes=self._random.randint( 0, 59),
+                    seconds=self._random.randint( 0, 59) )
 
                 self._workOut()
 
         # Are we in for the night?
-        self._earliestStartTime += datetime.timedelta(
-            minutes=random.randint( 5, 119),
-            seconds=random.randint( 0, 59) )
+        self._earliestStartTime += SimulationTime.getSeconds(
+            minutes=self._random.randint( 5, 119),
+            seconds=self._random.randint( 0, 59) )
 
-        if random.random() < 0.80:
-            self._log.info("{0} is in for the night at {1}".format(
-                self.getName(), self._getEarliestStartTime()) )
+        if self._random.random() < 0.80:
+            self._log.info("%s is in for the night at %s",
+                self.getName(), SimulationTime.LogTime(self._getEarliestStartTime()))
         else:
-            self._log.info("{0} is spending the night elsewhere".format(
-                self.getName()) )
-            self._goFromAptToCar()
+            self._log.info("%s is spending the night elsewhere",
+                self.getName())
+
+            if self._ownsCar is True:
+                self._goFromAptToCar()
+            else:
+                self._walkOutOfBuilding(self._topology.getFloorIndex(self._homeFloor))
                 
 
         
     def _createWeekendActivities(self):
-        self._log.debug("Creating weekend activities for {0} on {1} ({2})".format(
-            self.getName(), self.getDate(), self._getDayOfWeekString()) )
+        self._log.debug("Creating weekend activities for %s on %s (%s)",
+            self.getName(), self.getDate(), self._getDayOfWeekString())
 
 
     def _getParkingFloor(self):
@@ -243,14 +290,25 @@ class BuildingResident(Actor):
 
 
     def _parkCarInGarage(self, returnTime):
-        self._log.info("{0} is parking car in garage at {1}".format( 
-            self.getName(), returnTime) )
-        parkActivity = models.HighRiseApartments.BuildingActivities.ParkCar(returnTime)
+        self._log.info("%s is parking car in garage at %s",
+            self.getName(), SimulationTime.LogTime(returnTime))
 
         # Have to record what floor we parked on to be sane if we leave again later
-        self._parkingFloor = parkActivity.getParkingFloor()
+        self._parkingFloor = self._chooseParkingFloor()
 
-        self._addPendingActivity(parkActivity)
+        if self._isSubscribed(models.HighRiseApartments.BuildingActivities.ParkCar.ACTIVITY_TYPE):
+            self._addPendingActivity( models.HighRiseApartments.BuildingActivities.ParkCar(
+                returnTime, self._parkingFloor) )
+        else:
+            self._skipActivity(returnTime, returnTime)
+
+
+    def _chooseParkingFloor(self):
+        if self._random.random() <= BuildingResident.PREFERRED_PARKING_PROBABILITY:
+            return self._preferredParkingFloor
+        else:
+            return models.HighRiseApartments.BuildingActivities.ParkCar.getRandomParkingFloor(self._random,
+                self._topology.getParkingFloorProbabilities())
 
 
     def _goFromCarToApt(self, willingToCheckMail=True, willingToTakeStairs=True):
@@ -260,23 +318,23 @@ class BuildingResident(Actor):
         #       be start time
         #   * Floor we parked on (self._parkingFloor)
 
-        self._log.debug("{0} is going from car to apt, possibly with stops".format(
-            self.getName()) )
+        self._log.debug("%s is going from car to apt, possibly with stops",
+            self.getName())
 
         # See if we want to check mail first?
-        currFloorIndex = self._floorIndex[ self._getParkingFloor() ]
+        currFloorIndex = self._topology.getFloorIndex(self._getParkingFloor())
 
         if willingToCheckMail is True:
             if self._wantToCheckMail() is True:
-                self._log.debug("{0} wants to check mail after parking before going to the apt".format(
-                    self.getName()) )
+                self._log.debug("%s wants to check mail after parking before going to the apt",
+                    self.getName())
                 self._checkMail(currFloorIndex, willingToTakeStairs)
-                currFloorIndex = self._servicesFloorIndex[ "Mail" ]
+                currFloorIndex = self._topology.getServiceFloorIndex("Mail")
             elif self._wantToRetrievePackages() is True:
-                self._log.debug("{0} wants to retrive packages after parking before going to the apt".format(
-                    self.getName()) )
+                self._log.debug("%s wants to retrive packages after parking before going to the apt",
+                    self.getName())
                 self._retrievePackages(currFloorIndex, willingToTakeStairs)
-                currFloorIndex = self._servicesFloorIndex[ "Leasing Office" ]
+                currFloorIndex = self._topology.getServiceFloorIndex("Leasing Office")
 
         self._goToApartment(currFloorIndex, willingToTakeStairs)
 
@@ -295,13 +353,13 @@ class BuildingResident(Actor):
 
     def _testDailyActivity(self, dailyActivity):
         # If we've done the task today already, definitely not
-        if self._dailyActivities[dailyActivity]['completed'] is True:
+        if dailyActivity in self._completedDailyActivities:
             return False
 
         # See if we do the activity now
-        elif random.random() <= self._dailyActivities[dailyActivity]['probability']:
+        elif self._random.random() <= BuildingResident.DAILY_ACTIVITY_PROBABILITIES[dailyActivity]:
             # Mark it complete
-            self._dailyActivities[dailyActivity]['completed'] = True
+            self._completedDailyActivities.add(dailyActivity)
             return True
 
         else:
@@ -310,47 +368,49 @@ class BuildingResident(Actor):
 
 
     def _checkMail(self, startingFloorIndex, willingToTakeStairs):
-        self._log.info("{0} is checking their mail".format(self.getName()) )
+        self._log.info("%s is checking their mail",
+            self.getName())
         # Do we even have to change floors?
-        if startingFloorIndex == self._servicesFloorIndex[ "Mail" ]:
+        if startingFloorIndex == self._topology.getServiceFloorIndex("Mail"):
             # Just add some time for walking
-            self._earliestStartTime += datetime.timedelta(
-                minutes=random.randint( 3,  5),
-                seconds=random.randint( 0, 59 ) )
+            self._earliestStartTime += SimulationTime.getSeconds(
+                minutes=self._random.randint( 3,  5),
+                seconds=self._random.randint( 0, 59 ) )
 
         else:
-            self._changeFloors(startingFloorIndex, self._servicesFloorIndex[ "Mail" ])
+            self._changeFloors(startingFloorIndex, self._topology.getServiceFloorIndex("Mail"))
 
         # Show we've checked mail and add some time
-        self._earliestStartTime += datetime.timedelta(
-            minutes=random.randint( 1, 10),
-            seconds=random.randint( 0, 59) )
+        self._earliestStartTime += SimulationTime.getSeconds(
+            minutes=self._random.randint( 1, 10),
+            seconds=self._random.randint( 0, 59) )
 
 
     def _retrievePackages(self, startingFloorIndex, willingToTakeStairs):
-        self._log.info("{0} is retrieving packages from leasing office".format(
-            self.getName()) )
+        self._log.info("%s is retrieving packages from leasing office",
+            self.getName())
 
         self._goToLeasingOffice(startingFloorIndex, willingToTakeStairs)
 
         # Add time to check packages
-        self._earliestStartTime += datetime.timedelta(
-            minutes=random.randint(1, 5),
-            seconds=random.randint(0,59))
+        self._earliestStartTime += SimulationTime.getSeconds(
+            minutes=self._random.randint(1, 5),
+            seconds=self._random.randint(0,59))
 
 
     def _goToLeasingOffice(self, startingFloorIndex, willingToTakeStairs):
-        self._log.debug("{0} is going to leasing office".format( self.getName()) )
+        self._log.debug("%s is going to leasing office",
+            self.getName())
 
         # Do we even have to change floors?
-        if startingFloorIndex == self._servicesFloorIndex[ "Leasing Office" ]:
+        if startingFloorIndex == self._topology.getServiceFloorIndex("Leasing Office"):
             # Just add some time for walking
-            self._earliestStartTime += datetime.timedelta(
-                minutes=random.randint( 3, 5 ),
-                seconds=random.randint( 0, 59) )
+            self._earliestStartTime += SimulationTime.getSeconds(
+                minutes=self._random.randint( 3, 5 ),
+                seconds=self._random.randint( 0, 59) )
 
         else:
-            self._changeFloors(startingFloorIndex, self._servicesFloorIndex[ "Leasing Office" ])
+            self._changeFloors(startingFloorIndex, self._topology.getServiceFloorIndex("Leasing Office"))
 
 
     def _changeFloors(self, startingFloorIndex, endingFloorIndex, willingToTakeStairs=True):
@@ -358,59 +418,59 @@ class BuildingResident(Actor):
         if startingFloorIndex == endingFloorIndex:
             return
 
-        # Create inverse mapping of floors
-        inv_map = {v: k for k, v in self._floorIndex.items()} 
-        self._log.debug("{0} is changing floors from {1} to {2}".format(
-            self.getName(), inv_map[startingFloorIndex], inv_map[endingFloorIndex]) )
+        self._log.debug("%s is changing floors from %s to %s",
+            self.getName(), self._topology.getFloorName(startingFloorIndex),
+            self._topology.getFloorName(endingFloorIndex))
 
         startTime = self._getEarliestStartTime()
 
         # Are they taking stairs? Odds drop with more floors they need to cover
         floorIndexDelta = abs(endingFloorIndex - startingFloorIndex)
-        if willingToTakeStairs is True and random.random() <= 1.0/(4 * abs(floorIndexDelta)):
-            self._log.debug("{0} is being hardcore and taking the stairs!".format(
-                self.getName()))
+        if willingToTakeStairs is True and self._random.random() <= 1.0/(4 * abs(floorIndexDelta)):
+            self._log.debug("%s is being hardcore and taking the stairs!",
+                self.getName())
 
             # Let's call it 10-20 seconds per flight
             self._earliestStartTime += \
-                datetime.timedelta(seconds=(random.randint(10,20) * floorIndexDelta))
+                (self._random.randint(10,20) * floorIndexDelta)
 
         else:
-            self._log.debug("{0} is being smart and taking the elevator".format(
-                self.getName()))
+            self._log.debug("%s is being smart and taking the elevator",
+                self.getName())
             
             self._rideElevator(startingFloorIndex, endingFloorIndex)
 
 
     def _goToApartment(self, startingFloorIndex, willingToTakeStairs=True ):
-        self._log.debug("{0} is going to their apartment".format(self.getName()) )
-        self._changeFloors(startingFloorIndex, self._floorIndex[self._homeFloor],
+        self._log.debug("%s is going to their apartment",
+            self.getName())
+        self._changeFloors(startingFloorIndex, self._topology.getFloorIndex(self._homeFloor),
             willingToTakeStairs)
 
 
     def _rideElevator(self, startingFloorIndex, endingFloorIndex):
-        buttonActivity = models.HighRiseApartments.BuildingActivities.RequestElevator(
-            self._getEarliestStartTime() + datetime.timedelta(seconds=1), 
-            startingFloorIndex, endingFloorIndex)
+        buttonPressTime = self._getEarliestStartTime() + 1
 
-        self._addPendingActivity(buttonActivity)
+        if self._isSubscribed(models.HighRiseApartments.BuildingActivities.RequestElevator.ACTIVITY_TYPE):
+            self._addPendingActivity( models.HighRiseApartments.BuildingActivities.RequestElevator(
+                buttonPressTime, startingFloorIndex, endingFloorIndex, self.getActorId()) )
+        else:
+            self._skipActivity(buttonPressTime, buttonPressTime)
 
         # Figure out elevator ride time
         floorIndexDelta = abs(endingFloorIndex - startingFloorIndex)
 
-        # Approximating one second per floor
-        secondsPerFloor = 1.0  
-        elevatorRideTime = datetime.timedelta(seconds=(secondsPerFloor * floorIndexDelta))
+        elevatorRideTime = int(round(BuildingResident.ELEVATOR_SECONDS_PER_FLOOR * floorIndexDelta))
         self._earliestStartTime += elevatorRideTime
 
 
     def _driveHomeGoToApartment(self, returnTime):
-        self._log.info("Resident {0} returning by car at {1}".format(
-            self.getName(), returnTime) )
+        self._log.info("Resident %s returning by car at %s",
+            self.getName(), SimulationTime.LogTime(returnTime))
 
         # Do we do any shopping on way home?
         if self._testDailyActivity('goShopping'):
-            numTripsProb = random.random()
+            numTripsProb = self._random.random()
             if numTripsProb   <= 0.50:
                 unloadingTrips = 1
             elif numTripsProb <= 0.75:
@@ -420,8 +480,8 @@ class BuildingResident(Actor):
             else:
                 unloadingTrips = 4
 
-            self._log.info("Resident {0} went shopping on way home, needs {1}".format(
-                self.getName(), unloadingTrips) + " trips from car to unload")
+            self._log.info("Resident %s went shopping on way home, needs %s trips from car to unload",
+                self.getName(), unloadingTrips)
         else:
             unloadingTrips = 0
 
@@ -446,185 +506,194 @@ class BuildingResident(Actor):
                 self._goFromCarToApt( isLastTrip, isLastTrip )
 
                 # Take a few minutes to get to/from apt and drop stuff off in apartment
-                self._earliestStartTime += datetime.timedelta(
-                    minutes=random.randint(1,5),
-                    seconds=random.randint(0,59) )
+                self._earliestStartTime += SimulationTime.getSeconds(
+                    minutes=self._random.randint(1,5),
+                    seconds=self._random.randint(0,59) )
 
                 # Do we need to return to car?
                 if isLastTrip is False:
                     self._goFromAptToCar()
 
-            self._log.info("{0} is done unloading the car at {1}".format(
-                self.getName(), self._getEarliestStartTime()) )
+            self._log.info("%s is done unloading the car at %s",
+                self.getName(), SimulationTime.LogTime(self._getEarliestStartTime()))
 
 
     def _walkHomeGoToApartment(self, returnTime):
-        self._log.debug("Resident {0} returning by foot at {1}".format(
-            self.getName(), returnTime) )
+        self._log.debug("Resident %s returning by foot at %s",
+            self.getName(), SimulationTime.LogTime(returnTime))
+
+        # Walk in at the return time, not as soon as they were last free. Same as parking the
+        #   car, which can't happen before they've left either
+        self._earliestStartTime = max(self._earliestStartTime, returnTime)
 
         self._goFromWalkingEntranceToApt(returnTime)
 
 
     def _goFromWalkingEntranceToApt(self, returnTime, willingToCheckMail=True, willingToTakeStairs=True,
-            startingFloorIndex = random.choice( [ 4, 5 ] ) ):
+            startingFloorIndex=None ):
+
+        self._log.debug("%s is going to walk in from outside to their apartment",
+            self.getName())
 
-        self._log.debug("{0} is going to walk in from outside to their apartment".format(
-            self.getName()) )
+        # Pick the entrance here rather than as a default argument, which is only evaluated
+        #   once at import time and would never be reproducible from the run seed
+        if startingFloorIndex is None:
+            startingFloorIndex = self._random.choice( self._topology.getPedestrianEntranceExitFloorIndices() )
 
         # See where we come in
         currFloorIndex = startingFloorIndex
 
         if willingToCheckMail is True:
             if self._wantToCheckMail() is True:
-                self._log.debug("{0} wants to check mail after walking home before going to the apt".format(
-                    self.getName()) )
+                self._log.debug("%s wants to check mail after walking home before going to the apt",
+                    self.getName())
                 self._checkMail(currFloorIndex, willingToTakeStairs)
-                currFloorIndex = self._servicesFloorIndex[ "Mail" ]
+                currFloorIndex = self._topology.getServiceFloorIndex("Mail")
             elif self._wantToRetrievePackages() is True:
-                self._log.debug("{0} wants to retrive packages after walking home before going to the apt".format(
-                    self.getName()) )
+                self._log.debug("%s wants to retrive packages after walking home before going to the apt",
+                    self.getName())
                 self._retrievePackages(currFloorIndex, willingToTakeStairs)
-                currFloorIndex = self._servicesFloorIndex[ "Leasing Office" ]
+                currFloorIndex = self._topology.getServiceFloorIndex("Leasing Office")
 
         self._goToApartment(currFloorIndex, willingToTakeStairs)
 
 
     def _goFromAptToCar(self, willingToCheckMail=True, willingToTakeStairs=True):
 
-        self._log.debug("{0} is going to transition from apartment to car, possibly with stops".format(
-            self.getName()) )
+        self._log.debug("%s is going to transition from apartment to car, possibly with stops",
+            self.getName())
         
         # See if we want to check mail first?
-        currFloorIndex = self._floorIndex[ self._homeFloor ]
+        currFloorIndex = self._topology.getFloorIndex(self._homeFloor)
 
         if willingToCheckMail is True:
             if self._wantToCheckMail() is True:
-                self._log.debug("{0} wants to check mail on way from apt to car".format(
-                    self.getName()) )
+                self._log.debug("%s wants to check mail on way from apt to car",
+                    self.getName())
                 self._checkMail(currFloorIndex, willingToTakeStairs)
-                currFloorIndex = self._servicesFloorIndex[ "Mail" ]
+                currFloorIndex = self._topology.getServiceFloorIndex("Mail")
 
             if self._wantToRetrievePackages() is True:
-                self._log.debug("{0} wants to retrieve packages on way from apt to car".format(
-                    self.getName()) )
+                self._log.debug("%s wants to retrieve packages on way from apt to car",
+                    self.getName())
                 self._retrievePackages(currFloorIndex, willingToTakeStairs)
-                currFloorIndex = self._servicesFloorIndex[ "Leasing Office" ]
+                currFloorIndex = self._topology.getServiceFloorIndex("Leasing Office")
 
         self._goToCar(currFloorIndex, willingToTakeStairs)
 
 
     def _goToCar(self, startingFloorIndex, willingToCheckMail=True, willingToTakeStairs=True):
-        self._log.info("{0} is going to their car, possibly with stops".format(
-            self.getName()) )
+        self._log.info("%s is going to their car, possibly with stops",
+            self.getName())
 
-        self._changeFloors(startingFloorIndex, self._floorIndex[self._parkingFloor],
+        self._changeFloors(startingFloorIndex, self._topology.getFloorIndex(self._parkingFloor),
             willingToTakeStairs)
 
 
     def _workOut(self):
-        self._log.info("{0} is doing their daily workout at {1}".format(
-            self.getName(), self._getEarliestStartTime()) )
+        self._log.info("%s is doing their daily workout at %s",
+            self.getName(), SimulationTime.LogTime(self._getEarliestStartTime()))
 
         # Get changed into gym clothes
-        self._earliestStartTime += datetime.timedelta(
-            minutes=random.randint(1,10),
-            seconds=random.randint(0,59) )
+        self._earliestStartTime += SimulationTime.getSeconds(
+            minutes=self._random.randint(1,10),
+            seconds=self._random.randint(0,59) )
 
         # Do we use the building gym? Seems like hardly any do
 
-        if random.random() < 0.15:
+        if self._random.random() < 0.15:
             workOutInBuilding = True
         else:
             workOutInBuilding = False
 
-        workoutDuration = datetime.timedelta(
-            minutes=random.randint(20,89),
-            seconds=random.randint(0,59) )
+        workoutDuration = SimulationTime.getSeconds(
+            minutes=self._random.randint(20,89),
+            seconds=self._random.randint(0,59) )
 
         if workOutInBuilding is True:
-            self._log.info("{0} is wisely working out in the apartment gym".format(
-                self.getName()) )
-            self._changeFloors(self._floorIndex[self._homeFloor], 
-                self._servicesFloorIndex[ "Gym" ],
+            self._log.info("%s is wisely working out in the apartment gym",
+                self.getName())
+            self._changeFloors(self._topology.getFloorIndex(self._homeFloor), 
+                self._topology.getServiceFloorIndex("Gym"),
                 willingToTakeStairs=True)
 
             self._earliestStartTime += workoutDuration
 
             # Go back to apt
-            self._goToApartment( self._servicesFloorIndex[ "Gym" ] )
+            self._goToApartment( self._topology.getServiceFloorIndex("Gym") )
 
         else:
-            self._log.info("{0} is heading to their off-site gym".format(
-                self.getName()) )
+            self._log.info("%s is heading to their off-site gym",
+                self.getName())
 
-            driveTime = datetime.timedelta(
-                minutes=random.randint(5, 30),
-                seconds=random.randint(0, 59) )
+            driveTime = SimulationTime.getSeconds(
+                minutes=self._random.randint(5, 30),
+                seconds=self._random.randint(0, 59) )
 
             self._leaveBuildingUntilTime(
-                self._floorIndex[self._homeFloor],
+                self._topology.getFloorIndex(self._homeFloor),
                 self._getEarliestStartTime() + (2 * driveTime) + workoutDuration)
 
         # Get cleaned up after workout
-        self._earliestStartTime += datetime.timedelta(
-            minutes=random.randint(5,20),
-            seconds=random.randint(0,59) )
+        self._earliestStartTime += SimulationTime.getSeconds(
+            minutes=self._random.randint(5,20),
+            seconds=self._random.randint(0,59) )
 
-        self._log.info("{0} is done with workout and shower at {1}".format(
-            self.getName(), self._getEarliestStartTime()) )
+        self._log.info("%s is done with workout and shower at %s",
+            self.getName(), SimulationTime.LogTime(self._getEarliestStartTime()))
 
 
     def _goToWork(self):
-        self._log.info("{0} is going to work at {1}".format(
-            self.getName(), self._getEarliestStartTime()) )
+        self._log.info("%s is going to work at %s",
+            self.getName(), SimulationTime.LogTime(self._getEarliestStartTime()))
 
         # Stay at work for reasonable amount of time
         returnTime = self._earliestStartTime + \
-            datetime.timedelta(
-                hours =     random.randint(7, 11),
-                minutes =   random.randint(0, 59),
-                seconds =   random.randint(0, 59) )
+            SimulationTime.getSeconds(
+                hours =     self._random.randint(7, 11),
+                minutes =   self._random.randint(0, 59),
+                seconds =   self._random.randint(0, 59) )
 
         self._leaveBuildingUntilTime(
-            self._floorIndex[self._homeFloor],
+            self._topology.getFloorIndex(self._homeFloor),
             returnTime) 
 
-        self._log.info("{0} has returned home from work at {1}".format(
-            self.getName(), self._getEarliestStartTime()) )
+        self._log.info("%s has returned home from work at %s",
+            self.getName(), SimulationTime.LogTime(self._getEarliestStartTime()))
 
 
     def _stayAtHomeParent(self):
-        self._log.info("{0} is a stay at home parent".format(
-            self.getName()) )
+        self._log.info("%s is a stay at home parent",
+            self.getName())
 
-        stayHomeActivity = random.random() 
+        stayHomeActivity = self._random.random() 
 
         # Walk the dog/stroller?
-        if random.random() < 0.30:
+        if self._random.random() < 0.30:
             self._goForWalk() 
            
             # hang out for awhile
-            self._earliestStartTime += datetime.timedelta(
-                minutes=random.randint(30, 180),
-                seconds=random.randint(0, 59)
+            self._earliestStartTime += SimulationTime.getSeconds(
+                minutes=self._random.randint(30, 180),
+                seconds=self._random.randint(0, 59)
             )
 
         # Run some errands?
-        if random.random() < 0.80:
-            self._log.info("{0} is running an errand at {1}".format(self.getName(),
-                self._getEarliestStartTime()) )
+        if self._random.random() < 0.80:
+            self._log.info("%s is running an errand at %s",
+                self.getName(), SimulationTime.LogTime(self._getEarliestStartTime()))
 
             returnTime = self._earliestStartTime + \
-                datetime.timedelta(
-                    minutes =   random.randint(30, 179),
-                    seconds =   random.randint( 0, 59))
+                SimulationTime.getSeconds(
+                    minutes =   self._random.randint(30, 179),
+                    seconds =   self._random.randint( 0, 59))
 
-            self._log.info("{0} errand ends at {1}".format(
-                self.getName(), returnTime) )
+            self._log.info("%s errand ends at %s",
+                self.getName(), SimulationTime.LogTime(returnTime))
 
 
             self._leaveBuildingUntilTime(
-                self._floorIndex[self._homeFloor],
+                self._topology.getFloorIndex(self._homeFloor),
                 returnTime)
 
 
@@ -632,56 +701,55 @@ class BuildingResident(Actor):
         self._eatMeal(useGrill = False)
 
         # Hit the gym?
-        if random.random() < 0.50:
+        if self._random.random() < 0.50:
             if self._testDailyActivity('workOut') is True:
                 self._workOut()
 
 
 
     def _goToClassCollege(self):
-        self._log.info("{0} is a college student, going to class at {1}".format(
-            self.getName(), self._getEarliestStartTime()) )
+        self._log.info("%s is a college student, going to class at %s",
+            self.getName(), SimulationTime.LogTime(self._getEarliestStartTime()))
 
         # Stay at college for reasonable amount of time
         returnTime = self._earliestStartTime + \
-            datetime.timedelta(
-                hours =     random.randint(3,10),
-                minutes =   random.randint(0, 59),
-                seconds =   random.randint(0, 59) )
+            SimulationTime.getSeconds(
+                hours =     self._random.randint(3,10),
+                minutes =   self._random.randint(0, 59),
+                seconds =   self._random.randint(0, 59) )
 
         self._leaveBuildingUntilTime(
-            self._floorIndex[self._homeFloor],
+            self._topology.getFloorIndex(self._homeFloor),
             returnTime)
 
 
     def _goToClassK12(self):
-        self._log.info("{0} is a K12 student, going to school at {1}".format(
-            self.getName(), self._getEarliestStartTime()) )
+        self._log.info("%s is a K12 student, going to school at %s",
+            self.getName(), SimulationTime.LogTime(self._getEarliestStartTime()))
 
         currDate = self.getDate()
 
         # Stay in school until a reasonable amount of time, factor in after school activities
         #   1400 = 2pm, 2000 = 8pm
-        returnTime = datetime.datetime(
-                currDate.year, currDate.month, currDate.day,         
-                random.randint(14, 19),
-                random.randint(0, 59),
-                random.randint(0, 59) )
+        returnTime = SimulationTime.getMidnight(currDate) + SimulationTime.getSeconds(
+                self._random.randint(14, 19),
+                self._random.randint(0, 59),
+                self._random.randint(0, 59) )
 
         self._leaveBuildingUntilTime(
-            self._floorIndex[self._homeFloor], 
+            self._topology.getFloorIndex(self._homeFloor), 
             returnTime)
 
 
     def _leaveBuildingUntilTime(self, startingFloorIndex, returnTime):
-        # Do they take mass transit (bus/metro)?
-        if random.random() <= 0.20:
-            self._log.debug("{0} is leaving building via mass transit".format(
-                self.getName()) )
+        # Do they take mass transit (bus/metro)? Only option without a car
+        if self._ownsCar is False:
+            self._log.debug("%s is leaving building via mass transit",
+                self.getName())
             massTransit = True
         else:
-            self._log.debug("{0} is leaving building by their own car".format(
-                self.getName()) )
+            self._log.debug("%s is leaving building by their own car",
+                self.getName())
             massTransit = False
 
         if massTransit is True:
@@ -690,8 +758,8 @@ class BuildingResident(Actor):
             self._goFromAptToCar()
             self._parkingFloor = None
 
-        self._log.debug("{0} is coming home at {1}".format(
-            self.getName(), returnTime) )
+        self._log.debug("%s is coming home at %s",
+            self.getName(), SimulationTime.LogTime(returnTime))
 
         # Mass transit home?
         if massTransit is True:
@@ -702,11 +770,11 @@ class BuildingResident(Actor):
 
     def _walkOutOfBuilding(self, startingFloorIndex, willingToTakeStairs=True):
 
-        self._log.debug("{0} is leaving building by a walking exit".format(
-            self.getName()) )
+        self._log.debug("%s is leaving building by a walking exit",
+            self.getName())
 
         # Find out which floor we're going to 
-        exitFloorIndex = self._floorIndex[ random.choice( self._buildingPedestrianEntranceExitFloors ) ]
+        exitFloorIndex = self._topology.getFloorIndex(self._random.choice( self._topology.getPedestrianEntranceExitFloors() ))
 
         self._changeFloors(
             startingFloorIndex,
@@ -718,15 +786,15 @@ class BuildingResident(Actor):
 
     def _goForWalk(self):
 
-        self._log.info("{0} is leaving the apt and going for a walk".format(
-            self.getName()) )
+        self._log.info("%s is leaving the apt and going for a walk",
+            self.getName())
 
-        exitFloor = self._walkOutOfBuilding(self._floorIndex[self._homeFloor])
+        exitFloor = self._walkOutOfBuilding(self._topology.getFloorIndex(self._homeFloor))
 
         # Stay gone for awhile
-        returnTime = self._earliestStartTime + datetime.timedelta(
-            minutes=random.randint(20, 89),
-            seconds=random.randint(0,59))
+        returnTime = self._earliestStartTime + SimulationTime.getSeconds(
+            minutes=self._random.randint(20, 89),
+            seconds=self._random.randint(0,59))
 
         # Come back in same door we left from
         self._goFromWalkingEntranceToApt(self, returnTime, 
@@ -735,129 +803,129 @@ class BuildingResident(Actor):
 
     def _eatMeal(self, useGrill=True):
 
-        self._log.info("{0} is hungry and is going to eat at {1}".format(
-            self.getName(), self._getEarliestStartTime()) )
+        self._log.info("%s is hungry and is going to eat at %s",
+            self.getName(), SimulationTime.LogTime(self._getEarliestStartTime()))
 
         # Are we eating at a restaurant
-        if random.random() <= 0.20:
-            self._log.info("{0} is leaving to eat at a restaurant at {1}".format(
-                self.getName(), self._getEarliestStartTime()) )
+        if self._random.random() <= 0.20:
+            self._log.info("%s is leaving to eat at a restaurant at %s",
+                self.getName(), SimulationTime.LogTime(self._getEarliestStartTime()))
             self._leaveBuildingUntilTime(
-                self._floorIndex[self._homeFloor],
+                self._topology.getFloorIndex(self._homeFloor),
                 self._earliestStartTime + 
-                    datetime.timedelta(
-                        minutes =   random.randint(30, 90),
-                        seconds =   random.randint(0, 59)) )
+                    SimulationTime.getSeconds(
+                        minutes =   self._random.randint(30, 90),
+                        seconds =   self._random.randint(0, 59)) )
 
-            self._log.info("{0} has returned from the restaurant at {1}".format(
-                self.getName(), self._getEarliestStartTime()) )
+            self._log.info("%s has returned from the restaurant at %s",
+                self.getName(), SimulationTime.LogTime(self._getEarliestStartTime()))
 
         # eating at home
         else:
-            self._log.debug("{0} is eating a meal at home".format(
-                self.getName()) )
+            self._log.debug("%s is eating a meal at home",
+                self.getName())
 
             # Are we ordering in?
-            if random.random() <= 0.05:
+            if self._random.random() <= 0.05:
                 # Generate delivery person behavior
                 self._requestDeliveryToApt()
 
             # Do we need to cook?
-            elif random.random() <= 0.50:
+            elif self._random.random() <= 0.50:
 
                 # Does cooking involve grilling in courtyard?
-                if useGrill is True and random.random() <= 0.05:
+                if useGrill is True and self._random.random() <= 0.05:
                     self._useCourtyardGrillingStation()
 
                 else:
                     # Cooking time
-                    self._earliestStartTime += datetime.timedelta(
-                        minutes =   random.randint(5, 180),
-                        seconds =   random.randint(0, 59) )
+                    self._earliestStartTime += SimulationTime.getSeconds(
+                        minutes =   self._random.randint(5, 180),
+                        seconds =   self._random.randint(0, 59) )
 
             # Eating time
-            self._earliestStartTime += datetime.timedelta(
-                minutes =   random.randint(20, 89),
-                seconds =   random.randint(0, 59) )
+            self._earliestStartTime += SimulationTime.getSeconds(
+                minutes =   self._random.randint(20, 89),
+                seconds =   self._random.randint(0, 59) )
  
-        self._log.info("{0} is done eating at {1}".format(
-            self.getName(), self._getEarliestStartTime()) )
+        self._log.info("%s is done eating at %s",
+            self.getName(), SimulationTime.LogTime(self._getEarliestStartTime()))
 
 
     def _requestDeliveryToApt(self):
 
-        self._log.info("{0} is requesting a delivery to their apartment at {1}".format(
-            self.getName(), self._getEarliestStartTime()) )
+        self._log.info("%s is requesting a delivery to their apartment at %s",
+            self.getName(), SimulationTime.LogTime(self._getEarliestStartTime()))
 
-        self._earliestStartTime += datetime.timedelta(
-            minutes=random.randint(30, 90),
-            seconds=random.randint( 0, 59) )
+        self._earliestStartTime += SimulationTime.getSeconds(
+            minutes=self._random.randint(30, 90),
+            seconds=self._random.randint( 0, 59) )
 
         # Are they willing to get buzzed in and come up themselves?
-        if random.random() <= 0.80:
-            self._log.debug("Delivery person for {0} coming to apartment".format(
-                self.getName()) )
+        if self._random.random() <= 0.80:
+            self._log.debug("Delivery person for %s coming to apartment",
+                self.getName())
 
             self._goToApartment(
-                self._floorIndex["Floor 4"], 
+                self._topology.getServiceFloorIndex("Deliveries"), 
                 willingToTakeStairs = False)
 
             # Do delivery
-            self._earliestStartTime += datetime.timedelta(
-                minutes=random.randint( 2, 9),
-                seconds=random.randint( 0, 59) )
+            self._earliestStartTime += SimulationTime.getSeconds(
+                minutes=self._random.randint( 2, 9),
+                seconds=self._random.randint( 0, 59) )
 
             # Go back to car
             self._changeFloors(
-                self._floorIndex[self._homeFloor],
-                self._floorIndex["Floor 4"],
+                self._topology.getFloorIndex(self._homeFloor),
+                self._topology.getServiceFloorIndex("Deliveries"),
                 willingToTakeStairs = True)
 
         else:
 
-            self._log.debug("{0} is heading to front entrance to pick up delivery".format(
-                self.getName()) )
+            self._log.debug("%s is heading to front entrance to pick up delivery",
+                self.getName())
 
             # Head to door to pick up delivery
             self._changeFloors(
-                self._floorIndex[self._homeFloor],
-                self._floorIndex["Floor 4"],
+                self._topology.getFloorIndex(self._homeFloor),
+                self._topology.getServiceFloorIndex("Deliveries"),
                 willingToTakeStairs = True)
 
             # Deal with money, take delivery
-            self._earliestStartTime += datetime.timedelta(
-                seconds=random.randint( 30, 180) )
+            self._earliestStartTime += SimulationTime.getSeconds(
+                seconds=self._random.randint( 30, 180) )
 
             self._goToApartment(
-                self._floorIndex["Floor 4"],
+                self._topology.getServiceFloorIndex("Deliveries"),
                 willingToTakeStairs = False)
 
 
     def _useCourtyardGrillingStation(self):
-        self._log.info("{0} is going to grill station to cook dinner".format(
-            self.getName()) )
+        self._log.info("%s is going to grill station to cook dinner",
+            self.getName())
 
         grillFloor = self._goToGrills(self._homeFloor, willingToTakeStairs=False)
 
         # Cook dinner
-        self._earliestStartTime += datetime.timedelta(
-            minutes=random.randint(10, 44),
-            seconds=random.randint( 0, 59) )
+        self._earliestStartTime += SimulationTime.getSeconds(
+            minutes=self._random.randint(10, 44),
+            seconds=self._random.randint( 0, 59) )
 
         # Head back to apartment
         self._goToApartment( grillFloor, self._homeFloor )
 
 
     def _goToGrills(self, startingFloor, willingToTakeStairs=True):
-        grillFloor = random.choice( self._buildingGrillFloors )
+        grillFloor = self._random.choice( self._topology.getGrillFloors() )
 
         # Head down with uncooked food
         self._changeFloors(
-            self._floorIndex[startingFloor],
-            self._floorIndex[grillFloor],
+            self._topology.getFloorIndex(startingFloor),
+            self._topology.getFloorIndex(grillFloor),
             willingToTakeStairs = True)
 
-        return self._floorIndex[grillFloor]
+        return self._topology.getFloorIndex(grillFloor)
  
 
 
@@ -866,6 +934,10 @@ class BuildingResident(Actor):
  
 
 if __name__ == '__main__':
+    from models.HighRiseApartments.ApartmentBuilding import ApartmentBuilding
+    import random
     logging.basicConfig(level=logging.DEBUG)
-    resident = BuildingResident( "819", 1, datetime.date(2016, 12, 15) )
-    resident.startDailyActivities()
+    building = ApartmentBuilding("High Rise Apts", "Anywhere, USA")
+    resident = BuildingResident( "819", 1, building.getTopology(), BuildingResident.OCCUPATION_WORK,
+        True, "Floor 1" )
+    resident.startDailyActivities( datetime.date(2016, 12, 15), random.Random() )
@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+
+import logging
+import json
+import hashlib
+from models.HighRiseApartments.BuildingResident import BuildingResident
+
+
+class ResidentPopulation:
+
+    # Everyone who lives in the building for a run. Residents are created once and kept
+    #   from day to day; each day only resets their transient state. Traits (occupation, car,
+    #   usual parking floor) stay the same for the whole run, and the population can be saved
+    #   and loaded to keep the same people across runs. Which floors they live on and how
+    #   many to a floor comes from the BuildingConfig
+
+    _log = logging.getLogger(__name__)
+
+    def __init__(self, residents):
+        self._residents = list(residents)
+        self._fingerprint = None
+
+
+    def getResidents(self):
+        return self._residents
+
+
+    def getResidentCount(self):
+        return len(self._residents)
+
+
+    @staticmethod
+    def generate(buildingConfig, randomGenerator):
+        buildingTopology = buildingConfig.getTopology()
+        (minResidentsPerFloor, maxResidentsPerFloor) = buildingConfig.getResidentsPerFloorRange()
+
+        residents = []
+        for currFloor in buildingConfig.getResidentFloors():
+            # Determine number of residents on this floor
+            numberResidentsOnFloor = randomGenerator.randint(minResidentsPerFloor, maxResidentsPerFloor)
+
+            for currFloorResident in range(1, numberResidentsOnFloor + 1):
+                (occupation, ownsCar, preferredParkingFloor) = \
+                    BuildingResident.createRandomTraits(randomGenerator, buildingTopology)
+
+                residents.append( BuildingResident( "{0}{1:02d}".format(
+                    currFloor, currFloorResident), 1, buildingTopology, occupation, ownsCar,
+                    preferredParkingFloor, buildingConfig.getMorningStartHours()) )
+
+        ResidentPopulation._log.info("Generated population of %d residents", len(residents))
+
+        return ResidentPopulation(residents)
+
+
+    def getFingerprint(self):
+        # Stable hash of everyone's traits, changes if any resident does
+        if self._fingerprint is None:
+            self._fingerprint = hashlib.sha256( json.dumps(self._getRecords(),
+                sort_keys=True).encode("utf-8") ).hexdigest()
+
+        return self._fingerprint
+
+
+    def save(self, populationFile):
+        json.dump(self._getRecords(), populationFile, sort_keys=True, indent=4)
+
+
+    def _getRecords(self):
+        return [ {
+                'apartment':        currResident.getApartmentNumber(),
+                'resident_id':      currResident.getApartmentResidentID(),
+                'occupation':       currResident.getOccupation(),
+                'owns_car':         currResident.ownsCar(),
+                'parking_floor':    currResident.getPreferredParkingFloor(),
+            } for currResident in self._residents ]
+
+
+    @staticmethod
+    def load(populationFile, buildingConfig):
+        # Apartments are numbered floor then resident on the floor, 819 = floor 8 resident 19
+        residentFloors = buildingConfig.getResidentFloors()
+        garageFloors = buildingConfig.getTopology().getGarageFloors()
+
+        residents = []
+        for currEntry in json.load(populationFile):
+            apartmentNumber = currEntry['apartment']
+            if len(apartmentNumber) < 3 or apartmentNumber.isdigit() is False or \
+                    int(apartmentNumber[:-2]) not in residentFloors:
+                raise ValueError("Apartment {0} isn't on this building's resident floors {1}-{2}".format(
+                    apartmentNumber, residentFloors[0], residentFloors[-1]) )
+
+            if currEntry['parking_floor'] is not None and currEntry['parking_floor'] not in garageFloors:
+                raise ValueError( ("Apartment {0} parks on {1}, which isn't one of this building's " +
+                    "garage floors").format(apartmentNumber, currEntry['parking_floor']) )
+
+            residents.append( BuildingResident( currEntry['apartment'], currEntry['resident_id'],
+                buildingConfig.getTopology(), currEntry['occupation'], currEntry['owns_car'],
+                currEntry['parking_floor'], buildingConfig.getMorningStartHours()) )
+
+        ResidentPopulation._log.info("Loaded population of %d residents", len(residents))
+
+        return ResidentPopulation(residents)
@@ -0,0 +1,471 @@
+#!/usr/bin/python3
+
+import logging
+import hashlib
+import numpy as np
+import models.common.SimulationTime as SimulationTime
+from models.HighRiseApartments.BuildingResident import BuildingResident
+
+
+class VectorizedResidentEngine:
+
+    # Generates a day of elevator requests for a whole ResidentPopulation at once. Residents
+    #   are held as parallel NumPy arrays (home floor, occupation, car, parking floor, current
+    #   time), and each decision BuildingResident makes one resident at a time is made here
+    #   for every resident it applies to with one batched draw.
+    #
+    # Branches and distributions follow BuildingResident step for step, so the elevator
+    #   request stream is statistically the same as the actor engine's, but it isn't the same
+    #   stream draw for draw. Draws are batched across residents, so there's one random stream
+    #   per day rather than one per resident.
+    #
+    # Methods take an array of resident indices and act on just those residents; a resident's
+    #   own steps still happen in the same order
+
+    _log = logging.getLogger(__name__)
+
+    def __init__(self, residentPopulation, buildingTopology):
+        residents = residentPopulation.getResidents()
+        occupations = [ currOccupation for (currOccupation, probability) in
+            BuildingResident.OCCUPATION_PROBABILITIES ]
+
+        # Population, fixed for the run
+        self._actorIds = np.array( [ currResident.getActorId() for currResident in residents ],
+            dtype=np.int64 )
+        self._homeFloors = np.array( [ buildingTopology.getFloorIndex(currResident.getHomeFloor())
+            for currResident in residents ], dtype=np.int64 )
+        self._occupations = np.array( [ occupations.index(currResident.getOccupation())
+            for currResident in residents ], dtype=np.int8 )
+        self._ownsCar = np.array( [ currResident.ownsCar() for currResident in residents ],
+            dtype=bool )
+        self._preferredParkingFloors = np.array( [
+            buildingTopology.getFloorIndex(currResident.getPreferredParkingFloor())
+                if currResident.ownsCar() is True else 0
+            for currResident in residents ], dtype=np.int64 )
+        self._morningStartHours = np.array( [ currResident.getMorningStartHours()
+            for currResident in residents ], dtype=np.int64 ).reshape(-1, 2)
+
+        self._occupationCodes = { currOccupation: currCode for (currCode, currOccupation) in
+            enumerate(occupations) }
+
+        # Where things are in the building
+        self._mailFloor = buildingTopology.getServiceFloorIndex("Mail")
+        self._leasingOfficeFloor = buildingTopology.getServiceFloorIndex("Leasing Office")
+        self._gymFloor = buildingTopology.getServiceFloorIndex("Gym")
+        self._deliveryFloor = buildingTopology.getServiceFloorIndex("Deliveries")
+        self._pedestrianEntranceExitFloors = np.array( [ buildingTopology.getFloorIndex(currFloor)
+            for currFloor in buildingTopology.getPedestrianEntranceExitFloors() ], dtype=np.int64 )
+        self._grillFloors = np.array( [ buildingTopology.getFloorIndex(currFloor)
+            for currFloor in buildingTopology.getGrillFloors() ], dtype=np.int64 )
+        self._randomParkingFloors = np.array( [ buildingTopology.getFloorIndex(currFloor)
+            for (currFloor, probability) in buildingTopology.getParkingFloorProbabilities() ], dtype=np.int64 )
+        self._randomParkingCumulativeProbabilities = np.cumsum( [ probability
+            for (currFloor, probability) in buildingTopology.getParkingFloorProbabilities() ] )
+
+        # Per-day state, set up by simulateDay
+        self._rng = None
+        self._times = None
+        self._parkingFloors = None
+        self._completedDailyActivities = None
+        self._requests = None
+
+
+    def getResidentCount(self):
+        return len(self._actorIds)
+
+
+    def simulateDay(self, currDate, dailyRandomSeed):
+        # Returns the day's elevator requests as (epoch seconds, start floor, destination floor,
+        #   actor id) arrays in time order
+        # Counter-based generator keyed on the day, so any day can be regenerated on its own
+        self._rng = np.random.Generator( np.random.Philox(key=_getPhiloxKey(dailyRandomSeed)) )
+
+        residentCount = self.getResidentCount()
+        midnight = SimulationTime.getMidnight(currDate)
+        self._times = np.full(residentCount, midnight, dtype=np.int64)
+        self._parkingFloors = self._preferredParkingFloors.copy()
+        self._completedDailyActivities = { currActivity: np.zeros(residentCount, dtype=bool)
+            for currActivity in BuildingResident.DAILY_ACTIVITY_PROBABILITIES }
+        self._requests = []
+
+        # Nothing's modelled for weekends yet, same as BuildingResident
+        if currDate.isoweekday() < 6:
+            self._createWeekdayActivities(midnight)
+
+        return self._collectRequests()
+
+
+    def _createWeekdayActivities(self, midnight):
+        allResidents = np.arange(self.getResidentCount())
+
+        # Half start the day at home, the rest spent the night elsewhere and come home 6-9am
+        startAtHome = self._rng.random(len(allResidents)) < 0.5
+        awayResidents = allResidents[~startAtHome]
+        returnTimes = midnight + self._drawSeconds(len(awayResidents),
+            hours=(6, 8), minutes=(0, 59), seconds=(0, 59))
+
+        driving = self._ownsCar[awayResidents]
+        self._driveHomeGoToApartment(awayResidents[driving], returnTimes[driving])
+        self._walkHomeGoToApartment(awayResidents[~driving], returnTimes[~driving])
+
+        homeResidents = allResidents[startAtHome]
+        homeDrivers = homeResidents[ self._ownsCar[homeResidents] ]
+        self._parkingFloors[homeDrivers] = self._chooseParkingFloors(homeDrivers)
+        self._advance(homeResidents, hours=( self._morningStartHours[homeResidents, 0],
+            self._morningStartHours[homeResidents, 1] ), minutes=(0, 59), seconds=(0, 59))
+
+        # Common path -- everyone's at home, starting a weekday
+        self._workOut( allResidents[ self._testDailyActivity('workOut', allResidents) ] )
+
+        # Get cleaned up and ready for day
+        self._advance(allResidents, minutes=(20, 89), seconds=(0, 59))
+
+        primaryResidents = allResidents[ self._testDailyActivity('primaryActivityWeekday', allResidents) ]
+        primaryOccupations = self._occupations[primaryResidents]
+        self._goToWork( primaryResidents[ primaryOccupations ==
+            self._occupationCodes[BuildingResident.OCCUPATION_WORK] ] )
+        self._stayAtHomeParent( primaryResidents[ primaryOccupations ==
+            self._occupationCodes[BuildingResident.OCCUPATION_STAY_AT_HOME] ] )
+        self._goToClassCollege( primaryResidents[ primaryOccupations ==
+            self._occupationCodes[BuildingResident.OCCUPATION_COLLEGE] ] )
+        self._goToClassK12( primaryResidents[ primaryOccupations ==
+            self._occupationCodes[BuildingResident.OCCUPATION_K12] ], midnight )
+
+        # Warp anyone who isn't there yet ahead to 5pm
+        fivePmToday = midnight + SimulationTime.getSeconds(17, 0, 0)
+        np.maximum(self._times, fivePmToday, out=self._times)
+
+        # Delay after primary activity
+        self._advance(allResidents, minutes=(5, 60), seconds=(0, 59))
+
+        # Work out before or after dinner
+        workOutFirst = self._rng.random(len(allResidents)) < 0.60
+
+        beforeDinner = allResidents[workOutFirst]
+        self._workOut( beforeDinner[ self._testDailyActivity('workOut', beforeDinner) ] )
+        self._advance(beforeDinner, minutes=(5, 119), seconds=(0, 59))
+        self._eatMeal(beforeDinner, useGrill=True)
+
+        afterDinner = allResidents[~workOutFirst]
+        self._eatMeal(afterDinner, useGrill=True)
+        afterDinner = afterDinner[ self._testDailyActivity('workOut', afterDinner) ]
+        self._advance(afterDinner, hours=(1, 2), minutes=(0, 59), seconds=(0, 59))
+        self._workOut(afterDinner)
+
+        # In for the night, or spending it elsewhere?
+        self._advance(allResidents, minutes=(5, 119), seconds=(0, 59))
+
+        leaving = allResidents[ self._rng.random(len(allResidents)) >= 0.80 ]
+        leavingDrivers = self._ownsCar[leaving]
+        self._goFromAptToCar(leaving[leavingDrivers])
+        self._walkOutOfBuilding(leaving[~leavingDrivers], self._homeFloors[ leaving[~leavingDrivers] ])
+
+
+    def _goToWork(self, residents):
+        returnTimes = self._times[residents] + self._drawSeconds(len(residents),
+            hours=(7, 11), minutes=(0, 59), seconds=(0, 59))
+        self._leaveBuildingUntilTime(residents, returnTimes)
+
+
+    def _stayAtHomeParent(self, residents):
+        # Walk the dog/stroller?
+        walkers = residents[ self._rng.random(len(residents)) < 0.30 ]
+        self._goForWalk(walkers)
+        self._advance(walkers, minutes=(30, 180), seconds=(0, 59))
+
+        # Run some errands?
+        errands = residents[ self._rng.random(len(residents)) < 0.80 ]
+        returnTimes = self._times[errands] + self._drawSeconds(len(errands),
+            minutes=(30, 179), seconds=(0, 59))
+        self._leaveBuildingUntilTime(errands, returnTimes)
+
+        # Eat lunch
+        self._eatMeal(residents, useGrill=False)
+
+        # Hit the gym?
+        gymCandidates = residents[ self._rng.random(len(residents)) < 0.50 ]
+        self._workOut( gymCandidates[ self._testDailyActivity('workOut', gymCandidates) ] )
+
+
+    def _goToClassCollege(self, residents):
+        returnTimes = self._times[residents] + self._drawSeconds(len(residents),
+            hours=(3, 10), minutes=(0, 59), seconds=(0, 59))
+        self._leaveBuildingUntilTime(residents, returnTimes)
+
+
+    def _goToClassK12(self, residents, midnight):
+        # School plus after school activities, back between 2pm and 8pm
+        returnTimes = midnight + self._drawSeconds(len(residents),
+            hours=(14, 19), minutes=(0, 59), seconds=(0, 59))
+        self._leaveBuildingUntilTime(residents, returnTimes)
+
+
+    def _workOut(self, residents):
+        # Get changed into gym clothes
+        self._advance(residents, minutes=(1, 10), seconds=(0, 59))
+
+        inBuilding = self._rng.random(len(residents)) < 0.15
+        workoutDurations = self._drawSeconds(len(residents), minutes=(20, 89), seconds=(0, 59))
+
+        buildingGym = residents[inBuilding]
+        self._changeFloors(buildingGym, self._homeFloors[buildingGym], self._gymFloor, True)
+        self._times[buildingGym] += workoutDurations[inBuilding]
+        self._changeFloors(buildingGym, self._gymFloor, self._homeFloors[buildingGym], True)
+
+        offSite = residents[~inBuilding]
+        driveTimes = self._drawSeconds(len(offSite), minutes=(5, 30), seconds=(0, 59))
+        self._leaveBuildingUntilTime(offSite,
+            self._times[offSite] + (2 * driveTimes) + workoutDurations[~inBuilding])
+
+        # Get cleaned up after workout
+        self._advance(residents, minutes=(5, 20), seconds=(0, 59))
+
+
+    def _eatMeal(self, residents, useGrill):
+        atRestaurant = self._rng.random(len(residents)) <= 0.20
+
+        restaurantGoers = residents[atRestaurant]
+        returnTimes = self._times[restaurantGoers] + self._drawSeconds(len(restaurantGoers),
+            minutes=(30, 90), seconds=(0, 59))
+        self._leaveBuildingUntilTime(restaurantGoers, returnTimes)
+
+        atHome = residents[~atRestaurant]
+        orderIn = self._rng.random(len(atHome)) <= 0.05
+        cook = ~orderIn & (self._rng.random(len(atHome)) <= 0.50)
+        if useGrill is True:
+            grill = cook & (self._rng.random(len(atHome)) <= 0.05)
+        else:
+            grill = np.zeros(len(atHome), dtype=bool)
+
+        self._requestDeliveryToApt(atHome[orderIn])
+        self._useCourtyardGrillingStation(atHome[grill])
+        self._advance(atHome[ cook & ~grill ], minutes=(5, 180), seconds=(0, 59))
+
+        # Eating time
+        self._advance(atHome, minutes=(20, 89), seconds=(0, 59))
+
+
+    def _requestDeliveryToApt(self, residents):
+        self._advance(residents, minutes=(30, 90), seconds=(0, 59))
+
+        # Delivery person comes up, or resident goes down to meet them
+        comesUp = self._rng.random(len(residents)) <= 0.80
+
+        deliveredToDoor = residents[comesUp]
+        self._changeFloors(deliveredToDoor, self._deliveryFloor, self._homeFloors[deliveredToDoor], False)
+        self._advance(deliveredToDoor, minutes=(2, 9), seconds=(0, 59))
+        self._changeFloors(deliveredToDoor, self._homeFloors[deliveredToDoor], self._deliveryFloor, True)
+
+        pickedUp = residents[~comesUp]
+        self._changeFloors(pickedUp, self._homeFloors[pickedUp], self._deliveryFloor, True)
+        self._advance(pickedUp, seconds=(30, 180))
+        self._changeFloors(pickedUp, self._deliveryFloor, self._homeFloors[pickedUp], False)
+
+
+    def _useCourtyardGrillingStation(self, residents):
+        grillFloors = self._rng.choice(self._grillFloors, size=len(residents))
+
+        self._changeFloors(residents, self._homeFloors[residents], grillFloors, True)
+        self._advance(residents, minutes=(10, 44), seconds=(0, 59))
+        self._changeFloors(residents, grillFloors, self._homeFloors[residents], False)
+
+
+    def _goForWalk(self, residents):
+        exitFloors = self._walkOutOfBuilding(residents, self._homeFloors[residents])
+
+        # Like BuildingResident, they come straight back in the same door without checking
+        #   the mail
+        self._changeFloors(residents, exitFloors, self._homeFloors[residents], True)
+
+
+    def _leaveBuildingUntilTime(self, residents, returnTimes):
+        # Mass transit is the only option without a car
+        drivers = self._ownsCar[residents]
+
+        walkers = residents[~drivers]
+        self._walkOutOfBuilding(walkers, self._homeFloors[walkers])
+        self._walkHomeGoToApartment(walkers, returnTimes[~drivers])
+
+        driving = residents[drivers]
+        self._goFromAptToCar(driving)
+        self._driveHomeGoToApartment(driving, returnTimes[drivers])
+
+
+    def _walkOutOfBuilding(self, residents, startingFloors):
+        exitFloors = self._rng.choice(self._pedestrianEntranceExitFloors, size=len(residents))
+        self._changeFloors(residents, startingFloors, exitFloors, True)
+        return exitFloors
+
+
+    def _walkHomeGoToApartment(self, residents, returnTimes):
+        # Walk in at the return time, or as soon as they're out if that's later
+        self._times[residents] = np.maximum(self._times[residents], returnTimes)
+
+        entranceFloors = self._rng.choice(self._pedestrianEntranceExitFloors, size=len(residents))
+        self._goToAptWithStops(residents, entranceFloors, True, True)
+
+
+    def _driveHomeGoToApartment(self, residents, returnTimes):
+        # Shopping on the way home means 1-4 trips from the car to unload
+        unloadingTrips = np.zeros(len(residents), dtype=np.int64)
+        shoppers = self._testDailyActivity('goShopping', residents)
+        unloadingTrips[shoppers] = 1 + np.searchsorted( [ 0.50, 0.75, 0.87 ],
+            self._rng.random(np.count_nonzero(shoppers)), side='left' )
+
+        self._parkCarInGarage(residents, returnTimes)
+
+        self._goToAptWithStops(residents[unloadingTrips == 0],
+            self._parkingFloors[ residents[unloadingTrips == 0] ], True, True)
+
+        for currTrip in range(1, 4 + 1):
+            lastTrip = residents[unloadingTrips == currTrip]
+            moreTrips = residents[unloadingTrips > currTrip]
+
+            # Only willing to check mail or take the stairs on the last trip
+            self._goToAptWithStops(lastTrip, self._parkingFloors[lastTrip], True, True)
+            self._goToAptWithStops(moreTrips, self._parkingFloors[moreTrips], False, False)
+
+            # Take a few minutes to get to/from apt and drop stuff off in apartment
+            self._advance(residents[unloadingTrips >= currTrip], minutes=(1, 5), seconds=(0, 59))
+
+            self._goFromAptToCar(moreTrips)
+
+
+    def _parkCarInGarage(self, residents, returnTimes):
+        # Can't park before we've left; BuildingResident would refuse the conflicting activity
+        parkTimes = np.maximum(returnTimes, self._times[residents] + 1)
+        self._times[residents] = parkTimes + 1
+        self._parkingFloors[residents] = self._chooseParkingFloors(residents)
+
+
+    def _chooseParkingFloors(self, residents):
+        # Usual floor, unless it's full and they take whatever ParkCar.getRandomParkingFloor would
+        randomFloors = self._randomParkingFloors[ np.searchsorted(
+            self._randomParkingCumulativeProbabilities, self._rng.random(len(residents)), side='right') ]
+        preferred = self._rng.random(len(residents)) <= BuildingResident.PREFERRED_PARKING_PROBABILITY
+
+        return np.where(preferred, self._preferredParkingFloors[residents], randomFloors)
+
+
+    def _goToAptWithStops(self, residents, startingFloors, willingToCheckMail, willingToTakeStairs):
+        # Way in from the car or a walking entrance, maybe stopping for mail or packages
+        currFloors = np.array(startingFloors, dtype=np.int64)
+
+        if willingToCheckMail is True:
+            checkingMail = self._testDailyActivity('checkMail', residents)
+            self._checkMail(residents[checkingMail], currFloors[checkingMail])
+            currFloors[checkingMail] = self._mailFloor
+
+            others = np.flatnonzero(~checkingMail)
+            gettingPackages = others[ self._testDailyActivity('retrievePackages', residents[others]) ]
+            self._retrievePackages(residents[gettingPackages], currFloors[gettingPackages])
+            currFloors[gettingPackages] = self._leasingOfficeFloor
+
+        self._changeFloors(residents, currFloors, self._homeFloors[residents], willingToTakeStairs)
+
+
+    def _goFromAptToCar(self, residents):
+        currFloors = self._homeFloors[residents].copy()
+
+        checkingMail = self._testDailyActivity('checkMail', residents)
+        self._checkMail(residents[checkingMail], currFloors[checkingMail])
+        currFloors[checkingMail] = self._mailFloor
+
+        gettingPackages = self._testDailyActivity('retrievePackages', residents)
+        self._retrievePackages(residents[gettingPackages], currFloors[gettingPackages])
+        currFloors[gettingPackages] = self._leasingOfficeFloor
+
+        self._changeFloors(residents, currFloors, self._parkingFloors[residents], True)
+
+
+    def _checkMail(self, residents, startingFloors):
+        self._goToServiceFloor(residents, startingFloors, self._mailFloor)
+        self._advance(residents, minutes=(1, 10), seconds=(0, 59))
+
+
+    def _retrievePackages(self, residents, startingFloors):
+        self._goToServiceFloor(residents, startingFloors, self._leasingOfficeFloor)
+        self._advance(residents, minutes=(1, 5), seconds=(0, 59))
+
+
+    def _goToServiceFloor(self, residents, startingFloors, serviceFloor):
+        # Already on the right floor, just walk over
+        sameFloor = startingFloors == serviceFloor
+        self._advance(residents[sameFloor], minutes=(3, 5), seconds=(0, 59))
+        self._changeFloors(residents[~sameFloor], startingFloors[~sameFloor], serviceFloor, True)
+
+
+    def _changeFloors(self, residents, startingFloors, endingFloors, willingToTakeStairs):
+        startingFloors = np.broadcast_to(startingFloors, residents.shape)
+        endingFloors = np.broadcast_to(endingFloors, residents.shape)
+
+        moving = startingFloors != endingFloors
+        residents = residents[moving]
+        startingFloors = startingFloors[moving]
+        endingFloors = endingFloors[moving]
+        floorDeltas = np.abs(endingFloors - startingFloors)
+
+        # Odds of taking the stairs drop with more floors to cover
+        if willingToTakeStairs is True:
+            takingStairs = self._rng.random(len(residents)) <= 1.0 / (4 * floorDeltas)
+        else:
+            takingStairs = np.zeros(len(residents), dtype=bool)
+
+        # Let's call it 10-20 seconds per flight
+        self._times[ residents[takingStairs] ] += self._rng.integers(10, 20 + 1,
+            size=np.count_nonzero(takingStairs)) * floorDeltas[takingStairs]
+
+        riding = residents[~takingStairs]
+        requestTimes = self._times[riding] + 1
+        self._requests.append( (requestTimes, startingFloors[~takingStairs],
+            endingFloors[~takingStairs], riding) )
+
+        # Button press takes a second, then the ride
+        self._times[riding] = requestTimes + 1 + np.rint(
+            BuildingResident.ELEVATOR_SECONDS_PER_FLOOR * floorDeltas[~takingStairs]).astype(np.int64)
+
+
+    def _testDailyActivity(self, dailyActivity, residents):
+        # Same once-a-day rule as BuildingResident._testDailyActivity, for each of residents
+        completed = self._completedDailyActivities[dailyActivity]
+        doingIt = ~completed[residents] & ( self._rng.random(len(residents)) <=
+            BuildingResident.DAILY_ACTIVITY_PROBABILITIES[dailyActivity] )
+        completed[ residents[doingIt] ] = True
+        return doingIt
+
+
+    def _advance(self, residents, hours=None, minutes=None, seconds=None):
+        self._times[residents] += self._drawSeconds(len(residents), hours, minutes, seconds)
+
+
+    def _drawSeconds(self, count, hours=None, minutes=None, seconds=None):
+        # Vector version of SimulationTime.getSeconds(hours=randint(..), minutes=randint(..), ..),
+        #   each unit given as an inclusive (low, high) range. Bounds can also be arrays with
+        #   one per drawn value
+        drawnSeconds = np.zeros(count, dtype=np.int64)
+        for (unitRange, unitSeconds) in ( (hours, SimulationTime.SECONDS_PER_HOUR),
+                (minutes, SimulationTime.SECONDS_PER_MINUTE), (seconds, 1) ):
+            if unitRange is not None:
+                drawnSeconds += self._rng.integers(unitRange[0], unitRange[1] + 1, size=count) * unitSeconds
+
+        return drawnSeconds
+
+
+    def _collectRequests(self):
+        if len(self._requests) == 0:
+            emptyColumn = np.zeros(0, dtype=np.int64)
+            return (emptyColumn, emptyColumn, emptyColumn, emptyColumn)
+
+        (requestTimes, startFloors, destinationFloors, residents) = [ np.concatenate(currColumn)
+            for currColumn in zip(*self._requests) ]
+
+        # Time order, ties in population order like the actor engine
+        requestOrder = np.lexsort( (residents, requestTimes) )
+
+        return ( requestTimes[requestOrder], startFloors[requestOrder],
+            destinationFloors[requestOrder], self._actorIds[ residents[requestOrder] ] )
+
+
+def _getPhiloxKey(dailyRandomSeed):
+    # random.seed hashes string seeds; do the same to get a stable 128-bit key
+    return int.from_bytes( hashlib.sha512(str(dailyRandomSeed).encode("utf-8")).digest()[:16], "little" )
@@ -0,0 +1,145 @@
+#!/usr/bin/python3
+
+import json
+import gzip
+import numpy as np
+import models.common.SimulationTime as SimulationTime
+from models.common.ElevatorRequestTrace import ELEVATOR_REQUEST_DTYPE, DIRECTION_UP, DIRECTION_DOWN, \
+    readElevatorRequestTrace
+
+
+# Reads back every output format of HighRiseDriver.py, for the replay and benchmark drivers
+#   here and the training scripts under pybrain/
+
+ACTIVITY_FILE_EXTENSIONS = ( '.json', '.json.gz', '.jsonl', '.jsonl.gz', '.npy' )
+
+
+def isActivityFile(filename):
+    for currExtension in ACTIVITY_FILE_EXTENSIONS:
+        if filename.endswith(currExtension):
+            return True
+
+    return False
+
+
+def readActivities(activityFile):
+
+    # Yields (timestamp string, activity dictionary) pairs in time order from any
+    #   output format of HighRiseDriver.py:
+    #
+    #   .json   one dictionary of timestamp => list of activities (read in one go)
+    #   .jsonl  one activity per line (streamed, never holds more than one line)
+    #   .npy    elevator request trace (memory-mapped, see readElevatorRequestTrace)
+    #
+    # JSON formats can be gzip compressed (.gz)
+
+    if activityFile.endswith('.npy'):
+        yield from _readActivitiesFromTrace(activityFile)
+        return
+
+    if activityFile.endswith('.gz'):
+        openActivityFile = gzip.open
+        uncompressedName = activityFile[:-len('.gz')]
+    else:
+        openActivityFile = open
+        uncompressedName = activityFile
+
+    with openActivityFile(activityFile, 'rt') as activities:
+
+        if uncompressedName.endswith('.jsonl'):
+            for currLine in activities:
+                currLine = currLine.strip()
+                if len(currLine) == 0:
+                    continue
+
+                currActivity = json.loads(currLine)
+                yield ( currActivity['activity_time'], currActivity )
+
+        else:
+            dataDictionary = json.load(activities)
+
+            # Written in time order, and json keeps key order, so no need to sort
+            for (timestampString, timestampActivities) in dataDictionary.items():
+                for currActivity in timestampActivities:
+                    yield ( timestampString, currActivity )
+
+
+def loadElevatorRequestTrace(activityFilename):
+
+    # Returns an ELEVATOR_REQUEST_DTYPE array from any HighRiseDriver.py output format. .npy
+    #   traces are memory-mapped; JSON formats are parsed (JSON output doesn't record actor
+    #   ids, those come back as zero)
+    if activityFilename.endswith('.npy'):
+        return readElevatorRequestTrace(activityFilename)
+
+    timestampStrings = []
+    startFloors = []
+    destinationFloors = []
+    upButtons = []
+    for (timestampString, currActivity) in readActivities(activityFilename):
+        if currActivity is None or currActivity.get('activity_type') != "Request Elevator":
+            continue
+
+        timestampStrings.append(timestampString)
+        startFloors.append(currActivity['start_floor'])
+        destinationFloors.append(currActivity['destination_floor'])
+        upButtons.append(currActivity['button_pressed'] == "UP")
+
+    # Filled a column at a time, timestamps parsed in one go
+    requests = np.zeros( len(timestampStrings), dtype=ELEVATOR_REQUEST_DTYPE )
+    requests['epoch_seconds'] = epochSecondsFromTimestampStrings(timestampStrings)
+    requests['start_floor'] = startFloors
+    requests['destination_floor'] = destinationFloors
+    requests['direction'] = np.where(upButtons, DIRECTION_UP, DIRECTION_DOWN)
+
+    return requests
+
+
+def epochSecondsFromTimestampStrings(timestampStrings):
+
+    # "%Y%m%d %H%M%S" strings are fixed width, so treat them as a matrix of ASCII digits
+    #   rather than running strptime on each one
+    if len(timestampStrings) == 0:
+        return np.zeros(0, dtype=np.int64)
+
+    digits = np.asarray(timestampStrings, dtype='S15').view(np.uint8).reshape(-1, 15)
+    digits = digits.astype(np.int64) - ord('0')
+
+    def _digitsToInt(firstColumn, lastColumn):
+        value = np.zeros(digits.shape[0], dtype=np.int64)
+        for currColumn in range(firstColumn, lastColumn + 1):
+            value = (value * 10) + digits[:, currColumn]
+        return value
+
+    year    = _digitsToInt( 0,  3)
+    month   = _digitsToInt( 4,  5)
+    day     = _digitsToInt( 6,  7)
+    hour    = _digitsToInt( 9, 10)
+    minute  = _digitsToInt(11, 12)
+    second  = _digitsToInt(13, 14)
+
+    monthStart = (year - 1970).astype('datetime64[Y]').astype('datetime64[M]') + (month - 1)
+    epochDays = (monthStart.astype('datetime64[D]') + (day - 1)).astype(np.int64)
+
+    return (epochDays * SimulationTime.SECONDS_PER_DAY) + (hour * 3600) + (minute * 60) + second
+
+
+def _readActivitiesFromTrace(traceFile):
+    trace = readElevatorRequestTrace(traceFile)
+
+    for currRecord in trace:
+        timestampString = SimulationTime.formatTimestamp(int(currRecord['epoch_seconds']))
+
+        if currRecord['direction'] > 0:
+            buttonPressed = "UP"
+        else:
+            buttonPressed = "DOWN"
+
+        yield ( timestampString, {
+            'activity_time':        timestampString,
+            'activity_type':        "Request Elevator",
+            'button_pressed':       buttonPressed,
+            'start_floor':          int(currRecord['start_floor']),
+            'destination_floor':    int(currRecord['destination_floor']),
+            'actor_id':             int(currRecord['actor_id']),
+        } )
@@ -0,0 +1,174 @@
+#!/usr/bin/python3
+
+import abc
+import logging
+import json
+
+
+class ActivityWriter:
+
+    __metaclass__ = abc.ABCMeta
+
+    def __init__(self, outputFile):
+        self._log = logging.getLogger(__name__)
+        self._outputFile = outputFile
+        self._activitiesWritten = 0
+
+
+    def getActivitiesWritten(self):
+        return self._activitiesWritten
+
+
+    def getCheckpointState(self):
+        # Everything the writer needs to carry on appending to the same output after a resume
+        return { 'activities_written': self._activitiesWritten }
+
+
+    def restoreCheckpointState(self, checkpointState):
+        self._activitiesWritten = checkpointState['activities_written']
+
+
+    @abc.abstractmethod
+    def writeDailyActivities(self, currDate, dailyActivities):
+        return
+
+
+    @abc.abstractmethod
+    def finish(self):
+        return
+
+
+class JsonActivityWriter(ActivityWriter):
+
+    # Writes the original format -- one dictionary mapping "%Y%m%d %H%M%S" timestamps to the
+    #   list of activities at that time -- byte for byte the same as
+    #   json.dump(activities, sort_keys=True, indent=4), but a day at a time. Days arrive in
+    #   date order with their activities sorted by time, so keys are already in sorted order
+
+    def __init__(self, outputFile):
+        ActivityWriter.__init__(self, outputFile)
+        self._entriesWritten = 0
+
+        # Activity type => %-template of one indented activity object
+        self._objectTemplates = {}
+
+
+    def getCheckpointState(self):
+        checkpointState = ActivityWriter.getCheckpointState(self)
+        checkpointState['entries_written'] = self._entriesWritten
+        return checkpointState
+
+
+    def restoreCheckpointState(self, checkpointState):
+        ActivityWriter.restoreCheckpointState(self, checkpointState)
+        self._entriesWritten = checkpointState['entries_written']
+
+
+    def writeDailyActivities(self, currDate, dailyActivities):
+        # Whole day is formatted into one list of strings and written at once
+        outputParts = []
+        currStartTime = None
+
+        for currActivity in dailyActivities:
+            # Group on the integer start times, only formatting a timestamp once per entry
+            if currActivity.getStartTime() != currStartTime:
+                if currStartTime is not None:
+                    outputParts.append("\n    ]")
+
+                if self._entriesWritten == 0:
+                    outputParts.append("{")
+                else:
+                    outputParts.append(",")
+
+                currStartTime = currActivity.getStartTime()
+                outputParts.append("\n    {0}: [".format(
+                    _encodeJsonString(currActivity.getStartTimeString()) ))
+                self._entriesWritten += 1
+
+            else:
+                outputParts.append(",")
+
+            outputParts.append( _formatActivity(self._objectTemplates, currActivity,
+                "\n        {", ",", "\n            %s: %%s", "\n        }") )
+
+        if currStartTime is not None:
+            outputParts.append("\n    ]")
+
+        self._outputFile.write("".join(outputParts))
+        self._activitiesWritten += len(dailyActivities)
+
+        self._log.debug("Wrote {0} activities for {1}".format(
+            len(dailyActivities), currDate.isoformat()) )
+
+
+    def finish(self):
+        if self._entriesWritten == 0:
+            self._outputFile.write("{}")
+        else:
+            self._outputFile.write("\n}")
+
+        self._outputFile.flush()
+
+
+class JsonLinesActivityWriter(ActivityWriter):
+
+    # One JSON object per activity per line. Nothing is held beyond the current day, and
+    #   the file is valid up to the last completed day even if a run is killed
+
+    def __init__(self, outputFile):
+        ActivityWriter.__init__(self, outputFile)
+
+        # Activity type => %-template of one activity's line
+        self._lineTemplates = {}
+
+
+    def writeDailyActivities(self, currDate, dailyActivities):
+        # Same text as json.dumps(activity.getJsonDictionary(), sort_keys=True) per line
+        self._outputFile.write( "".join( [ _formatActivity(self._lineTemplates, currActivity,
+                "{", ", ", "%s: %%s", "}\n")
+            for currActivity in dailyActivities ] ) )
+
+        self._activitiesWritten += len(dailyActivities)
+
+        # Push each completed day out to disk
+        self._outputFile.flush()
+
+        self._log.debug("Wrote {0} activities for {1}".format(
+            len(dailyActivities), currDate.isoformat()) )
+
+
+    def finish(self):
+        self._outputFile.flush()
+
+
+# What json.dumps uses for strings with its default ensure_ascii=True
+_encodeJsonString = json.encoder.encode_basestring_ascii
+
+
+def _encodeJsonValue(value):
+    # Same text json.dumps gives for a single value
+    if isinstance(value, str):
+        return _encodeJsonString(value)
+    elif value is None:
+        return "null"
+    elif value is True:
+        return "true"
+    elif value is False:
+        return "false"
+    elif isinstance(value, int):
+        return int.__repr__(value)
+    else:
+        return json.dumps(value, sort_keys=True)
+
+
+def _formatActivity(templates, activity, objectStart, separator, fieldFormat, objectEnd):
+    # Keys never change for an activity type, so they're encoded into a template once and
+    #   each activity only has its values encoded
+    activityType = type(activity)
+    template = templates.get(activityType)
+    if template is None:
+        template = objectStart + separator.join( [ fieldFormat % _encodeJsonString(currKey).replace("%", "%%")
+            for currKey in activityType.JSON_KEYS ] ) + objectEnd
+        templates[activityType] = template
+
+    return template % tuple( map(_encodeJsonValue, activity.getJsonValues()) )
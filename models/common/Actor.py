@@ -1,38 +1,67 @@
 #!/usr/bin/python3
 
 import abc
+import collections
 import logging
-import datetime
 import pprint
+import models.common.SimulationTime as SimulationTime
 
 
 class Actor:
 
     __metaclass__ = abc.ABCMeta
 
-    def __init__(self, actorName, currDate):
-        self._log = logging.getLogger(__name__)
+    DAYS_OF_WEEK_NAMES = {
+        'Monday'    : 1,
+        'Tuesday'   : 2,
+        'Wednesday' : 3,
+        'Thursday'  : 4,
+        'Friday'    : 5,
+        'Saturday'  : 6,
+        'Sunday'    : 7
+    }
+
+    # Shared by every actor rather than looked up per instance
+    _log = logging.getLogger(__name__)
+
+    # Hundreds of actors exist at once, keep them compact
+    __slots__ = ( '_actorName', '_currDate', '_currLocation', '_pendingActivities',
+        '_earliestStartTime', '_random', '_subscribedActivityTypes' )
+
+    def __init__(self, actorName):
+        # Actors live for a whole run; everything that only lasts a day is set up in
+        #   startDailyActivities
         self._actorName = actorName
+        self._currDate = None
+        self._currLocation = None
+
+        # Queue of (start time, activity) tuples, times in epoch seconds. _addPendingActivity only accepts activities
+        #   that start after everything already queued, so appending keeps it sorted
+        self._pendingActivities = collections.deque()
+        self._earliestStartTime = None
+        self._random = None
+        self._subscribedActivityTypes = None
+
+        self._log.debug("Instantiated actor %s",
+            self.getName())
+
+
+    def startDailyActivities(self, currDate, randomGenerator, subscribedActivityTypes=None):
+        # randomGenerator is this actor's own stream for the day; every draw the actor makes
+        #   comes from it, so its day doesn't depend on what any other actor did.
+        #
+        # subscribedActivityTypes is the set of activity types anyone is going to look at,
+        #   None for all of them. Others still take up the actor's time but are never built
         self._currDate = currDate
+        self._random = randomGenerator
+        self._subscribedActivityTypes = subscribedActivityTypes
         self._currLocation = None
-        self._completedActivities = {} 
-        self._pendingActivities = {}
-        self._daysOfWeekNames = {
-            'Monday'    : 1,
-            'Tuesday'   : 2,
-            'Wednesday' : 3,
-            'Thursday'  : 4,
-            'Friday'    : 5,
-            'Saturday'  : 6,
-            'Sunday'    : 7
-        }
-        self._earliestStartTime = datetime.datetime(currDate.year, currDate.month, currDate.day, 0,0,0)
+        self._pendingActivities.clear()
+        self._earliestStartTime = SimulationTime.getMidnight(currDate)
+        self._resetDailyState()
 
         self._createActivities()
 
-        self._log.debug("Instantiated actor {0} on {1}".format( 
-            self.getName(), currDate) )
-
 
     def getName(self):
         return self._actorName
@@ -51,7 +80,7 @@ class Actor:
 
 
     def _isWeekday(self):
-        return self.getDate().isoweekday() < self._daysOfWeekNames["Saturday"]
+        return self.getDate().isoweekday() < Actor.DAYS_OF_WEEK_NAMES["Saturday"]
 
    
     def _isWeekend(self):
@@ -71,48 +100,88 @@ class Actor:
             raiseValueError("Cannot set earliest start time backwards")
 
         self._earliestStartTime = newStartTime
-        self._log.debug("Earliest start time for {0} on {1} updated to {2}".format(
-            self.getName(), self.getDate(), self._getEarliestStartTime()) )
+        self._log.debug("Earliest start time for %s on %s updated to %s",
+            self.getName(), self.getDate(), SimulationTime.LogTime(self._getEarliestStartTime()))
 
 
     def _addPendingActivity(self, newActivity):
         # Make sure we're not overwriting something at the same time
         if newActivity.getStartTime() <= self._getEarliestStartTime():
             raise ValueError("Can't add event {0} for {1} at {2}; scheduling conflict, earliest start is {3}!".format(
-                newActivity.getType(), self.getName(), newActivity.getStartTime(),
-                self._getEarliestStartTime()) )
+                newActivity.getType(), self.getName(),
+                SimulationTime.toDatetime(newActivity.getStartTime()),
+                SimulationTime.toDatetime(self._getEarliestStartTime())) )
 
-        self._pendingActivities[newActivity.getStartTime()] = newActivity
+        self._pendingActivities.append( (newActivity.getStartTime(), newActivity) )
 
         # Update next possible time this person will be able do anything
-        self._earliestStartTime = newActivity.getEndTime() + \
-            datetime.timedelta(seconds=1)
+        self._earliestStartTime = newActivity.getEndTime() + 1
+
+        # Called for every activity of every resident, don't build descriptions or dump the
+        #   queue unless someone is going to see them
+        if self._log.isEnabledFor(logging.INFO):
+            self._log.info("\"%s\" added activity \"%s\", starting @ %s until %s, duration = %ds",
+                self.getName(), newActivity.getDescription(),
+                SimulationTime.LogTime(newActivity.getStartTime()),
+                SimulationTime.LogTime(newActivity.getEndTime()), newActivity.getDuration())
+
+        if self._log.isEnabledFor(logging.DEBUG):
+            self._log.debug(pprint.pformat(self._pendingActivities))
+
+
+    def _isSubscribed(self, activityType):
+        return self._subscribedActivityTypes is None or activityType in self._subscribedActivityTypes
 
-        self._log.info("\"{1}\" added activity \"{2}\", starting @ {0} until {3}, duration = {4}".format(
-            newActivity.getStartTime(), self.getName(), newActivity.getDescription(), newActivity.getEndTime(),
-            newActivity.getDuration()) )
 
+    def _skipActivity(self, activityStartTime, activityEndTime):
+        # Time bookkeeping of _addPendingActivity for an activity nobody subscribed to, without
+        #   building or queueing it
+        if activityStartTime <= self._getEarliestStartTime():
+            raise ValueError("Can't skip past activity for {0} at {1}; scheduling conflict, earliest start is {2}!".format(
+                self.getName(),
+                SimulationTime.toDatetime(activityStartTime),
+                SimulationTime.toDatetime(self._getEarliestStartTime())) )
 
-        self._log.debug(pprint.pformat(self._pendingActivities))
+        self._earliestStartTime = activityEndTime + 1
 
 
     def getNextPendingActivity(self):
-        # Sort all pending activities
-        sortedKeys = sorted(self._pendingActivities.keys() )
+        # Queue is already in start time order, head is always the next activity
+        if len(self._pendingActivities) == 0:
+            return (None, None)
+
+        return self._pendingActivities.popleft()
+
+
+    def iterPendingActivities(self):
+        # Itinerary as a time-ordered iterator of (start time, activity), each one handed out
+        #   (and dropped from the queue) only when the consumer gets to it
+        pendingActivities = self._pendingActivities
+        while len(pendingActivities) > 0:
+            yield pendingActivities.popleft()
+
 
-        if len(sortedKeys) == 0:
+    def peekNextPendingActivity(self):
+        if len(self._pendingActivities) == 0:
             return (None, None)
 
-        returnActivity = self._pendingActivities.pop(sortedKeys[0])
+        return self._pendingActivities[0]
 
-        return ( sortedKeys[0], returnActivity )
+
+    def getPendingActivityCount(self):
+        return len(self._pendingActivities)
 
 
     @abc.abstractmethod
-    def _createActivities(self, currDate):
+    def getActorId(self):
+        return
+
+
+    def _resetDailyState(self):
+        # Subclasses clear anything of their own that shouldn't carry over to the next day
         return
 
 
     @abc.abstractmethod
-    def startDailyActivities(self):
+    def _createActivities(self):
         return
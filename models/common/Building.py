@@ -2,24 +2,40 @@
 
 import abc
 import logging
-import pprint
 import datetime
 import random
-import json
+import concurrent.futures
+import heapq
+import bisect
+import contextlib
+import models.common.SimulationTime as SimulationTime
 
 
 class Building:
 
     __metaclass__ = abc.ABCMeta
 
-    def __init__(self, buildingName, buildingLocation):
+    # Activity type the elevator model and DayCache work from
+    ELEVATOR_REQUEST_ACTIVITY_TYPE = "Request Elevator"
+
+    def __init__(self, buildingName, buildingLocation, randomSeed=None):
         self._log = logging.getLogger(__name__)
         self._buildingName = buildingName
         self._buildingLocation = buildingLocation
-        self._fullActivityList = {}
+        self._elevatorModel = None
+        self._elevatorModelEnabled = False
+        self._dayCache = None
+        self._profiler = None
+        self._checkpoint = None
+
+        # Only these activity types are built, written out and handed to the elevator model
+        self._subscribedActivityTypes = frozenset( [ Building.ELEVATOR_REQUEST_ACTIVITY_TYPE ] )
 
-        # Seed PRNG (exactly once)
-        random.seed()
+        # Every simulated day gets its own PRNG seed derived from this one, so passing
+        #   the same seed back in reproduces a run no matter how the days get scheduled
+        if randomSeed is None:
+            randomSeed = random.SystemRandom().randrange(2 ** 32)
+        self._randomSeed = randomSeed
 
 
     def getName(self):
@@ -30,69 +46,326 @@ class Building:
         return self._buildingLocation
 
 
-    def runModel(self, startDate, endDate, jsonFile):
+    def getRandomSeed(self):
+        return self._randomSeed
+
+
+    def getElevatorModel(self):
+        return self._elevatorModel
+
+
+    def getSubscribedActivityTypes(self):
+        return self._subscribedActivityTypes
+
+
+    def setSubscribedActivityTypes(self, activityTypes):
+        # Activity types the run needs (e.g. elevator requests plus parking for a garage
+        #   study). Actors don't build, log or queue any other type
+        self._subscribedActivityTypes = frozenset(activityTypes)
+
+
+    def setElevatorModelEnabled(self, elevatorModelEnabled):
+        # Replay the run's elevator requests through the building's elevator model (if it has
+        #   one) for wait and ride times. Off by default, the model keeps a result per request
+        #   for the whole run
+        self._elevatorModelEnabled = elevatorModelEnabled
+
+
+    def setDayCache(self, dayCache):
+        # Reuse days already simulated with the same seed and model, from a DayCache
+        self._dayCache = dayCache
+
+
+    def setProfiler(self, profiler):
+        # Time each phase of each simulated day with a RunProfiler; None turns it back off
+        self._profiler = profiler
+
+
+    def setCheckpoint(self, runCheckpoint):
+        # Save progress to a RunCheckpoint every so often. If it has a resume state, runModel
+        #   carries on from there rather than from the start date
+        self._checkpoint = runCheckpoint
+
+
+    def runModel(self, startDate, endDate, activityWriter, workers=1):
         if endDate < startDate:
             raise ValueError('End date cannot be before start date')
 
+        if workers < 1:
+            raise ValueError("Need at least one worker, got {0}".format(workers) )
+
+        if self._dayCache is not None and \
+                self._subscribedActivityTypes != frozenset( [ Building.ELEVATOR_REQUEST_ACTIVITY_TYPE ] ):
+            raise ValueError("Day cache only holds elevator requests, can't cache {0}".format(
+                ", ".join(sorted(self._subscribedActivityTypes))) )
+
+        if self._profiler is not None and self._profiler.isProfilingCalls() is True and workers > 1:
+            raise ValueError("Per-phase cProfile dumps need a single worker, got {0}".format(workers) )
+
+        simulationDates = []
         currDate = startDate
         while currDate <= endDate:
-            # NOTE: each days' simulation is independent. Should be its own thread
-            self._simulateDailyActivities(currDate, jsonFile)
+            simulationDates.append(currDate)
             currDate += datetime.timedelta(days=1)
 
-        # Dump out activity list
-        json.dump(self._fullActivityList, jsonFile, sort_keys=True, indent=4)
+        # Elevator model (if asked for and the building has one) sees requests in the same
+        #   global time order they are written out in
+        self._elevatorModel = None
+        if self._elevatorModelEnabled is True:
+            self._elevatorModel = self._getElevatorModel()
+        carriedOverActivities = []
+
+        resumeState = None
+        if self._checkpoint is not None:
+            resumeState = self._checkpoint.getResumeState()
+
+        if resumeState is not None:
+            self._checkResumeState(resumeState, startDate, endDate)
+            simulationDates = [ currDate for currDate in simulationDates if currDate >= resumeState['next_date'] ]
+            carriedOverActivities = resumeState['carried_over_activities']
+            self._elevatorModel = resumeState['elevator_model']
+            activityWriter.restoreCheckpointState(resumeState['writer_state'])
+
+            self._log.info("Resuming %s at %s, %d days left", self.getName(),
+                resumeState['next_date'], len(simulationDates))
+
+        if self._profiler is not None:
+            self._profiler.startRun()
+
+        # Days come back in date order regardless of which worker ran them, so each one can
+        #   be written out as soon as it's done instead of holding the whole run in memory
+        for (currDate, dailyActivities) in zip(simulationDates,
+                self._simulateDays(simulationDates, workers)):
+
+            dailyActivities = list(heapq.merge(carriedOverActivities, dailyActivities,
+                key=_getActivityStartTime) )
+
+            # Late nights run past midnight. Hold those activities back so they get written in
+            #   order alongside the next day's
+            nextMidnight = SimulationTime.getMidnight(currDate) + SimulationTime.SECONDS_PER_DAY
+            splitIndex = bisect.bisect_left(dailyActivities, nextMidnight,
+                key=_getActivityStartTime)
+            carriedOverActivities = dailyActivities[splitIndex:]
+
+            self._writeDailyActivities(currDate, dailyActivities[:splitIndex], activityWriter)
+
+            if self._checkpoint is not None and self._checkpoint.dayFinished() is True:
+                with self._profilePhase("checkpoint", currDate):
+                    self._checkpoint.save( self._getCheckpointState(startDate, endDate,
+                        currDate + datetime.timedelta(days=1), carriedOverActivities, activityWriter) )
+
+        if len(carriedOverActivities) > 0:
+            self._writeDailyActivities(endDate, carriedOverActivities, activityWriter)
+
+        if self._elevatorModel is not None:
+            self._elevatorModel.finish()
+
+        with self._profilePhase("write"):
+            activityWriter.finish()
+
+        if self._profiler is not None:
+            self._profiler.finishRun()
+
+
+    def _writeDailyActivities(self, currDate, dailyActivities, activityWriter):
+        with self._profilePhase("write", currDate):
+            activityWriter.writeDailyActivities(currDate, dailyActivities)
+
+        with self._profilePhase("elevator_model", currDate):
+            self._requestElevators(dailyActivities)
+
+        if self._profiler is not None:
+            self._profiler.countActivities(dailyActivities)
+
+
+    def _getCheckpointState(self, startDate, endDate, nextDate, carriedOverActivities, activityWriter):
+        # Everything runModel needs to carry on from nextDate, see RunCheckpoint
+        return {
+            'building':                 self.getName(),
+            'random_seed':              self._randomSeed,
+            'model_parameters':         self._getModelParameters(),
+            'activity_types':           sorted(self._subscribedActivityTypes),
+            'start_date':               startDate,
+            'end_date':                 endDate,
+            'next_date':                nextDate,
+            'carried_over_activities':  carriedOverActivities,
+            'elevator_model':           self._elevatorModel,
+            'writer_state':             activityWriter.getCheckpointState(),
+        }
+
+
+    def _checkResumeState(self, resumeState, startDate, endDate):
+        # Only the same run can be resumed, anything else would splice two runs' output together
+        for (stateKey, expectedValue) in ( ('random_seed', self._randomSeed),
+                ('model_parameters', self._getModelParameters()),
+                ('activity_types', sorted(self._subscribedActivityTypes)), ('start_date', startDate),
+                ('end_date', endDate) ):
+            if resumeState[stateKey] != expectedValue:
+                raise ValueError("Checkpoint is for a different run, {0} was {1}, now {2}".format(
+                    stateKey, resumeState[stateKey], expectedValue) )
+
+        if (resumeState['elevator_model'] is not None) != (self._elevatorModel is not None):
+            raise ValueError("Checkpoint is for a different run, elevator model was {0}, now {1}".format(
+                "on" if resumeState['elevator_model'] is not None else "off",
+                "on" if self._elevatorModel is not None else "off") )
+
+
+    def _profilePhase(self, phaseName, currDate=None):
+        if self._profiler is None:
+            return contextlib.nullcontext()
+
+        return self._profiler.phase(phaseName, currDate)
+
+
+    def _requestElevators(self, elevatorRequests):
+        if self._elevatorModel is None:
+            return
 
+        for currRequest in elevatorRequests:
+            if currRequest.getType() != Building.ELEVATOR_REQUEST_ACTIVITY_TYPE:
+                continue
 
+            self._elevatorModel.requestElevator(
+                currRequest.getStartTime(),
+                currRequest.getStartFloor(),
+                currRequest.getDestinationFloor() )
 
-    def _simulateDailyActivities(self, currDate, jsonFile):
-        self._log.info("Starting daily activities for {0} on {1}".format(
-            self.getName(), currDate.isoformat()) )
+
+    def _simulateDays(self, simulationDates, workers):
+        if workers == 1:
+            for currDate in simulationDates:
+                yield self._simulateSeededDay(currDate)
+
+            return
+
+        self._log.info("Simulating %d days for %s across %d worker processes",
+            len(simulationDates), self.getName(), workers)
+
+        # Each days' simulation is independent, so fan them out. Hand out a few days per
+        #   task to keep IPC overhead down while still balancing load across workers
+        chunkSize = max(1, len(simulationDates) // (workers * 8))
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                initializer=_initializeWorker, initargs=(self,)) as executor:
+            for (dailyActivities, profilerRecords) in executor.map(_simulateDayInWorker,
+                    simulationDates, chunksize=chunkSize):
+                if profilerRecords is not None:
+                    self._profiler.mergeDayRecords(profilerRecords)
+
+                yield dailyActivities
+
+
+    def _getDailyRandomSeed(self, currDate):
+        # String seeds are hashed with SHA-512, so this is stable across processes and runs
+        return "{0}-{1}".format(self._randomSeed, currDate.isoformat())
+
+
+    def _getActorRandomGenerator(self, currDate, actorId):
+        # Separate stream per (run seed, date, actor), so one actor's day comes out the same
+        #   no matter which other actors exist or what order they're run in
+        return random.Random("{0}-{1}-{2}".format(self._randomSeed, currDate.isoformat(), actorId))
+
+
+    def _simulateSeededDay(self, currDate):
+        if self._dayCache is not None:
+            cacheKey = self._dayCache.getKey(self._randomSeed, currDate, self._getModelParameters())
+            with self._profilePhase("day_cache_load", currDate):
+                cachedRecords = self._dayCache.load(cacheKey)
+            if cachedRecords is not None:
+                self._log.info("day_cached building=\"%s\" date=%s elevator_requests=%d",
+                    self.getName(), currDate, len(cachedRecords))
+                with self._profilePhase("drain_events", currDate):
+                    return self._getActivitiesFromRecords(cachedRecords)
+
+        dailyActivities = self._simulateDailyActivities(currDate)
+
+        if self._dayCache is not None:
+            with self._profilePhase("day_cache_save", currDate):
+                self._dayCache.save(cacheKey, dailyActivities)
+
+        return dailyActivities
+
+
+    def _getModelParameters(self):
+        # JSON-able description of everything besides the seed and date that decides what a
+        #   simulated day looks like; cached days are only reused when this matches
+        return {
+            'building': type(self).__name__,
+        }
+
+
+    def _simulateDailyActivities(self, currDate):
+        return list( self._iterDailyActivities(currDate) )
+
+
+    def _iterDailyActivities(self, currDate):
+        # One time-ordered stream of the day's subscribed activities, heap-merged from every
+        #   actor's own time-ordered itinerary, so nothing has to be collected and re-sorted
+        self._log.debug("Starting daily activities for %s on %s",
+            self.getName(), currDate)
         locations = self._getBuildingLocations()
-        elevatorModel = self._getElevatorModel()
+        subscribedActivityTypes = self._subscribedActivityTypes
 
         # Each actor will add him or herself to the location model upon instantiation
-        actorList = self._createActorsForDay(currDate, locations)
-
-        self._log.info(
-            "\n----\n" + \
-            "---- Launching Actors for {0} on {1} ----".format(
-            self.getName(), currDate) + \
-            "\n----" )
-
-        dailyActivities = {}
-
-        # Launch each of the actors
-        for currActorName in actorList:
-            self._log.info("Executing activities for {0} actor {1} on {2}".format(
-                self.getName(), currActorName, currDate.isoformat()) ) 
-            currActor = actorList[currActorName]
-            self._log.info("Getting activities for {0}".format(currActor.getName()) )
-
-            (timestamp, activity) = currActor.getNextPendingActivity()
-            while timestamp != None:
-                self._log.info("\tTime {0}: Activity: {1}".format(
-                    timestamp, activity.getType()) )
-
-                # Is it an activity we care about?
-                if activity.getType() == "Request Elevator":
-                    # Find out direction and start/end floor
-                    self._log.info("\t\tDirection: {0}, start floor = {1}, end floor = {2}".format(
-                        activity.getButtonPressed(), 
-                        activity.getStartFloor(), 
-                        activity.getDestinationFloor()) )
+        with self._profilePhase("create_actors", currDate):
+            actorList = self._createActorsForDay(currDate, locations)
+
+        # Everyone plans their whole day up front
+        with self._profilePhase("generate_itineraries", currDate):
+            for currActor in actorList.values():
+                currActor.startDailyActivities(currDate,
+                    self._getActorRandomGenerator(currDate, currActor.getActorId()),
+                    subscribedActivityTypes)
 
-                    # Add to list of daily activities
-                    if activity.getStartTime() not in dailyActivities:
-                        dailyActivities[activity.getStartTimeString()] = []
+        self._log.debug("\n----\n---- Launching Actors for %s on %s ----\n----",
+            self.getName(), currDate)
 
-                    dailyActivities[activity.getStartTimeString()].append(activity.getJsonDictionary())
+        # Counts shared with the per-actor filters below, [ activities, elevator requests ]
+        activityCounts = [ 0, 0 ]
 
-                (timestamp, activity) = currActor.getNextPendingActivity()
+        # Per-activity chatter is only worth the calls if it's going to be seen
+        logEachActivity = self._log.isEnabledFor(logging.DEBUG)
 
+        def _getSubscribedActivities(currActorName, currActor):
+            if logEachActivity is True:
+                self._log.debug("Executing activities for %s actor %s on %s",
+                    self.getName(), currActorName, currDate)
 
-        # Merge this day's activities into master list
-        self._fullActivityList = { **self._fullActivityList, **dailyActivities }
+            for (timestamp, activity) in currActor.iterPendingActivities():
+                activityCounts[0] += 1
+
+                if logEachActivity is True:
+                    self._log.debug("\tTime %s: Activity: %s",
+                        SimulationTime.LogTime(timestamp), activity.getType())
+
+                # Is it an activity we care about? Actors already skip unsubscribed types,
+                #   this only catches ones that don't
+                if activity.getType() not in subscribedActivityTypes:
+                    continue
+
+                if activity.getType() == Building.ELEVATOR_REQUEST_ACTIVITY_TYPE:
+                    # Find out direction and start/end floor
+                    if logEachActivity is True:
+                        self._log.debug("\t\tDirection: %s, start floor = %s, end floor = %s",
+                            activity.getButtonPressed(),
+                            activity.getStartFloor(),
+                            activity.getDestinationFloor())
+
+                    activityCounts[1] += 1
+
+                yield activity
+
+        # Ties keep actor order, same as a stable sort of everything would. The drain phase
+        #   includes whatever the consumer does between activities, which is just list()
+        #   when it's called from _simulateDailyActivities
+        with self._profilePhase("drain_events", currDate):
+            yield from heapq.merge( *[ _getSubscribedActivities(currActorName, currActor)
+                    for (currActorName, currActor) in actorList.items() ],
+                key=_getActivityStartTime )
+
+        # One structured line per day instead of per-event chatter
+        self._log.info("day_summary building=\"%s\" date=%s actors=%d activities=%d elevator_requests=%d",
+            self.getName(), currDate, len(actorList), activityCounts[0], activityCounts[1])
 
 
     @abc.abstractmethod
@@ -109,3 +382,36 @@ class Building:
     def _createActorsForDay(self, currDate, buildingLocations):
         return
 
+
+    @abc.abstractmethod
+    def _getActivitiesFromRecords(self, elevatorRequestRecords):
+        # Rebuild a day's activities from the ElevatorRequestTrace records a DayCache holds
+        return
+
+
+
+def _getActivityStartTime(activity):
+    return activity.getStartTime()
+
+
+# Building each worker process simulates days for, set once when the worker starts
+_workerBuilding = None
+
+
+def _initializeWorker(building):
+    global _workerBuilding
+    _workerBuilding = building
+
+    if building._profiler is not None:
+        building._profiler.startProcess(isWorker=True)
+
+
+def _simulateDayInWorker(currDate):
+    # Phase times go back with the day, the worker's profiler copy never reaches the parent
+    dailyActivities = _workerBuilding._simulateSeededDay(currDate)
+
+    profilerRecords = None
+    if _workerBuilding._profiler is not None:
+        profilerRecords = _workerBuilding._profiler.popDayRecords()
+
+    return (dailyActivities, profilerRecords)
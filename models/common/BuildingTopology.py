@@ -0,0 +1,80 @@
+#!/usr/bin/python3
+
+import types
+
+
+class BuildingTopology:
+
+    # Read-only description of a building's floors and where things are in it. A building
+    #   creates one and every actor in it shares that same instance, so nothing here may be
+    #   changed after construction
+
+    __slots__ = ( '_floorIndex', '_floorNames', '_servicesFloorIndex',
+        '_pedestrianEntranceExitFloors', '_grillFloors', '_garageFloors',
+        '_parkingFloorProbabilities' )
+
+    def __init__(self, floorIndex, servicesFloor, pedestrianEntranceExitFloors, grillFloors,
+            garageFloors, parkingFloorProbabilities=None):
+
+        # floorIndex maps floor name => floor index (elevator stop number, 1 = lowest floor).
+        #   Everything else refers to floors by name
+        self._floorIndex = types.MappingProxyType( dict(floorIndex) )
+        self._floorNames = types.MappingProxyType(
+            { currIndex: currName for (currName, currIndex) in floorIndex.items() } )
+
+        self._servicesFloorIndex = types.MappingProxyType(
+            { currService: self._floorIndex[currFloor] for (currService, currFloor) in servicesFloor.items() } )
+
+        self._pedestrianEntranceExitFloors = tuple(pedestrianEntranceExitFloors)
+        self._grillFloors = tuple(grillFloors)
+        self._garageFloors = tuple(garageFloors)
+
+        # (garage floor name, probability) pairs for where a car ends up, even odds by default
+        if parkingFloorProbabilities is None:
+            parkingFloorProbabilities = [ (currFloor, 1.0 / len(self._garageFloors))
+                for currFloor in self._garageFloors ]
+        self._parkingFloorProbabilities = tuple( [ tuple(currPair) for currPair in parkingFloorProbabilities ] )
+
+
+    def getFloorIndex(self, floorName):
+        return self._floorIndex[floorName]
+
+
+    def getFloorName(self, floorIndex):
+        return self._floorNames[floorIndex]
+
+
+    def getFloorNames(self):
+        return tuple( self._floorIndex.keys() )
+
+
+    def getLowestFloorIndex(self):
+        return min( self._floorNames.keys() )
+
+
+    def getHighestFloorIndex(self):
+        return max( self._floorNames.keys() )
+
+
+    def getServiceFloorIndex(self, serviceName):
+        return self._servicesFloorIndex[serviceName]
+
+
+    def getPedestrianEntranceExitFloors(self):
+        return self._pedestrianEntranceExitFloors
+
+
+    def getPedestrianEntranceExitFloorIndices(self):
+        return tuple( sorted( [ self._floorIndex[currFloor] for currFloor in self._pedestrianEntranceExitFloors ] ) )
+
+
+    def getGrillFloors(self):
+        return self._grillFloors
+
+
+    def getGarageFloors(self):
+        return self._garageFloors
+
+
+    def getParkingFloorProbabilities(self):
+        return self._parkingFloorProbabilities
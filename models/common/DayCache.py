@@ -0,0 +1,73 @@
+#!/usr/bin/python3
+
+import logging
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+from models.common.ElevatorRequestTrace import createElevatorRequestRecords
+
+
+class DayCache:
+
+    # On-disk store of simulated days, each one an .npy file of ELEVATOR_REQUEST_DTYPE records.
+    #   Files are named by a hash of everything that determines the day (run seed, date and
+    #   the building's model parameters), so reruns and extended runs of the same scenario
+    #   only simulate days that aren't there yet, and a changed model never picks up stale days
+
+    def __init__(self, cacheDir):
+        self._log = logging.getLogger(__name__)
+        self._cacheDir = cacheDir
+
+        if os.path.isdir(cacheDir) is False:
+            os.makedirs(cacheDir)
+
+
+    def getCacheDir(self):
+        return self._cacheDir
+
+
+    @staticmethod
+    def getKey(randomSeed, currDate, modelParameters):
+        keyFields = {
+            'seed':     str(randomSeed),
+            'date':     currDate.isoformat(),
+            'model':    modelParameters,
+        }
+
+        return hashlib.sha256( json.dumps(keyFields, sort_keys=True).encode("utf-8") ).hexdigest()
+
+
+    def load(self, key):
+        # Cached records for the day, None if it hasn't been simulated yet
+        try:
+            records = np.load(self._getFilename(key))
+        except FileNotFoundError:
+            return None
+
+        self._log.debug("Day cache hit %s", key)
+        return records
+
+
+    def save(self, key, elevatorRequests):
+        filename = self._getFilename(key)
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+
+        # Worker processes may be filling the cache at the same time, so write to a temp file
+        #   and move it into place; readers only ever see complete days
+        (tempFd, tempFilename) = tempfile.mkstemp(dir=os.path.dirname(filename), suffix=".tmp")
+        try:
+            with os.fdopen(tempFd, 'wb') as tempFile:
+                np.save(tempFile, createElevatorRequestRecords(elevatorRequests))
+            os.replace(tempFilename, filename)
+        except BaseException:
+            os.unlink(tempFilename)
+            raise
+
+        self._log.debug("Day cache stored %s", key)
+
+
+    def _getFilename(self, key):
+        # Fan out by the first two hex digits, a decade of days is a lot for one directory
+        return os.path.join(self._cacheDir, key[:2], key + ".npy")
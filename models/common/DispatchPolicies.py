@@ -0,0 +1,196 @@
+#!/usr/bin/python3
+
+import abc
+import logging
+import math
+import models.common.InputEncoding as InputEncoding
+from models.common.NormalizationStats import loadNormalizationStats
+
+
+class DispatchPolicy:
+
+    # Decides which car an ElevatorBank sends to each hall call, and where cars wait when
+    #   they have nothing to do
+
+    __metaclass__ = abc.ABCMeta
+
+    def __init__(self):
+        self._log = logging.getLogger(__name__)
+
+
+    @abc.abstractmethod
+    def getName(self):
+        return
+
+
+    @abc.abstractmethod
+    def selectCar(self, elevatorBank, requestTime, startFloor, destinationFloor):
+        return
+
+
+    def getIdleFloor(self, elevatorBank, car, idleTime):
+        # Floor an idle car should move to, None to stay where it is
+        return None
+
+
+class NearestCarPolicy(DispatchPolicy):
+
+    def getName(self):
+        return "nearest"
+
+
+    def selectCar(self, elevatorBank, requestTime, startFloor, destinationFloor):
+        # Whichever car can get its doors open at the call floor first
+        return min( elevatorBank.getCars(), key=lambda currCar: (
+            elevatorBank.estimatePickupTime(currCar, requestTime, startFloor), currCar.getCarId()) )
+
+
+class CollectiveControlPolicy(DispatchPolicy):
+
+    # Directional collective control: cars prefer to keep moving the way they were already
+    #   going. Every reversal a car would need to make to answer the call (to get to the call
+    #   floor, then to head off in the call's direction) costs a fixed penalty on top of its
+    #   pickup time
+
+    def __init__(self, reversalPenaltySeconds=30):
+        DispatchPolicy.__init__(self)
+        self._reversalPenaltySeconds = reversalPenaltySeconds
+
+
+    def getName(self):
+        return "collective"
+
+
+    def selectCar(self, elevatorBank, requestTime, startFloor, destinationFloor):
+        callDirection = _getDirection(startFloor, destinationFloor)
+
+        def _getCost(currCar):
+            (availableFloor, availableTime) = elevatorBank.getCarAvailability(currCar)
+            approachDirection = _getDirection(availableFloor, startFloor)
+
+            reversals = 0
+            currDirection = currCar.getLastDirection()
+            for nextDirection in ( approachDirection, callDirection ):
+                if nextDirection == 0:
+                    continue
+
+                if currDirection != 0 and nextDirection != currDirection:
+                    reversals += 1
+                currDirection = nextDirection
+
+            return ( elevatorBank.estimatePickupTime(currCar, requestTime, startFloor) +
+                (reversals * self._reversalPenaltySeconds), currCar.getCarId() )
+
+        return min( elevatorBank.getCars(), key=_getCost )
+
+
+class ZoningPolicy(DispatchPolicy):
+
+    # Splits floors lowestFloor..highestFloor into one contiguous zone per car. Calls are
+    #   served by the nearest car zoned for the floor that isn't the lobby (trips to/from the
+    #   lobby are zoned by their other end), and idle cars wait in the middle of their zone
+
+    def __init__(self, lowestFloor, highestFloor):
+        DispatchPolicy.__init__(self)
+        self._lowestFloor = lowestFloor
+        self._highestFloor = highestFloor
+
+
+    def getName(self):
+        return "zoning"
+
+
+    def selectCar(self, elevatorBank, requestTime, startFloor, destinationFloor):
+        if startFloor == elevatorBank.getLobbyFloor():
+            zoneFloor = destinationFloor
+        else:
+            zoneFloor = startFloor
+
+        # Car N serves zone N
+        callZone = self._getFloorZone(elevatorBank, zoneFloor)
+        zoneCars = [ currCar for currCar in elevatorBank.getCars() if currCar.getCarId() == callZone ]
+
+        return min( zoneCars, key=lambda currCar: (
+            elevatorBank.estimatePickupTime(currCar, requestTime, startFloor), currCar.getCarId()) )
+
+
+    def getIdleFloor(self, elevatorBank, car, idleTime):
+        (zoneLowest, zoneHighest) = self._getZoneFloors(elevatorBank, car.getCarId())
+        return (zoneLowest + zoneHighest) // 2
+
+
+    def _getFloorZone(self, elevatorBank, floor):
+        floor = min(max(floor, self._lowestFloor), self._highestFloor)
+        numberOfZones = len(elevatorBank.getCars())
+        floorsPerZone = float(self._highestFloor - self._lowestFloor + 1) / numberOfZones
+        return min( int((floor - self._lowestFloor) / floorsPerZone), numberOfZones - 1 )
+
+
+    def _getZoneFloors(self, elevatorBank, zone):
+        floorsPerZone = float(self._highestFloor - self._lowestFloor + 1) / len(elevatorBank.getCars())
+        zoneLowest = self._lowestFloor + int(math.ceil(zone * floorsPerZone))
+        zoneHighest = self._lowestFloor + int(math.ceil((zone + 1) * floorsPerZone)) - 1
+        return (zoneLowest, min(zoneHighest, self._highestFloor))
+
+
+class LobbyReturnPolicy(NearestCarPolicy):
+
+    # Nearest car dispatch, idle cars go back down to the lobby
+
+    def getName(self):
+        return "lobby-return"
+
+
+    def getIdleFloor(self, elevatorBank, car, idleTime):
+        return elevatorBank.getLobbyFloor()
+
+
+class PredictivePositioningPolicy(NearestCarPolicy):
+
+    # Nearest car dispatch, idle cars pre-position to the floor floorPredictor expects the
+    #   next call from. floorPredictor is any callable taking a time (same time base as the
+    #   bank) and returning a (possibly fractional) floor
+
+    def __init__(self, floorPredictor, lowestFloor, highestFloor):
+        NearestCarPolicy.__init__(self)
+        self._floorPredictor = floorPredictor
+        self._lowestFloor = lowestFloor
+        self._highestFloor = highestFloor
+
+
+    def getName(self):
+        return "predictive"
+
+
+    def getIdleFloor(self, elevatorBank, car, idleTime):
+        predictedFloor = int(round(self._floorPredictor(idleTime)))
+        return min(max(predictedFloor, self._lowestFloor), self._highestFloor)
+
+
+class NeuralNetFloorPredictor:
+
+    # Wraps a network written by pybrain/createNetFromJson.py to predict the next call floor
+    #   from an epoch-seconds time. Inputs are encoded by InputEncoding, same as in training,
+    #   with the normalization stats saved next to the network (<network>.stats.json)
+
+    def __init__(self, neuralNetXmlFile):
+        # Only needed if this predictor is used
+        import pybrain.tools.customxml.networkreader
+
+        self._neuralNet = pybrain.tools.customxml.networkreader.NetworkReader.readFrom(neuralNetXmlFile)
+
+        self._normalizationStats = loadNormalizationStats(neuralNetXmlFile)
+
+
+    def __call__(self, epochSeconds):
+        inputVector = InputEncoding.createInputMatrix( [ epochSeconds ], self._normalizationStats )[0]
+        return self._neuralNet.activate(inputVector)[0]
+
+
+def _getDirection(fromFloor, toFloor):
+    if toFloor > fromFloor:
+        return 1
+    elif toFloor < fromFloor:
+        return -1
+    else:
+        return 0
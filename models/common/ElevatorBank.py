@@ -0,0 +1,344 @@
+#!/usr/bin/python3
+
+import logging
+import array
+import math
+import csv
+from models.common.DispatchPolicies import NearestCarPolicy
+
+
+class ElevatorTrip:
+
+    # One car load: everyone picked up at the same floor heading the same way, dropped off
+    #   at their destinations in travel order
+
+    def __init__(self, originFloor, direction, pickupTime, departureTime):
+        self._originFloor = originFloor
+        self._direction = direction
+        self._pickupTime = pickupTime
+        self._departureTime = departureTime
+        self._riders = []
+
+
+    def getOriginFloor(self):
+        return self._originFloor
+
+
+    def getDirection(self):
+        return self._direction
+
+
+    def getPickupTime(self):
+        return self._pickupTime
+
+
+    def getDepartureTime(self):
+        return self._departureTime
+
+
+    def setDepartureTime(self, departureTime):
+        self._departureTime = departureTime
+
+
+    def getRiderCount(self):
+        return len(self._riders)
+
+
+    def addRider(self, requestTime, destinationFloor):
+        self._riders.append( (requestTime, destinationFloor) )
+
+
+    def getStops(self):
+        # Distinct destination floors in the order the car reaches them
+        return sorted( set( [ rider[1] for rider in self._riders ] ),
+            reverse=(self._direction < 0) )
+
+
+    def getRiders(self):
+        return self._riders
+
+
+class ElevatorCar:
+
+    def __init__(self, carId, startingFloor):
+        self._carId = carId
+
+        # Floor the car will be at, and the time it's done with everything it has been given,
+        #   once any trip that's already been handed to it is finished
+        self._floor = startingFloor
+        self._freeTime = 0.0
+
+        self._trip = None
+        self._lastDirection = 0
+        self._floorsTravelled = 0
+
+
+    def getCarId(self):
+        return self._carId
+
+
+    def getFloor(self):
+        return self._floor
+
+
+    def getFreeTime(self):
+        return self._freeTime
+
+
+    def getTrip(self):
+        return self._trip
+
+
+    def getFloorsTravelled(self):
+        return self._floorsTravelled
+
+
+    def getLastDirection(self):
+        # Direction the car was last moving, 1 = up, -1 = down, 0 = hasn't moved yet
+        return self._lastDirection
+
+
+    def _setTrip(self, trip):
+        self._trip = trip
+
+
+    def _moveTo(self, floor, freeTime):
+        if floor != self._floor:
+            if floor > self._floor:
+                self._lastDirection = 1
+            else:
+                self._lastDirection = -1
+
+        self._floorsTravelled += abs(floor - self._floor)
+        self._floor = floor
+        self._freeTime = freeTime
+
+
+class ElevatorBank:
+
+    # Discrete-event model of a group of identical cars serving a stream of hall calls. Calls
+    #   have to arrive in time order. Each one is added to a car already loading at that floor
+    #   in the same direction if it has room, otherwise the dispatch policy picks a car for
+    #   it (nearest car by default). Travel is a fixed time per floor, and doors stay open for
+    #   a fixed dwell at every pickup and drop-off
+    #
+    # Times are in seconds, on whatever time base the caller uses
+
+    def __init__(self, numberOfCars, carCapacity, doorDwellSeconds, secondsPerFloor, lobbyFloor,
+            dispatchPolicy=None):
+        self._log = logging.getLogger(__name__)
+
+        if numberOfCars < 1:
+            raise ValueError("Need at least one elevator car, got {0}".format(numberOfCars) )
+
+        if carCapacity < 1:
+            raise ValueError("Elevator car capacity must be at least one, got {0}".format(carCapacity) )
+
+        if dispatchPolicy is None:
+            dispatchPolicy = NearestCarPolicy()
+
+        self._dispatchPolicy = dispatchPolicy
+        self._carCapacity = carCapacity
+        self._lobbyFloor = lobbyFloor
+        self._doorDwellSeconds = doorDwellSeconds
+        self._secondsPerFloor = secondsPerFloor
+        self._cars = [ ElevatorCar(carId, lobbyFloor) for carId in range(numberOfCars) ]
+        self._lastRequestTime = None
+
+        # Per-request results, in the order requests complete. Kept as typed arrays since
+        #   a year of requests is a lot of tuples
+        self._requestTimes      = array.array('d')
+        self._startFloors       = array.array('h')
+        self._destinationFloors = array.array('h')
+        self._waitTimes         = array.array('d')
+        self._rideTimes         = array.array('d')
+        self._carIds            = array.array('h')
+
+
+    def getCars(self):
+        return self._cars
+
+
+    def getLobbyFloor(self):
+        return self._lobbyFloor
+
+
+    def getDispatchPolicy(self):
+        return self._dispatchPolicy
+
+
+    def getCompletedRequestCount(self):
+        return len(self._waitTimes)
+
+
+    def getWaitTimes(self):
+        return self._waitTimes
+
+
+    def getRideTimes(self):
+        return self._rideTimes
+
+
+    def getFloorsTravelled(self):
+        return sum( [ currCar.getFloorsTravelled() for currCar in self._cars ] )
+
+
+    def requestElevator(self, requestTime, startFloor, destinationFloor):
+        if startFloor == destinationFloor:
+            return
+
+        if self._lastRequestTime is not None and requestTime < self._lastRequestTime:
+            raise ValueError("Elevator requests must arrive in time order, {0} is before {1}".format(
+                requestTime, self._lastRequestTime) )
+        self._lastRequestTime = requestTime
+
+        if destinationFloor > startFloor:
+            direction = 1
+        else:
+            direction = -1
+
+        # Anything that's done by now is idle and may want to reposition first
+        self._finishCompletedTrips(requestTime)
+
+        # Hop on a car that's already loading here, if one is going our way with room
+        for currCar in self._cars:
+            currTrip = currCar.getTrip()
+            if currTrip is not None and \
+                    currTrip.getOriginFloor() == startFloor and \
+                    currTrip.getDirection() == direction and \
+                    currTrip.getRiderCount() < self._carCapacity and \
+                    requestTime <= currTrip.getDepartureTime():
+
+                currTrip.addRider(requestTime, destinationFloor)
+
+                # Someone walking on holds the doors
+                currTrip.setDepartureTime( max(currTrip.getDepartureTime(),
+                    requestTime + self._doorDwellSeconds) )
+                return
+
+        selectedCar = self._dispatchPolicy.selectCar(self, requestTime, startFloor, destinationFloor)
+
+        # Car has to finish whatever it's doing before it can come to us
+        self._finishTrip(selectedCar)
+
+        pickupTime = self.estimatePickupTime(selectedCar, requestTime, startFloor)
+        selectedCar._moveTo(startFloor, pickupTime)
+
+        newTrip = ElevatorTrip(startFloor, direction, pickupTime, pickupTime + self._doorDwellSeconds)
+        newTrip.addRider(requestTime, destinationFloor)
+        selectedCar._setTrip(newTrip)
+
+
+    def finish(self):
+        for currCar in self._cars:
+            self._finishTrip(currCar)
+
+        self._log.info("Elevator bank served {0} requests: {1}".format(
+            self.getCompletedRequestCount(), self.getSummary()) )
+
+
+    def getSummary(self):
+        summary = {
+            'requests':         self.getCompletedRequestCount(),
+            'floors_travelled': self.getFloorsTravelled(),
+        }
+
+        for (statName, values) in ( ('wait', self._waitTimes), ('ride', self._rideTimes) ):
+            sortedValues = sorted(values)
+            if len(sortedValues) == 0:
+                sortedValues = [ 0.0 ]
+
+            summary[ statName + '_mean' ] = sum(sortedValues) / len(sortedValues)
+            summary[ statName + '_p95'  ] = _getPercentile(sortedValues, 95)
+            summary[ statName + '_p99'  ] = _getPercentile(sortedValues, 99)
+            summary[ statName + '_max'  ] = sortedValues[-1]
+
+        return summary
+
+
+    def writeRequestResults(self, csvFile):
+        csvWriter = csv.writer(csvFile)
+        csvWriter.writerow( [ "request_time", "start_floor", "destination_floor",
+            "wait_seconds", "ride_seconds", "car" ] )
+
+        for i in range(self.getCompletedRequestCount()):
+            csvWriter.writerow( [ self._requestTimes[i], self._startFloors[i],
+                self._destinationFloors[i], self._waitTimes[i], self._rideTimes[i],
+                self._carIds[i] ] )
+
+
+    def getCarAvailability(self, car):
+        # (floor, time) the car will be free at once it's done with the work it already has
+        currTrip = car.getTrip()
+        if currTrip is not None:
+            return self._getTripEnd(currTrip)
+        else:
+            return (car.getFloor(), car.getFreeTime())
+
+
+    def estimatePickupTime(self, car, requestTime, startFloor):
+        (availableFloor, availableTime) = self.getCarAvailability(car)
+
+        return max(requestTime, availableTime) + \
+            (abs(startFloor - availableFloor) * self._secondsPerFloor)
+
+
+    def _getTripEnd(self, trip):
+        currFloor = trip.getOriginFloor()
+        currTime = trip.getDepartureTime()
+
+        for currStop in trip.getStops():
+            currTime += (abs(currStop - currFloor) * self._secondsPerFloor) + self._doorDwellSeconds
+            currFloor = currStop
+
+        return (currFloor, currTime)
+
+
+    def _finishCompletedTrips(self, requestTime):
+        for currCar in self._cars:
+            currTrip = currCar.getTrip()
+            if currTrip is not None and requestTime > currTrip.getDepartureTime() and \
+                    self._getTripEnd(currTrip)[1] <= requestTime:
+                self._finishTrip(currCar, repositionWhenIdle=True)
+
+
+    def _finishTrip(self, car, repositionWhenIdle=False):
+        currTrip = car.getTrip()
+        if currTrip is None:
+            return
+
+        # Drive the trip out stop by stop, recording everyone's wait and ride
+        arrivalTimes = {}
+        currFloor = currTrip.getOriginFloor()
+        currTime = currTrip.getDepartureTime()
+
+        for currStop in currTrip.getStops():
+            currTime += abs(currStop - currFloor) * self._secondsPerFloor
+            arrivalTimes[currStop] = currTime
+            currTime += self._doorDwellSeconds
+            currFloor = currStop
+
+        for (requestTime, destinationFloor) in currTrip.getRiders():
+            boardingTime = max(requestTime, currTrip.getPickupTime())
+
+            self._requestTimes.append(requestTime)
+            self._startFloors.append(currTrip.getOriginFloor())
+            self._destinationFloors.append(destinationFloor)
+            self._waitTimes.append(boardingTime - requestTime)
+            self._rideTimes.append(arrivalTimes[destinationFloor] - boardingTime)
+            self._carIds.append(car.getCarId())
+
+        car._moveTo(currFloor, currTime)
+        car._setTrip(None)
+
+        if repositionWhenIdle is True:
+            idleFloor = self._dispatchPolicy.getIdleFloor(self, car, currTime)
+            if idleFloor is not None and idleFloor != currFloor:
+                car._moveTo(idleFloor, currTime +
+                    (abs(idleFloor - currFloor) * self._secondsPerFloor) )
+
+
+def _getPercentile(sortedValues, percentile):
+    # Nearest-rank percentile
+    rank = int(math.ceil( (percentile / 100.0) * len(sortedValues) ))
+    return sortedValues[ max(rank, 1) - 1 ]
@@ -0,0 +1,94 @@
+#!/usr/bin/python3
+
+import logging
+import struct
+import numpy as np
+from models.common.ActivityWriters import ActivityWriter
+
+
+# One fixed-size record per elevator request. Times are seconds since the epoch, treating
+#   the simulation's (naive) timestamps as UTC
+ELEVATOR_REQUEST_DTYPE = np.dtype( [
+    ( 'epoch_seconds',      '<i8' ),
+    ( 'start_floor',        '<i2' ),
+    ( 'destination_floor',  '<i2' ),
+    ( 'direction',          'i1'  ),    # 1 = UP, -1 = DOWN
+    ( 'actor_id',           '<i4' ),
+] )
+
+DIRECTION_UP    =  1
+DIRECTION_DOWN  = -1
+
+# Total bytes of .npy preamble + header. Fixed so the record count can be filled in once the
+#   run is done without moving any of the data behind it
+_HEADER_LENGTH = 256
+
+
+class ElevatorRequestTraceWriter(ActivityWriter):
+
+    # Writes elevator requests as a standard NumPy .npy file of ELEVATOR_REQUEST_DTYPE
+    #   records, which readElevatorRequestTrace (or np.load) can memory-map directly.
+    #   Output file has to be opened in binary mode and be seekable
+
+    def __init__(self, outputFile):
+        ActivityWriter.__init__(self, outputFile)
+        self._log = logging.getLogger(__name__)
+
+        # Placeholder header, rewritten with the real record count in finish(). A file being
+        #   resumed from a checkpoint has one already
+        if self._outputFile.tell() == 0:
+            self._outputFile.write(_buildHeader(0))
+
+
+    def writeDailyActivities(self, currDate, dailyActivities):
+        # Trace is elevator requests only, whatever else the run subscribed to
+        dailyRecords = createElevatorRequestRecords( [ currActivity for currActivity in dailyActivities
+            if currActivity.getType() == "Request Elevator" ] )
+
+        self._outputFile.write(dailyRecords.tobytes())
+        self._activitiesWritten += len(dailyRecords)
+
+        self._log.debug("Wrote {0} elevator requests for {1}".format(
+            len(dailyRecords), currDate.isoformat()) )
+
+
+    def finish(self):
+        endOfData = self._outputFile.tell()
+        self._outputFile.seek(0)
+        self._outputFile.write(_buildHeader(self._activitiesWritten))
+        self._outputFile.seek(endOfData)
+        self._outputFile.flush()
+
+
+def createElevatorRequestRecords(elevatorRequests):
+    # ELEVATOR_REQUEST_DTYPE records for a list of RequestElevator activities, filled a
+    #   column at a time
+    records = np.zeros( len(elevatorRequests), dtype=ELEVATOR_REQUEST_DTYPE )
+
+    records['epoch_seconds'] = [ currActivity.getStartTime() for currActivity in elevatorRequests ]
+    records['start_floor'] = [ currActivity.getStartFloor() for currActivity in elevatorRequests ]
+    records['destination_floor'] = [ currActivity.getDestinationFloor() for currActivity in elevatorRequests ]
+    records['actor_id'] = [ currActivity.getActorId() for currActivity in elevatorRequests ]
+
+    records['direction'] = np.where(records['destination_floor'] > records['start_floor'],
+        DIRECTION_UP, DIRECTION_DOWN)
+
+    return records
+
+
+def readElevatorRequestTrace(traceFilename):
+    # Memory-mapped, read-only; nothing is copied until a column is actually used
+    return np.load(traceFilename, mmap_mode='r')
+
+
+def _buildHeader(recordCount):
+    magicString = np.lib.format.magic(1, 0)
+
+    header = "{{'descr': {0}, 'fortran_order': False, 'shape': ({1},), }}".format(
+        repr(np.lib.format.dtype_to_descr(ELEVATOR_REQUEST_DTYPE)), recordCount)
+
+    # Pad with spaces to the fixed length, header has to end in a newline
+    headerLength = _HEADER_LENGTH - len(magicString) - 2
+    header = header.ljust(headerLength - 1) + "\n"
+
+    return magicString + struct.pack('<H', headerLength) + header.encode('latin1')
@@ -0,0 +1,103 @@
+#!/usr/bin/python3
+
+import numpy as np
+import models.common.SimulationTime as SimulationTime
+
+
+# Turns elevator request times (epoch seconds) into the network's nine-value input vectors,
+#   a whole array at a time. The training scripts under pybrain/ and NeuralNetFloorPredictor
+#   both encode through here:
+#
+#   Year        (gaussian normalized)
+#   DayOfYear   (gaussian normalized)
+#   SecondOfDay (gaussian normalized)
+#   Day of week (encoded in a 6-bit dummy vector)
+#
+# For explanation of Gaussian normalization and "one-of-(C-1) effects-coding", see
+#
+#   https://visualstudiomagazine.com/articles/2014/01/01/how-to-standardize-data-for-neural-networks.aspx
+
+NUMBER_INPUT_VALUES = 9
+
+NUMERIC_INPUT_VALUES = ( 'year', 'dayOfYear', 'secondOfDay' )
+
+# Bump whenever the input encoding or normalization changes, cached features built with an
+#   older encoding are then ignored
+FEATURE_ENCODING_VERSION = 1
+
+
+def getOriginalInputColumns(epochSeconds):
+
+    # Returns (year, dayOfYear, secondOfDay, dayOfWeek) arrays, day of week is ISO
+    #   (Monday = 1, Sunday = 7)
+    epochSeconds = np.asarray(epochSeconds, dtype=np.int64)
+
+    epochDays = epochSeconds // SimulationTime.SECONDS_PER_DAY
+    secondOfDay = epochSeconds - (epochDays * SimulationTime.SECONDS_PER_DAY)
+
+    years = epochDays.astype('datetime64[D]').astype('datetime64[Y]')
+    yearStartDays = years.astype('datetime64[D]').astype(np.int64)
+
+    year = years.astype(np.int64) + 1970
+    dayOfYear = (epochDays - yearStartDays) + 1
+
+    # 1970-01-01 was a Thursday (ISO 4)
+    dayOfWeek = ((epochDays + 3) % 7) + 1
+
+    return (year, dayOfYear, secondOfDay, dayOfWeek)
+
+
+def createInputMatrix(epochSeconds, stats):
+
+    # One row of NUMBER_INPUT_VALUES fully-normalized inputs per timestamp
+    return createInputMatrixFromColumns( getOriginalInputColumns(epochSeconds), stats )
+
+
+def createInputMatrixFromColumns(originalInputColumns, stats):
+    (year, dayOfYear, secondOfDay, dayOfWeek) = originalInputColumns
+
+    inputMatrix = np.empty( (len(year), NUMBER_INPUT_VALUES) )
+
+    for (column, numericInputValue, values) in zip(range(3), NUMERIC_INPUT_VALUES,
+            (year, dayOfYear, secondOfDay)):
+        inputMatrix[:, column] = gaussianNormalizeNumericInput(numericInputValue, values, stats)
+
+    inputMatrix[:, 3:] = encodeDaysOfWeek(dayOfWeek)
+
+    return inputMatrix
+
+
+def gaussianNormalizeNumericInput(valueType, originalValues, stats):
+    if valueType not in stats:
+        raise ValueError("Value type of {0} is not known!".format(valueType) )
+
+    # Gaussian normalization - subtract mean from value (center on zero), then divide by
+    #       std deviation
+    #
+    # This results in values from roughly -10 to 10, centered on zero
+
+    inputValueStats = stats[valueType]
+    return ( (originalValues - inputValueStats['mean']) / inputValueStats['stdev'] )
+
+
+def encodeDaysOfWeek(dayOfWeek):
+
+    # Using 6-bit "one-of-(C-1) effect-coding" for day of week
+    #
+    #   ( 0  0  0  0  0  1) = Monday
+    #   ( 0  0  0  0  1  0) = Tuesday
+    #   ( 0  0  0  1  0  0) = Wednesday
+    #   ( 0  0  1  0  0  0) = Thursday
+    #   ( 0  1  0  0  0  0) = Friday
+    #   ( 1  0  0  0  0  0) = Saturday
+    #   (-1 -1 -1 -1 -1 -1) = Sunday
+    dayOfWeek = np.asarray(dayOfWeek)
+    dayOfWeekEncoding = np.zeros( (len(dayOfWeek), 6) )
+
+    # Using ISO day of week, so Monday = 1, Sunday = 7. Monday needs to be bit 5 (6-1),
+    #   Saturday is bit 0 (6-6)
+    isWeekday = dayOfWeek < 7
+    dayOfWeekEncoding[ np.nonzero(isWeekday)[0], 6 - dayOfWeek[isWeekday] ] = 1
+    dayOfWeekEncoding[ ~isWeekday ] = -1
+
+    return dayOfWeekEncoding
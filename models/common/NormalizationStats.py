@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+
+import logging
+import json
+import os
+
+
+# Gaussian normalization stats a network was trained with, kept in a sidecar file next to
+#   the network so pybrain/createNetFromJson.py, the pybrain/ test scripts and
+#   NeuralNetFloorPredictor all encode inputs the same way. Stats are
+#
+#   { 'year': { 'mean': ..., 'stdev': ... }, 'dayOfYear': { ... }, 'secondOfDay': { ... } }
+
+# Used when a network has no normalization stats saved with it. Pulled from training
+#   activities data, 10 year run starting 2016-12-15
+DEFAULT_NORMALIZATION_STATS = {
+    'year':         { 'mean':  2021.45870, 'stdev':     2.87825 },
+    'dayOfYear':    { 'mean':   182.80361, 'stdev':   105.36360 },
+    'secondOfDay':  { 'mean': 46422.07271, 'stdev': 20938.44370 },
+}
+
+NORMALIZATION_STATS_SUFFIX = ".stats.json"
+
+
+def getNormalizationStatsFilename(networkFilename):
+    # Sidecar next to the network, ElevatorIntelligence-net-<time>.xml has
+    #   ElevatorIntelligence-net-<time>.stats.json
+    return os.path.splitext(networkFilename)[0] + NORMALIZATION_STATS_SUFFIX
+
+
+def saveNormalizationStats(networkFilename, stats, sampleCount):
+    with open(getNormalizationStatsFilename(networkFilename), 'w') as statsFile:
+        json.dump( { 'samples': sampleCount, 'normalization': stats }, statsFile, indent=4,
+            sort_keys=True )
+
+
+def loadNormalizationStats(networkFilename):
+    # Stats the network was trained with, DEFAULT_NORMALIZATION_STATS for networks saved
+    #   before they were written alongside it
+    statsFilename = getNormalizationStatsFilename(networkFilename)
+    try:
+        with open(statsFilename, 'r') as statsFile:
+            return json.load(statsFile)['normalization']
+    except FileNotFoundError:
+        logging.getLogger(__name__).warning("No normalization stats in %s, using defaults",
+            statsFilename)
+        return DEFAULT_NORMALIZATION_STATS
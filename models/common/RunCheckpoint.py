@@ -0,0 +1,188 @@
+#!/usr/bin/python3
+
+import logging
+import gzip
+import io
+import os
+import pickle
+import tempfile
+
+
+class RunCheckpoint:
+
+    # Periodic snapshot of a Building.runModel run, so a run that gets killed can carry on
+    #   from its last checkpoint instead of starting over. A checkpoint holds the next date
+    #   to simulate, activities carried over past midnight, the elevator model, the activity
+    #   writer's counters and how many bytes of output belong to the days already done.
+    #   Days are seeded from the run seed and date alone, so there's no generator state to
+    #   keep beyond the seed itself
+    #
+    # The run's output has to be a CheckpointedOutputFile, which is truncated back to the
+    #   checkpoint's length on resume
+
+    # 2: records the subscribed activity types
+    FORMAT_VERSION = 2
+
+    def __init__(self, checkpointFilename, outputFile, intervalDays):
+        self._log = logging.getLogger(__name__)
+
+        if intervalDays < 1:
+            raise ValueError("Checkpoint interval has to be at least one day, got {0}".format(intervalDays) )
+
+        self._checkpointFilename = checkpointFilename
+        self._outputFile = outputFile
+        self._intervalDays = intervalDays
+        self._daysSinceCheckpoint = 0
+        self._resumeState = None
+
+
+    @staticmethod
+    def load(checkpointFilename):
+        # Saved state, None if there's no checkpoint
+        try:
+            with open(checkpointFilename, 'rb') as checkpointFile:
+                checkpointState = pickle.load(checkpointFile)
+        except FileNotFoundError:
+            return None
+
+        if checkpointState.get('format_version') != RunCheckpoint.FORMAT_VERSION:
+            raise ValueError("Checkpoint {0} is format {1}, expected {2}".format(checkpointFilename,
+                checkpointState.get('format_version'), RunCheckpoint.FORMAT_VERSION) )
+
+        return checkpointState
+
+
+    def getResumeState(self):
+        return self._resumeState
+
+
+    def setResumeState(self, checkpointState):
+        # Building.runModel picks up from this state instead of the start date
+        self._resumeState = checkpointState
+
+
+    def dayFinished(self):
+        # True when enough days have been written since the last checkpoint
+        self._daysSinceCheckpoint += 1
+        return self._daysSinceCheckpoint >= self._intervalDays
+
+
+    def save(self, checkpointState):
+        # Output first: the checkpoint must never point past what's actually on disk
+        checkpointState = dict(checkpointState)
+        checkpointState['format_version'] = RunCheckpoint.FORMAT_VERSION
+        checkpointState['checkpoint_every'] = self._intervalDays
+        checkpointState['output_offset'] = self._outputFile.checkpoint()
+
+        checkpointDir = os.path.dirname( os.path.abspath(self._checkpointFilename) )
+        (tempFd, tempFilename) = tempfile.mkstemp(dir=checkpointDir, suffix=".tmp")
+        try:
+            with os.fdopen(tempFd, 'wb') as tempFile:
+                pickle.dump(checkpointState, tempFile, protocol=pickle.HIGHEST_PROTOCOL)
+                tempFile.flush()
+                os.fsync(tempFile.fileno())
+            os.replace(tempFilename, self._checkpointFilename)
+        except BaseException:
+            os.unlink(tempFilename)
+            raise
+
+        self._daysSinceCheckpoint = 0
+        self._log.info("checkpoint next_date=%s output_offset=%d",
+            checkpointState['next_date'], checkpointState['output_offset'])
+
+
+    def remove(self):
+        # Run finished, nothing to resume
+        try:
+            os.unlink(self._checkpointFilename)
+        except FileNotFoundError:
+            pass
+
+
+class CheckpointedOutputFile:
+
+    # Output file for a checkpointed run, handed to the activity writer in place of a plain
+    #   file. checkpoint() pushes everything written so far to disk and returns the file's
+    #   length; gzip output ends its current member there, so the file is always a valid
+    #   multi-member gzip up to the last checkpoint. Resuming truncates back to that length
+    #   and carries on writing after it
+
+    def __init__(self, filename, binary=False, compress=False, resumeOffset=None):
+        self._binary = binary
+        self._compress = compress
+
+        if resumeOffset is None:
+            self._rawFile = open(filename, 'w+b')
+        else:
+            self._rawFile = open(filename, 'r+b')
+            self._rawFile.truncate(resumeOffset)
+            self._rawFile.seek(resumeOffset)
+
+        self._compressedFile = None
+        self._stream = None
+        self._openStream()
+
+
+    def write(self, data):
+        return self._stream.write(data)
+
+
+    def flush(self):
+        self._stream.flush()
+
+
+    def tell(self):
+        return self._stream.tell()
+
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        return self._stream.seek(offset, whence)
+
+
+    def checkpoint(self):
+        self._stream.flush()
+
+        if self._compress is True:
+            # Close out this gzip member, the next checkpoint's data goes in a new one
+            if self._binary is False:
+                self._stream.detach()
+            self._compressedFile.close()
+
+        self._rawFile.flush()
+        os.fsync(self._rawFile.fileno())
+        outputOffset = self._rawFile.tell()
+
+        if self._compress is True:
+            self._openStream()
+
+        return outputOffset
+
+
+    def close(self):
+        self._stream.flush()
+        if self._binary is False:
+            self._stream.detach()
+        if self._compressedFile is not None:
+            self._compressedFile.close()
+        self._rawFile.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+
+    def _openStream(self):
+        stream = self._rawFile
+        if self._compress is True:
+            self._compressedFile = gzip.GzipFile(fileobj=self._rawFile, mode='wb')
+            stream = self._compressedFile
+
+        # Same text a plain open(filename, 'wt') writes on this platform
+        if self._binary is False:
+            stream = io.TextIOWrapper(stream, encoding='utf-8')
+
+        self._stream = stream
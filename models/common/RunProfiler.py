@@ -0,0 +1,189 @@
+#!/usr/bin/python3
+
+import logging
+import collections
+import contextlib
+import cProfile
+import json
+import os
+import time
+import tracemalloc
+
+
+class RunProfiler:
+
+    # Instrumentation for Building.runModel: wall time of each phase of each simulated day,
+    #   activity counts by type and by actor, and optionally peak traced memory and a cProfile
+    #   dump per phase. getSummary() is the machine-readable report; compare two of them to
+    #   spot regressions after a model change
+    #
+    # With worker processes each worker has its own copy; Building hands the per-day records
+    #   back to the parent, which merges them with mergeDayRecords
+
+    def __init__(self, trackMemory=False, cProfileDir=None):
+        self._log = logging.getLogger(__name__)
+        self._trackMemory = trackMemory
+        self._cProfileDir = cProfileDir
+
+        self._runStartTime = None
+        self._runSeconds = None
+
+        # Phase name => [ total seconds, calls ]
+        self._phaseTotals = collections.OrderedDict()
+
+        # Date => phase name => seconds. Days a worker has simulated but not yet handed back
+        #   are kept separately in _pendingDayRecords, only in worker processes
+        self._dayRecords = collections.OrderedDict()
+        self._pendingDayRecords = []
+        self._isWorker = False
+
+        self._activitiesByType = collections.Counter()
+        self._activitiesByActor = collections.Counter()
+        self._workerPeakMemory = 0
+
+        # Phase name => cProfile.Profile
+        self._phaseProfiles = {}
+
+        if cProfileDir is not None and os.path.isdir(cProfileDir) is False:
+            os.makedirs(cProfileDir)
+
+
+    def isProfilingCalls(self):
+        return self._cProfileDir is not None
+
+
+    def startRun(self):
+        self.startProcess()
+        self._runStartTime = time.perf_counter()
+
+
+    def startProcess(self, isWorker=False):
+        # Called in every process that records phases. Workers also keep their day records
+        #   for popDayRecords
+        self._isWorker = isWorker
+        if self._trackMemory is True and tracemalloc.is_tracing() is False:
+            tracemalloc.start()
+
+
+    def finishRun(self):
+        self._runSeconds = time.perf_counter() - self._runStartTime
+
+        for (phaseName, phaseProfile) in self._phaseProfiles.items():
+            phaseProfile.dump_stats( os.path.join(self._cProfileDir, "{0}.prof".format(phaseName)) )
+
+
+    @contextlib.contextmanager
+    def phase(self, phaseName, currDate=None):
+        phaseProfile = None
+        if self._cProfileDir is not None:
+            phaseProfile = self._phaseProfiles.get(phaseName)
+            if phaseProfile is None:
+                phaseProfile = cProfile.Profile()
+                self._phaseProfiles[phaseName] = phaseProfile
+            phaseProfile.enable()
+
+        startTime = time.perf_counter()
+        try:
+            yield
+        finally:
+            phaseSeconds = time.perf_counter() - startTime
+
+            if phaseProfile is not None:
+                phaseProfile.disable()
+
+            self._addPhaseTime(phaseName, currDate, phaseSeconds)
+            if currDate is not None and self._isWorker is True:
+                self._pendingDayRecords.append( (currDate, phaseName, phaseSeconds) )
+
+
+    def countActivities(self, activities):
+        for currActivity in activities:
+            self._activitiesByType[ currActivity.getType() ] += 1
+
+            # Only some activity types know who did them
+            getActorId = getattr(currActivity, 'getActorId', None)
+            if getActorId is not None and getActorId() is not None:
+                self._activitiesByActor[ getActorId() ] += 1
+
+
+    def popDayRecords(self):
+        # Phase times recorded since the last call, plus this process's memory peak, for
+        #   a worker to send back to the parent
+        dayRecords = self._pendingDayRecords
+        self._pendingDayRecords = []
+        return (dayRecords, self._getPeakMemory())
+
+
+    def mergeDayRecords(self, workerRecords):
+        (dayRecords, workerPeakMemory) = workerRecords
+        for (currDate, phaseName, phaseSeconds) in dayRecords:
+            self._addPhaseTime(phaseName, currDate, phaseSeconds)
+
+        self._workerPeakMemory = max(self._workerPeakMemory, workerPeakMemory)
+
+
+    def getSummary(self):
+        totalActivities = sum(self._activitiesByType.values())
+
+        summary = {
+            'days':                 len(self._dayRecords),
+            'wall_seconds':         self._runSeconds,
+            'activities':           totalActivities,
+            'activities_per_second': None,
+            'phases':               collections.OrderedDict(),
+            'per_day':              [],
+            'activities_by_type':   dict(self._activitiesByType),
+            'activities_per_actor': { str(actorId): count for (actorId, count) in
+                sorted(self._activitiesByActor.items()) },
+            'peak_memory_bytes':    None,
+        }
+
+        if self._runSeconds is not None and self._runSeconds > 0:
+            summary['activities_per_second'] = totalActivities / self._runSeconds
+
+        for (phaseName, (phaseSeconds, phaseCalls)) in self._phaseTotals.items():
+            summary['phases'][phaseName] = {
+                'seconds':  phaseSeconds,
+                'calls':    phaseCalls,
+            }
+
+        for (currDate, dayPhases) in sorted(self._dayRecords.items()):
+            dayRecord = { 'date': currDate.isoformat() }
+            dayRecord.update(dayPhases)
+            summary['per_day'].append(dayRecord)
+
+        if self._trackMemory is True:
+            summary['peak_memory_bytes'] = max(self._getPeakMemory(), self._workerPeakMemory)
+
+        return summary
+
+
+    def writeSummary(self, summaryFile):
+        json.dump(self.getSummary(), summaryFile, indent=4)
+
+
+    def logSummary(self):
+        summary = self.getSummary()
+        for (phaseName, phaseTotals) in summary['phases'].items():
+            self._log.info("profile phase=%s seconds=%.3f calls=%d",
+                phaseName, phaseTotals['seconds'], phaseTotals['calls'])
+
+        self._log.info("profile days=%d wall_seconds=%.3f activities=%d peak_memory_bytes=%s",
+            summary['days'], summary['wall_seconds'], summary['activities'], summary['peak_memory_bytes'])
+
+
+    def _addPhaseTime(self, phaseName, currDate, phaseSeconds):
+        phaseTotals = self._phaseTotals.setdefault(phaseName, [ 0.0, 0 ])
+        phaseTotals[0] += phaseSeconds
+        phaseTotals[1] += 1
+
+        if currDate is not None:
+            dayPhases = self._dayRecords.setdefault(currDate, collections.OrderedDict())
+            dayPhases[phaseName] = dayPhases.get(phaseName, 0.0) + phaseSeconds
+
+
+    def _getPeakMemory(self):
+        if tracemalloc.is_tracing() is False:
+            return 0
+
+        return tracemalloc.get_traced_memory()[1]
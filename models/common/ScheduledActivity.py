@@ -2,16 +2,27 @@
 
 import logging
 import abc
+import models.common.SimulationTime as SimulationTime
 
 class ScheduledActivity():
 
     __metaclass__ = abc.ABCMeta
 
+    # Start and end times are integer epoch seconds (see SimulationTime)
+
+    # Shared by every activity rather than looked up per instance
+    _log = logging.getLogger(__name__)
+
+    # A run creates millions of these, keep them to just their fields
+    __slots__ = ( '_activityStartTime', '_activityEndTime' )
+
+    # Keys of the activity's JSON object, in sorted order, matching getJsonValues. Writers
+    #   build each type's output template from these once instead of a dict per activity
+    JSON_KEYS = ()
+
     def __init__(self, activityStartTime, activityEndTime):
-        self._log = logging.getLogger(__name__)
         self._activityStartTime = activityStartTime
         self._activityEndTime = activityEndTime
-        self._activityDuration = activityEndTime - activityStartTime
 
 
     def getStartTime(self):
@@ -23,11 +34,15 @@ class ScheduledActivity():
 
 
     def getDuration(self):
-        return self._activityDuration
+        return self._activityEndTime - self._activityStartTime
 
 
     def getStartTimeString(self):
-        return self.getStartTime().strftime("%Y%m%d %H%M%S")
+        return SimulationTime.formatTimestamp(self._activityStartTime)
+
+
+    def getJsonDictionary(self):
+        return dict( zip(self.JSON_KEYS, self.getJsonValues()) )
 
 
     @abc.abstractmethod
@@ -41,5 +56,5 @@ class ScheduledActivity():
 
 
     @abc.abstractmethod
-    def getJsonDictionary(self):
+    def getJsonValues(self):
         return
@@ -0,0 +1,63 @@
+#!/usr/bin/python3
+
+import datetime
+import functools
+
+
+# Simulation times are plain integer seconds since the Unix epoch (UTC, no leap seconds).
+#   Scheduling is just integer math on them; they're only turned back into dates and
+#   "%Y%m%d %H%M%S" strings where activities are written out
+
+SECONDS_PER_MINUTE  = 60
+SECONDS_PER_HOUR    = 60 * SECONDS_PER_MINUTE
+SECONDS_PER_DAY     = 24 * SECONDS_PER_HOUR
+
+_EPOCH_ORDINAL = datetime.date(1970, 1, 1).toordinal()
+
+
+def getMidnight(currDate):
+    # Start of currDate, in epoch seconds
+    return (currDate.toordinal() - _EPOCH_ORDINAL) * SECONDS_PER_DAY
+
+
+def getSeconds(hours=0, minutes=0, seconds=0):
+    # Integer stand-in for datetime.timedelta(hours=, minutes=, seconds=)
+    return (hours * SECONDS_PER_HOUR) + (minutes * SECONDS_PER_MINUTE) + seconds
+
+
+def getDate(epochSeconds):
+    return datetime.date.fromordinal( (epochSeconds // SECONDS_PER_DAY) + _EPOCH_ORDINAL )
+
+
+def toDatetime(epochSeconds):
+    return datetime.datetime(1970, 1, 1) + datetime.timedelta(seconds=epochSeconds)
+
+
+def formatTimestamp(epochSeconds):
+    # Same as toDatetime(epochSeconds).strftime("%Y%m%d %H%M%S"), without building a datetime
+    (day, secondOfDay) = divmod(epochSeconds, SECONDS_PER_DAY)
+    (hour, secondOfHour) = divmod(secondOfDay, SECONDS_PER_HOUR)
+    (minute, second) = divmod(secondOfHour, SECONDS_PER_MINUTE)
+
+    return "{0} {1:02d}{2:02d}{3:02d}".format(_getDateString(day), hour, minute, second)
+
+
+@functools.lru_cache(maxsize=64)
+def _getDateString(day):
+    # A run only ever touches a couple of days at a time
+    return datetime.date.fromordinal(day + _EPOCH_ORDINAL).strftime("%Y%m%d")
+
+
+class LogTime:
+
+    # Wraps a time passed to a logging call so it's only made human readable if the
+    #   message actually gets formatted
+
+    __slots__ = ( '_epochSeconds', )
+
+    def __init__(self, epochSeconds):
+        self._epochSeconds = epochSeconds
+
+
+    def __str__(self):
+        return str(toDatetime(self._epochSeconds))
@@ -0,0 +1,12 @@
+#!/usr/bin/python3
+
+import os
+import sys
+
+# Simulator modules live one directory up. Appended, so an installed pybrain still wins over
+#   this directory
+sys.path.append( os.path.dirname(os.path.dirname(os.path.abspath(__file__))) )
+
+# Same reader the replay and benchmark drivers use, so every script agrees on the formats
+from models.common.ActivityReader import isActivityFile, readActivities
+from models.common.ElevatorRequestTrace import readElevatorRequestTrace
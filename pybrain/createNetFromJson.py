@@ -8,12 +8,24 @@ import pybrain.supervised.trainers
 import pybrain.tools.customxml.networkwriter
 import json
 import argparse
+import collections
+import concurrent.futures
 import math
 import os
 import json
 import datetime
 import pprint
 import numpy as np
+import activityReader
+import inputFeatures
+import numpyTrainer
+import featureCache
+
+
+# Trainers performTraining can use. pybrain's BackpropTrainer updates the weights after
+#   every sample; the numpy trainer does whole mini-batches at a time and is far faster
+#   per epoch
+TRAINER_NAMES = ( 'backprop', 'numpy' )
 
 
 def main():
@@ -22,11 +34,17 @@ def main():
     # Create network, all neurons/synapses will have random weights
     neuralNet = createNet()
 
-    # Create dataset
-    dataset = createDataset(args.json_dir)
+    # Create dataset, normalized with stats over every file
+    cache = None
+    if args.no_feature_cache is False:
+        cache = featureCache.FeatureCache(args.feature_cache_dir)
+
+    (dataset, normalizationStats) = createDataset(args.json_dir, args.read_workers,
+        args.max_files_in_flight, cache)
 
-    # Start the training phase (saves network when done)
-    performTraining(neuralNet, dataset, args.network_dir, args.training_epochs)
+    # Start the training phase (saves network and its normalization stats when done)
+    performTraining(neuralNet, dataset, args.network_dir, args.training_epochs, normalizationStats,
+        trainerName=args.trainer, batchSize=args.batch_size, workers=args.workers)
 
 
 def parseArgs():
@@ -34,6 +52,21 @@ def parseArgs():
     argParser.add_argument('json_dir', help='Directory with JSON files')
     argParser.add_argument('network_dir', help='Directory to save neural nets after training')
     argParser.add_argument('training_epochs', help='Number of training epochs to run', type=int)
+    argParser.add_argument('--read-workers', help='Processes reading and featurizing activity files ' +
+        '(default: %(default)s)', type=int, default=1)
+    argParser.add_argument('--max-files-in-flight', help='Most files being read or waiting to be ' +
+        'added to the dataset at once (default: twice --read-workers)', type=int)
+    argParser.add_argument('--feature-cache-dir', help='Reuse features built from the same activity ' +
+        'files from here (default: {0})'.format(featureCache.FeatureCache.getDefaultCacheDir()))
+    argParser.add_argument('--no-feature-cache', help='Always read the activity files, ' +
+        'don\'t use or fill the feature cache', action='store_true')
+    argParser.add_argument('--trainer', help='Training algorithm (default: %(default)s)',
+        choices=TRAINER_NAMES, default='backprop')
+    argParser.add_argument('--batch-size', help='Samples per weight update with the numpy trainer ' +
+        '(default: %(default)s)', type=int, default=64)
+    argParser.add_argument('--workers', help='Processes the numpy trainer splits each batch across, ' +
+        'at least {0} samples each (default: %(default)s)'.format(
+        numpyTrainer.MiniBatchTrainer.MIN_SHARD_SAMPLES), type=int, default=1)
     return argParser.parse_args()
 
 
@@ -78,247 +111,195 @@ def createNet():
         hiddenclass=hiddenClass )
 
 
-def createDataset(jsonDir):
-    numInputDimensions = 9
+def createDataset(jsonDir, workers=1, maxFilesInFlight=None, cache=None):
+
+    # Returns (dataset, normalization stats). Stats are for the whole directory, gathered in
+    #   the same pass that reads the files, so every sample is normalized the same way and
+    #   the stats can be saved with the network for inference
+    numInputDimensions = inputFeatures.NUMBER_INPUT_VALUES
     numTargetDimensions = 1
     
     dataset = pybrain.datasets.SupervisedDataSet( numInputDimensions, numTargetDimensions )
 
-    for currFileName in os.listdir(jsonDir):
+    activityFiles = []
+    for currFileName in sorted(os.listdir(jsonDir)):
         joinedFile = os.path.join(jsonDir, currFileName)
-        if os.path.isfile(joinedFile) is False:
+        if os.path.isfile(joinedFile) is False or activityReader.isActivityFile(currFileName) is False:
             continue
 
-        with open(joinedFile, "r") as currFile:
-            dataDictionary = json.load(currFile)
-            logging.warn("Read in JSON data from {0}".format(joinedFile) )
+        activityFiles.append(joinedFile)
 
-            stats = calculateGaussianNormalizationParameters(dataDictionary)
+    cachedFeatures = None
+    if cache is not None:
+        cachedFeatures = cache.load(activityFiles)
 
-            # Add a sample for each entry
-            for timestampString in dataDictionary.keys(): 
+    if cachedFeatures is not None:
+        (inputs, targets, normalizationStats) = cachedFeatures
+    else:
+        (inputs, targets, normalizationStats) = createFeatureArrays(activityFiles, workers,
+            maxFilesInFlight)
+        if len(inputs) == 0:
+            raise ValueError("No button presses in {0} to train on".format(jsonDir) )
 
-                for currActivity in dataDictionary[timestampString]:
+        if cache is not None:
+            cache.save(activityFiles, inputs, targets, normalizationStats)
 
-                    # if the hash is empty or isn't a button press, ignore and try next
-                    if currActivity == None or 'activity_type' not in currActivity:
-                        continue
+    inputFeatures.printNormalizationStats(normalizationStats)
 
-                    # Fully-normalized input values
-                    inputValue =    getNormalizedInputValuesFromTimestamp(timestampString, stats)
+    # Load every sample into the dataset at once rather than one addSample per row
+    dataset.setField( 'input', inputs )
+    dataset.setField( 'target', targets )
 
-                    targetValue = \
-                        ( # Floor (target numerical values do not need to be normalized)
-                            currActivity['start_floor'] 
-                        )
+    return (dataset, normalizationStats)
 
-                    # print( "Timestamp {0} turned into sample {1} => {2}".format(
-                    #    timestampString, pprint.pformat(inputValue), 
-                    #    pprint.pformat(targetValue)) )
 
-                    dataset.addSample(inputValue, targetValue)
+def createFeatureArrays(activityFiles, workers=1, maxFilesInFlight=None):
 
-    return dataset
-        
+    # Returns (input matrix, target column, normalization stats) for the activity files,
+    #   no rows if none of them have button presses
+    statsAccumulator = inputFeatures.NormalizationStatsAccumulator()
+    inputColumns = []
+    targetValues = []
 
-def performTraining( neuralNet, trainingDataset, networkSaveDir, numberOfTrainingEpochs ):
-
-    # Make sure we have someplace to save data
-    if os.path.isdir(networkSaveDir) is False:
-        raise ValueError("Cannot save networks to {0}, not a directory".format(
-            networkSaveDir) )
+    for (joinedFile, (originalInputColumns, startFloors)) in readActivityFiles(activityFiles,
+            workers, maxFilesInFlight):
+        logging.warn("Read JSON data from {0}".format(joinedFile) )
+        print( "Number of button presses: {0}".format(len(startFloors)) )
 
-    trainer = pybrain.supervised.trainers.BackpropTrainer(neuralNet, trainingDataset, verbose=True)
-
-    oldError = 0.0
-    if numberOfTrainingEpochs > 0:
-        for i in range(numberOfTrainingEpochs):
-            logging.warn("\nTraining: starting epoch {0} / {1} @ {2}".format(
-                i + 1, numberOfTrainingEpochs, datetime.datetime.utcnow()) )
-            epochError = trainer.train()
-            if oldError < 0.000000001:
-                logging.warn("Training epoch complete, error = {0:1.010f}, time = {1}".format(
-                    epochError, datetime.datetime.utcnow()) )
-            else:
-                logging.warn("Training epoch complete, error = {0:1.010f}, error delta = {1:2.010f}, time = {2}".format(
-                    epochError, epochError - oldError, datetime.datetime.utcnow()) )
+        if len(startFloors) == 0:
+            continue
 
-            # Save off data so far
-            persistNetwork(neuralNet, networkSaveDir)
+        # Year, day of year, second of day, day of week, normalized once the stats are known
+        statsAccumulator.addColumns(originalInputColumns)
+        inputColumns.append(originalInputColumns)
 
-            # Update error so we can show change
-            oldError = epochError
+        # Floor (target numerical values do not need to be normalized)
+        targetValues.append(startFloors)
 
-    else:
-        logging.warn("Training: starting training @ {0}, running to convergence".format(
-            datetime.datetime.utcnow()) )
-        trainer.trainUntilConvergence(verbose=True, maxEpochs=500)
-        logging.warn("Training: network converted @ {0}".format(
-            datetime.datetime.utcnow()) )
+    if len(inputColumns) == 0:
+        return ( np.empty( (0, inputFeatures.NUMBER_INPUT_VALUES) ), np.empty( (0, 1) ), None )
 
+    normalizationStats = statsAccumulator.getStats()
 
-def persistNetwork(neuralNet, networkSaveDir):
-    currentDatetime = datetime.datetime.utcnow()
-    filename = os.path.join( networkSaveDir, "ElevatorIntelligence-net-{0}.xml".format(
-        currentDatetime.strftime("%Y%m%d%H%M%S")) )
-
-    pybrain.tools.customxml.networkwriter.NetworkWriter.writeToFile( neuralNet, 
-        filename )
+    allInputColumns = [ np.concatenate(currColumns) for currColumns in zip(*inputColumns) ]
+    inputs = inputFeatures.createInputMatrixFromColumns(allInputColumns, normalizationStats)
+    targets = np.concatenate(targetValues).astype(float).reshape(-1, 1)
 
-    logging.warn("Wrote network to file {0}".format(filename) )
+    return (inputs, targets, normalizationStats)
 
 
-def calculateGaussianNormalizationParameters(dataDictionary):
-    normalizationParameters = {}
+def readActivityFiles(activityFiles, workers=1, maxFilesInFlight=None):
 
-    numberButtonPresses = 0
+    # Yields (filename, inputFeatures.loadOriginalInputColumns result) in the order given.
+    #   With workers > 1 files are read in a process pool, at most maxFilesInFlight at a time
+    #   so a slow file early on doesn't leave the rest of the directory's results piling up
+    #   in memory
+    if workers == 1:
+        for currFile in activityFiles:
+            yield (currFile, inputFeatures.loadOriginalInputColumns(currFile))
 
-    # Iterate over data to count button presses (used for numpy array creation
-    for timestampString in dataDictionary.keys():
-        for currActivity in dataDictionary[timestampString]:
-            # if the hash is empty or isn't a button press, ignore
-            if currActivity == None or 'activity_type' not in currActivity:
-                continue
+        return
 
-            else:
-                numberButtonPresses += 1
+    if maxFilesInFlight is None:
+        maxFilesInFlight = workers * 2
 
-    print( "Number of button presses: {0}".format(numberButtonPresses) )
+    if maxFilesInFlight < 1:
+        raise ValueError("Need at least one file in flight, got {0}".format(maxFilesInFlight) )
 
-    # Create the numpy arrays of appropriate size
-    stats = {}
-    for numericInputValue in [ 'year', 'dayOfYear', 'secondOfDay' ]:
-        print( "Creating values array for {0}".format(numericInputValue) )
-        stats[ numericInputValue ] = { 'values': np.zeros( numberButtonPresses ) }
+    pendingFiles = collections.deque()
+    remainingFiles = iter(activityFiles)
 
-    # Populate the value arrays
-    currentEntryNumber = 0
-    for timestampString in dataDictionary.keys():
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        for currFile in remainingFiles:
+            pendingFiles.append( (currFile, executor.submit(inputFeatures.loadOriginalInputColumns,
+                currFile)) )
+            if len(pendingFiles) >= maxFilesInFlight:
+                break
 
-        for currActivity in dataDictionary[timestampString]:
+        while len(pendingFiles) > 0:
+            (currFile, currFuture) = pendingFiles.popleft()
+            fileColumns = currFuture.result()
 
-            # if the hash is empty or isn't a button press, ignore and try next
-            if currActivity == None or 'activity_type' not in currActivity:
-                continue
+            # Top back up before handing this file's results on
+            nextFile = next(remainingFiles, None)
+            if nextFile is not None:
+                pendingFiles.append( (nextFile, executor.submit(inputFeatures.loadOriginalInputColumns,
+                    nextFile)) )
 
-            (year, dayOfYear, secondOfDay, dayOfWeek) = getOriginalInputValuesFromTimestamp(
-                timestampString )
-
-            stats[ 'year'        ]['values'][currentEntryNumber] = year
-            stats[ 'dayOfYear'   ]['values'][currentEntryNumber] = dayOfYear
-            stats[ 'secondOfDay' ]['values'][currentEntryNumber] = secondOfDay
-
-            # print( "Stats entry {0:3d} set to ({1}, {2}, {3})".format(
-            #    currentEntryNumber, year, dayOfYear, secondOfDay) )
-
-            currentEntryNumber += 1
+            yield (currFile, fileColumns)
+        
 
-    # Calculate the gaussian parameters, then drop references as they're no longer needed
-    for numericInputValue in ( 'year', 'dayOfYear', 'secondOfDay' ):
-        inputValue = stats[ numericInputValue ]
-        values = inputValue['values']
-        inputValue[ 'mean'  ] = np.mean( values )
-        inputValue[ 'stdev' ] = np.std( values )
+def performTraining( neuralNet, trainingDataset, networkSaveDir, numberOfTrainingEpochs, normalizationStats,
+        trainerName='backprop', batchSize=64, workers=1 ):
 
-        # Drop reference to allow memory to be garbage collected if needed
-        values = None
+    # Make sure we have someplace to save data
+    if os.path.isdir(networkSaveDir) is False:
+        raise ValueError("Cannot save networks to {0}, not a directory".format(
+            networkSaveDir) )
 
-        print( "Numeric Input Value = {0}, mean = {1:8.5f}, standard dev = {2:8.5f}".format(
-            numericInputValue, inputValue[ 'mean' ], inputValue[ 'stdev' ]) )        
+    trainer = createTrainer(trainerName, neuralNet, trainingDataset, batchSize, workers)
 
+    try:
+        oldError = 0.0
+        if numberOfTrainingEpochs > 0:
+            for i in range(numberOfTrainingEpochs):
+                logging.warn("\nTraining: starting epoch {0} / {1} @ {2}".format(
+                    i + 1, numberOfTrainingEpochs, datetime.datetime.utcnow()) )
+                epochError = trainer.train()
+                if oldError < 0.000000001:
+                    logging.warn("Training epoch complete, error = {0:1.010f}, time = {1}".format(
+                        epochError, datetime.datetime.utcnow()) )
+                else:
+                    logging.warn("Training epoch complete, error = {0:1.010f}, error delta = {1:2.010f}, time = {2}".format(
+                        epochError, epochError - oldError, datetime.datetime.utcnow()) )
 
-    return stats
+                # Save off data so far
+                persistNetwork(neuralNet, networkSaveDir, normalizationStats, len(trainingDataset))
 
+                # Update error so we can show change
+                oldError = epochError
 
-def gaussianNormalizeNumericInput(valueType, originalValue, stats):
-    if valueType not in stats:
-        raise ValueError("Value type of {0} is not known!".format(valueType) )
+        else:
+            logging.warn("Training: starting training @ {0}, running to convergence".format(
+                datetime.datetime.utcnow()) )
+            trainer.trainUntilConvergence(verbose=True, maxEpochs=500)
+            logging.warn("Training: network converted @ {0}".format(
+                datetime.datetime.utcnow()) )
 
-    # Gaussian normalization - subtract mean from value (center on zero), then divide by
-    #       std deviation 
-    #
-    # This results in values from roughly -10 to 10, centered on zero
+            persistNetwork(neuralNet, networkSaveDir, normalizationStats, len(trainingDataset))
 
-    inputValueStats = stats[valueType]
-    return ( (originalValue - inputValueStats['mean']) / inputValueStats['stdev'] )
+    finally:
+        # The numpy trainer may have worker processes to stop
+        if isinstance(trainer, numpyTrainer.MiniBatchTrainer):
+            trainer.close()
 
 
-def getOriginalInputValuesFromTimestamp(timestampString):
+def createTrainer(trainerName, neuralNet, trainingDataset, batchSize=64, workers=1):
+    if trainerName == 'backprop':
+        if workers != 1:
+            raise ValueError("BackpropTrainer runs in one process, use the numpy trainer for workers")
+        return pybrain.supervised.trainers.BackpropTrainer(neuralNet, trainingDataset, verbose=True)
 
-    timestamp = datetime.datetime.strptime( timestampString, "%Y%m%d %H%M%S" )
+    if trainerName == 'numpy':
+        # Weights go back into neuralNet after every epoch, so persistNetwork saves it as usual
+        return numpyTrainer.MiniBatchTrainer(neuralNet, trainingDataset, batchSize=batchSize,
+            verbose=True, workers=workers)
 
-    year = timestamp.year
-    dayOfYear = timestamp.timetuple()[7]
-    secondOfDay = \
-        (timestamp.hour * 3600) + \
-        (timestamp.minute * 60) + \
-        timestamp.second
-    dayOfWeek = timestamp.isoweekday()
+    raise ValueError("Unknown trainer {0}, choose from {1}".format(trainerName, ", ".join(TRAINER_NAMES)) )
 
-    return (year, dayOfYear, secondOfDay, dayOfWeek)
 
+def persistNetwork(neuralNet, networkSaveDir, normalizationStats, sampleCount):
+    currentDatetime = datetime.datetime.utcnow()
+    filename = os.path.join( networkSaveDir, "ElevatorIntelligence-net-{0}.xml".format(
+        currentDatetime.strftime("%Y%m%d%H%M%S")) )
 
-def getNormalizedInputValuesFromTimestamp(timestampString, stats):
+    pybrain.tools.customxml.networkwriter.NetworkWriter.writeToFile( neuralNet, 
+        filename )
 
-    # Normalize all inputs to run through net
-    #
-    # For explanation of Gaussian normalization and 
-    #   "one-of-(C-1) effects-coding", see
-    #
-    #   https://visualstudiomagazine.com/articles/2014/01/01/how-to-standardize-data-for-neural-networks.aspx
-
-    (year, dayOfYear, secondOfDay, dayOfWeek) = getOriginalInputValuesFromTimestamp(
-        timestampString )
-
-    normalizedYear          = gaussianNormalizeNumericInput( 
-        'year', year, stats )
-    normalizedDayOfYear     = gaussianNormalizeNumericInput(
-        'dayOfYear', dayOfYear, stats )
-    normalizedSecondOfDay   = gaussianNormalizeNumericInput(
-        'secondOfDay', secondOfDay, stats)
-
-    dayOfWeekEncoding = encodeDayOfWeek(dayOfWeek)
-
-    normalizedInputValues = \
-        (
-            normalizedYear,
-            normalizedDayOfYear,
-            normalizedSecondOfDay,
-            dayOfWeekEncoding[0],
-            dayOfWeekEncoding[1],
-            dayOfWeekEncoding[2],
-            dayOfWeekEncoding[3],
-            dayOfWeekEncoding[4],
-            dayOfWeekEncoding[5]
-        )
-
-    return normalizedInputValues
-
-def encodeDayOfWeek(dayOfWeek):
-    dayOfWeekEncoding = [ 0, 0, 0, 0, 0, 0 ]
-
-    # Using 6-bit "one-of-(C-1) effect-coding" for day of week
-    #
-    #   ( 0  0  0  0  0  1) = Monday
-    #   ( 0  0  0  0  1  0) = Tuesday
-    #   ( 0  0  0  1  0  0) = Wednesday
-    #   ( 0  0  1  0  0  0) = Thursday
-    #   ( 0  1  0  0  0  0) = Friday
-    #   ( 1  0  0  0  0  0) = Saturday
-    #   (-1 -1 -1 -1 -1 -1) = Sunday
-
-
-    # Using ISO day of week, so Monday = 1, Sunday = 7)
-    if dayOfWeek < 7:
-        # Monday needs to be bit 5. 6-1 = 5
-        # Saturday is bit 6.        6-6 = 0
-        dayOfWeekEncoding[ 6 - dayOfWeek ] = 1
-    else:
-        for i in range(6):
-            dayOfWeekEncoding[i] = -1
+    # Inference scripts look for the stats next to the network
+    inputFeatures.saveNormalizationStats(filename, normalizationStats, sampleCount)
 
-    return dayOfWeekEncoding
-    
+    logging.warn("Wrote network to file {0}".format(filename) )
 
 
 if __name__ == '__main__':
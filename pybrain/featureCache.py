@@ -0,0 +1,152 @@
+#!/usr/bin/python3
+
+import logging
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import inputFeatures
+
+
+class FeatureCache:
+
+    # On-disk store of built training data: the normalized input matrix, targets and
+    #   normalization stats createNetFromJson.createDataset makes from a set of activity
+    #   files. Each directory of activity files gets one entry, holding the features for its
+    #   newest contents. The entry records a fingerprint of each file's path, size and
+    #   modification time plus inputFeatures.FEATURE_ENCODING_VERSION, so rerunning training
+    #   on unchanged simulation output skips reading it, while a rewritten file or a new
+    #   encoding replaces the entry rather than adding another next to it. Only the
+    #   maxEntries most recently used directories are kept. Arrays are plain .npy files and
+    #   load memory-mapped
+
+    DEFAULT_MAX_ENTRIES = 4
+
+    def __init__(self, cacheDir=None, maxEntries=DEFAULT_MAX_ENTRIES):
+        self._log = logging.getLogger(__name__)
+
+        if cacheDir is None:
+            cacheDir = FeatureCache.getDefaultCacheDir()
+        self._cacheDir = cacheDir
+
+        if maxEntries < 1:
+            raise ValueError("Feature cache needs room for at least one entry, not {0}".format(maxEntries) )
+        self._maxEntries = maxEntries
+
+        if os.path.isdir(cacheDir) is False:
+            os.makedirs(cacheDir)
+
+
+    @staticmethod
+    def getDefaultCacheDir():
+        userCacheDir = os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser("~"), ".cache"))
+        return os.path.join(userCacheDir, "ElevatorIntelligence", "features")
+
+
+    def getCacheDir(self):
+        return self._cacheDir
+
+
+    def load(self, activityFiles):
+        # (inputs, targets, normalization stats), None if these files haven't been cached or
+        #   have changed since
+        entryDir = self._getEntryDir(activityFiles)
+        try:
+            with open(os.path.join(entryDir, "fingerprint"), 'r') as fingerprintFile:
+                cachedFingerprint = fingerprintFile.read()
+        except FileNotFoundError:
+            return None
+
+        if cachedFingerprint != FeatureCache._getFingerprint(activityFiles):
+            self._log.info("Feature cache entry %s is out of date", os.path.basename(entryDir))
+            return None
+
+        with open(os.path.join(entryDir, "stats.json"), 'r') as statsFile:
+            normalizationStats = json.load(statsFile)
+        inputs = np.load(os.path.join(entryDir, "inputs.npy"), mmap_mode='r')
+        targets = np.load(os.path.join(entryDir, "targets.npy"), mmap_mode='r')
+
+        # Marks the entry as recently used, for eviction
+        os.utime(entryDir)
+
+        self._log.info("Feature cache hit %s, %d samples", os.path.basename(entryDir), len(inputs))
+        return (inputs, targets, normalizationStats)
+
+
+    def save(self, activityFiles, inputs, targets, normalizationStats):
+        entryDir = self._getEntryDir(activityFiles)
+
+        # Built in a temp directory and renamed into place, so load never sees a partial
+        #   entry. Whatever was there before for these files is replaced; readers that
+        #   already have it mapped keep their copy until they're done with it
+        tempDir = tempfile.mkdtemp(dir=self._cacheDir, suffix=".tmp")
+        try:
+            np.save(os.path.join(tempDir, "inputs.npy"), inputs)
+            np.save(os.path.join(tempDir, "targets.npy"), targets)
+            with open(os.path.join(tempDir, "stats.json"), 'w') as statsFile:
+                json.dump(normalizationStats, statsFile, indent=4, sort_keys=True)
+            with open(os.path.join(tempDir, "fingerprint"), 'w') as fingerprintFile:
+                fingerprintFile.write(FeatureCache._getFingerprint(activityFiles))
+
+            if os.path.isdir(entryDir):
+                oldEntryDir = tempfile.mkdtemp(dir=self._cacheDir, suffix=".tmp")
+                os.rename(entryDir, os.path.join(oldEntryDir, "entry"))
+                shutil.rmtree(oldEntryDir, ignore_errors=True)
+
+            try:
+                os.rename(tempDir, entryDir)
+            except OSError:
+                # Another run stored these files at the same moment, keep theirs
+                if os.path.isdir(entryDir) is False:
+                    raise
+                shutil.rmtree(tempDir)
+        except BaseException:
+            shutil.rmtree(tempDir, ignore_errors=True)
+            raise
+
+        self._log.info("Feature cache stored %s, %d samples", os.path.basename(entryDir), len(inputs))
+
+        self._evictLeastRecentlyUsed()
+
+
+    def _evictLeastRecentlyUsed(self):
+        entries = []
+        for currName in os.listdir(self._cacheDir):
+            currEntryDir = os.path.join(self._cacheDir, currName)
+            if currName.endswith(".tmp") or os.path.isdir(currEntryDir) is False:
+                continue
+
+            entries.append( (os.stat(currEntryDir).st_mtime_ns, currEntryDir) )
+
+        entries.sort(reverse=True)
+        for (_, currEntryDir) in entries[self._maxEntries:]:
+            self._log.info("Feature cache evicting %s", os.path.basename(currEntryDir))
+            shutil.rmtree(currEntryDir, ignore_errors=True)
+
+
+    def _getEntryDir(self, activityFiles):
+        # One entry per set of directories the files came from, normally the single directory
+        #   createNetFromJson was pointed at
+        sourceDirs = sorted( set( os.path.dirname(os.path.abspath(currFile)) for currFile in activityFiles ) )
+        sourceKey = hashlib.sha256( json.dumps(sourceDirs).encode("utf-8") ).hexdigest()
+
+        return os.path.join(self._cacheDir, sourceKey)
+
+
+    @staticmethod
+    def _getFingerprint(activityFiles):
+        # Size and mtime rather than contents, hashing a decade of output would cost about
+        #   what reading it does
+        fileFingerprints = []
+        for currFile in activityFiles:
+            fileStat = os.stat(currFile)
+            fileFingerprints.append( [ os.path.abspath(currFile), fileStat.st_size, fileStat.st_mtime_ns ] )
+
+        fingerprintFields = {
+            'encoding':     inputFeatures.FEATURE_ENCODING_VERSION,
+            'files':        fileFingerprints,
+        }
+
+        return hashlib.sha256( json.dumps(fingerprintFields, sort_keys=True).encode("utf-8") ).hexdigest()
@@ -0,0 +1,129 @@
+#!/usr/bin/python3
+
+import numpy as np
+import activityReader
+
+# Timestamp parsing shared with the replay and benchmark drivers' JSON reading
+from models.common.ActivityReader import epochSecondsFromTimestampStrings
+
+# Input encoding shared with NeuralNetFloorPredictor, so the simulator feeds trained networks
+#   exactly what they were trained on
+from models.common.InputEncoding import NUMBER_INPUT_VALUES, NUMERIC_INPUT_VALUES, FEATURE_ENCODING_VERSION, \
+    getOriginalInputColumns, createInputMatrix, createInputMatrixFromColumns
+
+# Sidecar stats file and fallback stats are shared with NeuralNetFloorPredictor, which
+#   replays these networks in the simulator
+from models.common.NormalizationStats import DEFAULT_NORMALIZATION_STATS, saveNormalizationStats, \
+    loadNormalizationStats
+
+
+# Reads elevator requests out of activity files and builds the training inputs and
+#   normalization stats from them
+
+def loadActivityColumns(activityFile):
+
+    # Returns (epoch seconds, start floor) arrays for every elevator request in the file.
+    #   Traces are used as-is; JSON timestamps are collected and then parsed in one go
+    if activityFile.endswith('.npy'):
+        trace = activityReader.readElevatorRequestTrace(activityFile)
+        return ( trace['epoch_seconds'], trace['start_floor'] )
+
+    timestampStrings = []
+    startFloors = []
+    for (timestampString, currActivity) in activityReader.readActivities(activityFile):
+
+        # if the hash is empty or isn't a button press, ignore and try next. Output written
+        #   with --activities can hold other activity types, parking for one
+        if currActivity == None or currActivity.get('activity_type') != "Request Elevator":
+            continue
+
+        timestampStrings.append(timestampString)
+        startFloors.append(currActivity['start_floor'])
+
+    return ( epochSecondsFromTimestampStrings(timestampStrings),
+        np.array(startFloors, dtype=np.int64) )
+
+
+def loadOriginalInputColumns(activityFile):
+
+    # Returns ((year, dayOfYear, secondOfDay, dayOfWeek), start floors) for every elevator
+    #   request in the file, in the smallest types that hold them. Self-contained so it can
+    #   run in a worker process; the compact arrays keep what goes back to the parent small
+    (epochSeconds, startFloors) = loadActivityColumns(activityFile)
+    (year, dayOfYear, secondOfDay, dayOfWeek) = getOriginalInputColumns(epochSeconds)
+
+    originalInputColumns = ( year.astype(np.int16), dayOfYear.astype(np.int16),
+        secondOfDay.astype(np.int32), dayOfWeek.astype(np.int8) )
+
+    return ( originalInputColumns, np.asarray(startFloors, dtype=np.int16) )
+
+
+class NormalizationStatsAccumulator:
+
+    # Running mean and standard deviation of each numeric input over any number of traces,
+    #   one pass. Each batch of values is reduced to (count, mean, sum of squared deviations)
+    #   and merged into the running totals with Chan et al.'s pairwise update, which, unlike
+    #   sums of squares, doesn't lose precision on large year or second-of-day values
+
+    def __init__(self):
+        # Input name => [ count, mean, sum of squared deviations from the mean ]
+        self._moments = { currInput: [ 0, 0.0, 0.0 ] for currInput in NUMERIC_INPUT_VALUES }
+
+
+    def addColumns(self, originalInputColumns):
+        # Takes getOriginalInputColumns output
+        for (numericInputValue, values) in zip(NUMERIC_INPUT_VALUES, originalInputColumns):
+            if len(values) == 0:
+                continue
+
+            batchCount = len(values)
+            batchMean = float(np.mean(values))
+            batchDeviations = values - batchMean
+            batchSquaredDeviations = float(np.dot(batchDeviations, batchDeviations))
+
+            moments = self._moments[numericInputValue]
+            (count, mean, squaredDeviations) = moments
+            totalCount = count + batchCount
+            meanDelta = batchMean - mean
+
+            moments[0] = totalCount
+            moments[1] = mean + (meanDelta * batchCount / totalCount)
+            moments[2] = squaredDeviations + batchSquaredDeviations + \
+                (meanDelta * meanDelta * count * batchCount / totalCount)
+
+
+    def getCount(self):
+        return self._moments[ NUMERIC_INPUT_VALUES[0] ][0]
+
+
+    def getStats(self):
+        # Same form as DEFAULT_NORMALIZATION_STATS, population standard deviation
+        if self.getCount() == 0:
+            raise ValueError("No values to calculate normalization stats from")
+
+        stats = {}
+        for numericInputValue in NUMERIC_INPUT_VALUES:
+            (count, mean, squaredDeviations) = self._moments[numericInputValue]
+            stats[ numericInputValue ] = {
+                'mean':     mean,
+                'stdev':    float(np.sqrt(squaredDeviations / count)),
+            }
+
+        return stats
+
+
+def calculateGaussianNormalizationParameters(epochSeconds):
+    accumulator = NormalizationStatsAccumulator()
+    accumulator.addColumns( getOriginalInputColumns(epochSeconds) )
+    stats = accumulator.getStats()
+
+    printNormalizationStats(stats)
+
+    return stats
+
+
+def printNormalizationStats(stats):
+    for numericInputValue in NUMERIC_INPUT_VALUES:
+        print( "Numeric Input Value = {0}, mean = {1:8.5f}, standard dev = {2:8.5f}".format(
+            numericInputValue, stats[ numericInputValue ][ 'mean' ],
+            stats[ numericInputValue ][ 'stdev' ]) )
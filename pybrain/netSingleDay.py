@@ -7,14 +7,18 @@ import argparse
 import datetime
 import pprint
 import csv
+import inputFeatures
 
 
 def main():
     args = parseArgs()
 
     neuralNet = createNetworkFromFile(args.neuralnet_xml)
-    
-    stats = writeNetResults(neuralNet, args.simulation_date, args.output_csv)
+
+    # Inputs have to be normalized the same way they were for training
+    normalizationStats = inputFeatures.loadNormalizationStats(args.neuralnet_xml)
+
+    stats = writeNetResults(neuralNet, args.simulation_date, args.output_csv, normalizationStats)
 
 
 def parseArgs():
@@ -36,7 +40,8 @@ def createNetworkFromFile(neuralNetXmlFile):
     return neuralNet
 
 
-def writeNetResults(neuralNet, simDate, csvFilename):
+def writeNetResults(neuralNet, simDate, csvFilename,
+        normalizationStats=inputFeatures.DEFAULT_NORMALIZATION_STATS):
     simDate = datetime.datetime.strptime(simDate, "%Y%m%d")
     simTime = datetime.datetime(year=simDate.year, month=simDate.month, day=simDate.month)
     simEndTime = simTime + datetime.timedelta(days=1)
@@ -50,7 +55,7 @@ def writeNetResults(neuralNet, simDate, csvFilename):
         while simTime < simEndTime:
              
             simTimestamp = simTime.strftime("%Y%m%d %H%M%S")
-            neuralNetResult = activateNet(neuralNet, simTimestamp)
+            neuralNetResult = activateNet(neuralNet, simTimestamp, normalizationStats)
 
             # Write the data out to the CSV
             csvWriter.writerow(
@@ -67,9 +72,9 @@ def writeNetResults(neuralNet, simDate, csvFilename):
             simTime += simStep
 
 
-def activateNet(neuralNet, entryTimestamp):
+def activateNet(neuralNet, entryTimestamp, normalizationStats):
 
-    inputVector =  convertDatetimeToNormalizedInputVector(entryTimestamp)
+    inputVector =  convertDatetimeToNormalizedInputVector(entryTimestamp, normalizationStats)
     return neuralNet.activate( inputVector )[0]
 
 
@@ -89,7 +94,7 @@ def getOriginalInputValuesFromTimestamp(timestampString):
 
 
 
-def convertDatetimeToNormalizedInputVector(entryTimestamp):
+def convertDatetimeToNormalizedInputVector(entryTimestamp, normalizationStats):
 
     # There are nine values in the input vector
     #
@@ -105,9 +110,9 @@ def convertDatetimeToNormalizedInputVector(entryTimestamp):
         entryTimestamp )
 
     returnSequence = [
-        gaussianNormalizeNumericInput( 'year', year ),
-        gaussianNormalizeNumericInput( 'dayOfYear', dayOfYear ),
-        gaussianNormalizeNumericInput( 'secondOfDay', secondOfDay ),
+        gaussianNormalizeNumericInput( 'year', year, normalizationStats ),
+        gaussianNormalizeNumericInput( 'dayOfYear', dayOfYear, normalizationStats ),
+        gaussianNormalizeNumericInput( 'secondOfDay', secondOfDay, normalizationStats ),
     ]
 
     returnSequence.extend(encodeDayOfWeek(dayOfWeek))
@@ -115,25 +120,7 @@ def convertDatetimeToNormalizedInputVector(entryTimestamp):
     return returnSequence
 
 
-def gaussianNormalizeNumericInput( inputType, inputValue ):
-
-    # Pulled from training activities data, 10 year run starting 2016-12-15
-    stats = {
-        'year': {
-            'mean':      2021.45870,
-            'stdev':        2.87825
-        },
-
-        'dayOfYear': {
-            'mean':       182.80361,
-            'stdev':      105.36360
-        },
-
-        'secondOfDay': {
-            'mean':     46422.07271,
-            'stdev':    20938.44370
-        }
-    }
+def gaussianNormalizeNumericInput( inputType, inputValue, stats ):
 
     if inputType not in stats:
         raise ValueError("Unknown numeric stat type {0}".format(
@@ -0,0 +1,455 @@
+#!/usr/bin/python3
+
+import logging
+import concurrent.futures
+import multiprocessing.shared_memory
+import numpy as np
+
+
+class MiniBatchTrainer:
+
+    # Stand-in for pybrain's BackpropTrainer on the networks createNetFromJson.createNet
+    #   builds: input layer, one sigmoid (or tanh) hidden layer and a linear output layer,
+    #   with bias units on hidden and output. BackpropTrainer runs forward and backward
+    #   passes one sample at a time in Python; this does a whole mini-batch per matrix
+    #   multiply.
+    #
+    # Weights are read out of the network's FullConnections when the trainer is created and
+    #   written back into them after every epoch, so the network can still be saved with
+    #   NetworkWriter and read back by netSingleDay.py and testNetworkFit.py. A FullConnection
+    #   stores its weights as a flattened (outdim, indim) matrix
+    #
+    # With workers > 1 training is data-parallel: the samples go into shared memory once, with
+    #   a pool of worker processes attached to them, each epoch writes its shuffled order
+    #   alongside and each step writes the current weights. Every mini-batch is split across
+    #   as many workers as give it MIN_SHARD_SAMPLES each, and their gradient sums are added
+    #   up into the batch's mean gradient before one weight update. Apart from floating point
+    #   summation order that's the same update a single process makes, so results match
+    #   single-process training with the same seed and batch size, whatever the batch size.
+    #   Batches too small to split are done in this process. Each split step costs a round
+    #   trip to the workers, so the more samples per batch, the more the workers pay off.
+    #   close() (or a with block) shuts the workers down
+
+    MIN_SHARD_SAMPLES = 16
+
+    def __init__(self, module, dataset, learningrate=0.05, momentum=0.9, batchSize=64,
+            randomSeed=None, verbose=False, workers=1):
+        self._log = logging.getLogger(__name__)
+        self._learningRate = learningrate
+        self._momentum = momentum
+        self._batchSize = batchSize
+        self._verbose = verbose
+        self._workers = workers
+        self._random = np.random.default_rng(randomSeed)
+        self._epochs = 0
+
+        if batchSize < 1:
+            raise ValueError("Need at least one sample per batch, got {0}".format(batchSize) )
+
+        if workers < 1:
+            raise ValueError("Need at least one worker, got {0}".format(workers) )
+
+        self._inputs = np.asarray(dataset.getField('input'), dtype=np.float64)
+        self._targets = np.asarray(dataset.getField('target'), dtype=np.float64)
+
+        # Samples train() uses, None for all of them. trainUntilConvergence holds some back
+        self._trainingSamples = None
+
+        # Worker pool and the shared arrays it reads, started by the first parallel epoch
+        self._executor = None
+        self._sharedArrays = None
+
+        (self._hiddenActivation, self._connections) = _getNetworkConnections(module)
+
+        # Name => weight matrix, bias vectors are (outdim, 1) matrices like any other connection
+        self._weights = { currName: np.array(currConnection.params, dtype=np.float64).reshape(
+                currConnection.outdim, currConnection.indim)
+            for (currName, currConnection) in self._connections.items() }
+        self._velocities = { currName: np.zeros_like(currWeights)
+            for (currName, currWeights) in self._weights.items() }
+
+
+    def getEpochs(self):
+        return self._epochs
+
+
+    def close(self):
+        # Stops the worker processes and frees the shared memory, if they were started
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+        if self._sharedArrays is not None:
+            for currArray in self._sharedArrays:
+                currArray.release()
+            self._sharedArrays = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+
+    def train(self):
+        # One pass over the dataset in shuffled mini-batches. Returns the mean per-sample
+        #   error, 0.5 * sum of squared output errors, as BackpropTrainer.train does
+        if self._trainingSamples is None:
+            sampleOrder = self._random.permutation(len(self._inputs))
+        else:
+            sampleOrder = self._trainingSamples[ self._random.permutation(len(self._trainingSamples)) ]
+
+        if self._workers > 1 and self._batchSize >= 2 * MiniBatchTrainer.MIN_SHARD_SAMPLES:
+            self._shareSampleOrder(sampleOrder)
+
+        totalError = 0.0
+        for batchStart in range(0, len(sampleOrder), self._batchSize):
+            batchEnd = min(len(sampleOrder), batchStart + self._batchSize)
+            (batchError, gradients) = self._getBatchGradientSums(sampleOrder, batchStart, batchEnd)
+            self._updateWeights(gradients, batchEnd - batchStart)
+            totalError += batchError
+
+        self._writeWeights()
+        self._epochs += 1
+
+        epochError = totalError / max(1, len(sampleOrder))
+        if self._verbose is True:
+            print( "Total error: {0}".format(epochError) )
+
+        return epochError
+
+
+    def trainEpochs(self, epochs=1):
+        for i in range(epochs):
+            self.train()
+
+
+    def trainUntilConvergence(self, maxEpochs=None, validationProportion=0.25, continueEpochs=10,
+            verbose=None):
+        # Trains on a random (1 - validationProportion) of the samples until error on the rest
+        #   hasn't improved for continueEpochs epochs, then keeps the best weights seen.
+        #   Returns (training errors, validation errors) per epoch
+        if verbose is None:
+            verbose = self._verbose
+
+        if maxEpochs is not None and maxEpochs < 1:
+            raise ValueError("Need at least one epoch to train until convergence, got {0}".format(maxEpochs) )
+
+        sampleOrder = self._random.permutation(len(self._inputs))
+        validationCount = int(len(sampleOrder) * validationProportion)
+        if validationCount == 0 or validationCount == len(sampleOrder):
+            raise ValueError("Validation proportion {0} leaves no samples to train or validate on".format(
+                validationProportion) )
+
+        (validationInputs, validationTargets) = ( self._inputs[ sampleOrder[:validationCount] ],
+            self._targets[ sampleOrder[:validationCount] ] )
+        self._trainingSamples = sampleOrder[validationCount:]
+
+        trainingErrors = []
+        validationErrors = []
+        bestWeights = None
+        bestError = None
+        try:
+            while maxEpochs is None or len(trainingErrors) < maxEpochs:
+                trainingErrors.append( self.train() )
+                validationErrors.append( self._getError(validationInputs, validationTargets) )
+
+                if verbose is True:
+                    print( "Epoch {0}: training error {1}, validation error {2}".format(
+                        len(trainingErrors), trainingErrors[-1], validationErrors[-1]) )
+
+                if bestError is None or validationErrors[-1] < bestError:
+                    bestError = validationErrors[-1]
+                    bestWeights = { currName: currWeights.copy() for (currName, currWeights) in
+                        self._weights.items() }
+                    epochsSinceBest = 0
+                else:
+                    epochsSinceBest += 1
+                    if epochsSinceBest >= continueEpochs:
+                        break
+        finally:
+            self._trainingSamples = None
+
+        self._weights = bestWeights
+        self._writeWeights()
+
+        return (trainingErrors, validationErrors)
+
+
+    def testOnData(self, dataset=None):
+        # Mean per-sample error without training, on the training data by default
+        if dataset is None:
+            return self._getError(self._inputs, self._targets)
+
+        return self._getError( np.asarray(dataset.getField('input'), dtype=np.float64),
+            np.asarray(dataset.getField('target'), dtype=np.float64) )
+
+
+    def _shareSampleOrder(self, sampleOrder):
+        if self._executor is None:
+            self._startWorkers()
+
+        # Workers read the epoch's order from the shared copy, only shard bounds go over IPC
+        sharedSampleOrder = self._sharedArrays[2].getArray()
+        sharedSampleOrder[:len(sampleOrder)] = sampleOrder
+
+
+    def _getBatchGradientSums(self, sampleOrder, batchStart, batchEnd):
+        # (summed error, summed gradients) of sampleOrder[batchStart:batchEnd], split across
+        #   the workers if the batch is big enough
+        shardCount = min(self._workers, (batchEnd - batchStart) // MiniBatchTrainer.MIN_SHARD_SAMPLES)
+        if shardCount < 2:
+            batchSamples = sampleOrder[batchStart:batchEnd]
+            return _getGradientSums(self._weights, self._hiddenActivation, self._inputs[batchSamples],
+                self._targets[batchSamples])
+
+        # Workers see this step's weights through their views of the shared copy
+        _packWeights(self._weights, self._sharedArrays[3].getArray())
+
+        # Contiguous run of the batch for each worker
+        shardBounds = np.linspace(batchStart, batchEnd, shardCount + 1).astype(int).tolist()
+
+        batchError = 0.0
+        gradients = None
+        for (shardError, shardGradients) in self._executor.map(_getShardGradientSums,
+                shardBounds[:-1], shardBounds[1:]):
+            batchError += shardError
+            if gradients is None:
+                gradients = shardGradients
+            else:
+                for (currName, currGradient) in shardGradients.items():
+                    gradients[currName] += currGradient
+
+        return (batchError, gradients)
+
+
+    def _startWorkers(self):
+        # Samples never change between epochs, so they're shared once for the trainer's life.
+        #   The order array holds a full epoch; trainUntilConvergence's epochs only use the
+        #   start of it. Weights are packed one connection after another, in name order
+        weightLayout = [ (currName, self._weights[currName].shape) for currName in sorted(self._weights) ]
+        packedWeights = np.zeros( sum( [ self._weights[currName].size for (currName, shape) in weightLayout ] ) )
+
+        self._sharedArrays = []
+        try:
+            for currArray in (self._inputs, self._targets, np.arange(len(self._inputs)), packedWeights):
+                self._sharedArrays.append( _SharedArray.create(currArray) )
+            workerArgs = tuple( [ currArray.getDescription() for currArray in self._sharedArrays ] ) + \
+                (weightLayout, self._hiddenActivation)
+
+            self._executor = concurrent.futures.ProcessPoolExecutor(max_workers=self._workers,
+                initializer=_initializeWorker, initargs=workerArgs)
+        except BaseException:
+            self.close()
+            raise
+
+
+    def _updateWeights(self, gradientSums, batchSamples):
+        # Momentum step along the batch's mean gradient
+        for (currName, currGradient) in gradientSums.items():
+            currVelocity = self._velocities[currName]
+            currVelocity *= self._momentum
+            currVelocity -= (self._learningRate / batchSamples) * currGradient
+            self._weights[currName] += currVelocity
+
+
+    def _getError(self, inputs, targets):
+        outputErrors = _activate(self._weights, self._hiddenActivation, inputs)[1] - targets
+        return 0.5 * float( np.sum(outputErrors * outputErrors) ) / max(1, len(inputs))
+
+
+    def _writeWeights(self):
+        # In place, params is a view into the network's own parameter vector
+        for (currName, currConnection) in self._connections.items():
+            currConnection.params[:] = self._weights[currName].ravel()
+
+
+class _SharedArray:
+
+    # Numpy array in a shared memory block, attached to by name in the worker processes
+
+    def __init__(self, sharedMemory, shape, dtype):
+        self._sharedMemory = sharedMemory
+        self._array = np.ndarray(shape, dtype=dtype, buffer=sharedMemory.buf)
+
+
+    @staticmethod
+    def create(sourceArray):
+        # Zero-length blocks aren't allowed
+        sharedMemory = multiprocessing.shared_memory.SharedMemory(create=True,
+            size=max(1, sourceArray.nbytes))
+        sharedArray = _SharedArray(sharedMemory, sourceArray.shape, sourceArray.dtype)
+        sharedArray._array[...] = sourceArray
+        return sharedArray
+
+
+    @staticmethod
+    def attach(description):
+        (sharedMemoryName, shape, dtypeName) = description
+        return _SharedArray( multiprocessing.shared_memory.SharedMemory(name=sharedMemoryName),
+            shape, np.dtype(dtypeName) )
+
+
+    def getDescription(self):
+        # What a worker needs to attach, picklable
+        return (self._sharedMemory.name, self._array.shape, self._array.dtype.str)
+
+
+    def getArray(self):
+        return self._array
+
+
+    def release(self):
+        # Creator only, workers' mappings go away with the workers
+        self._array = None
+        self._sharedMemory.close()
+        self._sharedMemory.unlink()
+
+
+class _SigmoidActivation:
+
+    @staticmethod
+    def activate(values):
+        return 1.0 / (1.0 + np.exp(-values))
+
+
+    @staticmethod
+    def derivative(outputs):
+        # In terms of the layer's outputs
+        return outputs * (1.0 - outputs)
+
+
+class _TanhActivation:
+
+    @staticmethod
+    def activate(values):
+        return np.tanh(values)
+
+
+    @staticmethod
+    def derivative(outputs):
+        return 1.0 - (outputs * outputs)
+
+
+_HIDDEN_ACTIVATIONS = {
+    'SigmoidLayer': _SigmoidActivation,
+    'TanhLayer':    _TanhActivation,
+}
+
+
+def _activate(weights, hiddenActivation, inputs):
+    # (hidden layer outputs, network outputs), one row per sample
+    hiddenOutputs = hiddenActivation.activate( (inputs @ weights['in_hidden'].T) +
+        weights['bias_hidden'].T )
+    outputs = (hiddenOutputs @ weights['hidden_out'].T) + weights['bias_out'].T
+
+    return (hiddenOutputs, outputs)
+
+
+def _getGradientSums(weights, hiddenActivation, inputs, targets):
+    # (summed error, connection name => error gradient summed over the samples). Sums rather
+    #   than means, so gradients from several shards of a batch just add up
+    (hiddenOutputs, outputs) = _activate(weights, hiddenActivation, inputs)
+    outputErrors = outputs - targets
+    errorSum = 0.5 * float( np.sum(outputErrors * outputErrors) )
+
+    hiddenDeltas = (outputErrors @ weights['hidden_out']) * hiddenActivation.derivative(hiddenOutputs)
+
+    gradientSums = {
+        'hidden_out':   outputErrors.T @ hiddenOutputs,
+        'bias_out':     np.sum(outputErrors, axis=0).reshape(-1, 1),
+        'in_hidden':    hiddenDeltas.T @ inputs,
+        'bias_hidden':  np.sum(hiddenDeltas, axis=0).reshape(-1, 1),
+    }
+
+    return (errorSum, gradientSums)
+
+
+def _packWeights(weights, packedWeights):
+    # Into the flat layout _startWorkers shares, connections in name order
+    offset = 0
+    for currName in sorted(weights):
+        currWeights = weights[currName]
+        packedWeights[ offset:offset + currWeights.size ] = currWeights.ravel()
+        offset += currWeights.size
+
+
+def _unpackWeights(packedWeights, weightLayout):
+    # Name => view into packedWeights, the reverse of _packWeights
+    weights = {}
+    offset = 0
+    for (currName, shape) in weightLayout:
+        size = int(np.prod(shape))
+        weights[currName] = packedWeights[ offset:offset + size ].reshape(shape)
+        offset += size
+
+    return weights
+
+
+# Shared training data, views of the shared weights and hidden activation of each worker
+#   process, set once when the worker starts
+_workerArrays = None
+_workerWeights = None
+_workerHiddenActivation = None
+
+
+def _initializeWorker(inputsDescription, targetsDescription, sampleOrderDescription,
+        weightsDescription, weightLayout, hiddenActivation):
+    global _workerArrays, _workerWeights, _workerHiddenActivation
+    _workerArrays = [ _SharedArray.attach(currDescription) for currDescription in
+        (inputsDescription, targetsDescription, sampleOrderDescription, weightsDescription) ]
+    _workerWeights = _unpackWeights(_workerArrays[3].getArray(), weightLayout)
+    _workerHiddenActivation = hiddenActivation
+
+
+def _getShardGradientSums(shardStart, shardEnd):
+    (inputs, targets, sampleOrder) = [ currArray.getArray() for currArray in _workerArrays[:3] ]
+
+    shardSamples = sampleOrder[shardStart:shardEnd]
+    return _getGradientSums(_workerWeights, _workerHiddenActivation, inputs[shardSamples],
+        targets[shardSamples])
+
+
+def _getNetworkConnections(module):
+    # (hidden layer activation, connection name => FullConnection) for the network shape
+    #   pybrain.tools.shortcuts.buildNetwork(inputs, hidden, outputs, bias=True) makes
+    inputLayer = module.inmodules[0]
+    outputLayer = module.outmodules[0]
+
+    if len(module.inmodules) != 1 or len(module.outmodules) != 1 or \
+            type(outputLayer).__name__ != 'LinearLayer':
+        raise ValueError("MiniBatchTrainer needs one input layer and one linear output layer")
+
+    connections = {}
+    for currConnections in module.connections.values():
+        for currConnection in currConnections:
+            if type(currConnection).__name__ != 'FullConnection':
+                raise ValueError("MiniBatchTrainer only handles full connections, not {0}".format(
+                    type(currConnection).__name__) )
+
+            if currConnection.inmod is inputLayer:
+                connectionName = 'in_hidden'
+                hiddenLayer = currConnection.outmod
+            elif currConnection.outmod is outputLayer and type(currConnection.inmod).__name__ == 'BiasUnit':
+                connectionName = 'bias_out'
+            elif currConnection.outmod is outputLayer:
+                connectionName = 'hidden_out'
+            else:
+                connectionName = 'bias_hidden'
+
+            if connectionName in connections:
+                raise ValueError("MiniBatchTrainer needs exactly one hidden layer")
+            connections[connectionName] = currConnection
+
+    if len(connections) != 4:
+        raise ValueError("MiniBatchTrainer needs bias units on the hidden and output layers, " +
+            "got connections {0}".format(", ".join(sorted(connections.keys()))) )
+
+    hiddenActivation = _HIDDEN_ACTIVATIONS.get( type(hiddenLayer).__name__ )
+    if hiddenActivation is None:
+        raise ValueError("MiniBatchTrainer can't train a hidden {0}, only {1}".format(
+            type(hiddenLayer).__name__, ", ".join(sorted(_HIDDEN_ACTIVATIONS.keys()))) )
+
+    return (hiddenActivation, connections)
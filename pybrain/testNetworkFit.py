@@ -9,6 +9,8 @@ import pprint
 import statistics
 import random
 import csv
+import activityReader
+import inputFeatures
 
 
 def main():
@@ -17,7 +19,11 @@ def main():
 
     activities = readActivities(args.activities_file)
     neuralNet = createNetworkFromFile(args.neuralnet_xml)
-    stats = testFit(activities, neuralNet, args.output_csv)
+
+    # Inputs have to be normalized the same way they were for training
+    normalizationStats = inputFeatures.loadNormalizationStats(args.neuralnet_xml)
+
+    stats = testFit(activities, neuralNet, args.output_csv, normalizationStats)
 
     printStats(stats)
 
@@ -33,12 +39,10 @@ def parseArgs():
 
 def readActivities(activityFile):
 
-    with open(activityFile, 'r') as activitiesJson:
-        activities = json.load(activitiesJson)
-
-    print("Read activities from {0}".format(activityFile) )
+    print("Reading activities from {0}".format(activityFile) )
 
-    return activities
+    # Streamed in time order, testFit only needs to see each activity once
+    return activityReader.readActivities(activityFile)
 
 
 def createNetworkFromFile(neuralNetXmlFile):
@@ -50,9 +54,8 @@ def createNetworkFromFile(neuralNetXmlFile):
     return neuralNet
 
 
-def testFit(activities, neuralNet, csvFilename):
-    timestamps = sorted( activities.keys() )
-
+def testFit(activities, neuralNet, csvFilename,
+        normalizationStats=inputFeatures.DEFAULT_NORMALIZATION_STATS):
     stats = {
         'numDatapoints': 0,
         'totalError': 0.0
@@ -64,33 +67,32 @@ def testFit(activities, neuralNet, csvFilename):
         csvWriter = csv.writer(outputCsv)
         csvWriter.writerow( [ "hour", "expected_output", "neural_net_output" ] )
 
-        for currTimestamp in timestamps:
+        for (currTimestamp, currActivity) in activities:
+            if currActivity == None or 'activity_type' not in currActivity:
+                continue
+
             entryTimestamp = datetime.datetime.strptime(currTimestamp, "%Y%m%d %H%M%S")
             # print( "Entry timestamp: {0}".format(entryTimestamp) )
 
-            for currActivity in activities[currTimestamp]:
-                if currActivity == None or 'activity_type' not in currActivity:
-                    continue
+            # Is it a button press?
+            if currActivity['activity_type'] == "Request Elevator":
+                # print( "Button press at {0} on floor index {1}".format(
+                #     entryTimestamp, currActivity['start_floor']) )
 
-                # Is it a button press?
-                if currActivity['activity_type'] == "Request Elevator":
-                    # print( "Button press at {0} on floor index {1}".format(
-                    #     entryTimestamp, currActivity['start_floor']) )
+                neuralNetResult = activateNet(neuralNet, currTimestamp, normalizationStats)
+                #neuralNetResult = (random.random() * 8) + 1
 
-                    neuralNetResult = activateNet(neuralNet, currTimestamp )
-                    #neuralNetResult = (random.random() * 8) + 1
+                # print( "\tNeural net result: {0:5.3f}".format(
+                # neuralNetResult) )
 
-                    # print( "\tNeural net result: {0:5.3f}".format(
-                    # neuralNetResult) )
-
-                    # Write the data out to the CSV
-                    csvWriter.writerow(
-                        [ 
-                            "Hour {0:02d}00".format(entryTimestamp.hour),
-                            currActivity['start_floor'],
-                            neuralNetResult
-                        ]
-                    )                
+                # Write the data out to the CSV
+                csvWriter.writerow(
+                    [ 
+                        "Hour {0:02d}00".format(entryTimestamp.hour),
+                        currActivity['start_floor'],
+                        neuralNetResult
+                    ]
+                )                
 
                 errorDelta = abs(neuralNetResult - currActivity['start_floor'])
 
@@ -104,9 +106,9 @@ def testFit(activities, neuralNet, csvFilename):
 
 
 
-def activateNet(neuralNet, entryTimestamp):
+def activateNet(neuralNet, entryTimestamp, normalizationStats):
 
-    inputVector =  convertDatetimeToNormalizedInputVector(entryTimestamp)
+    inputVector =  convertDatetimeToNormalizedInputVector(entryTimestamp, normalizationStats)
     #pprint.pprint(inputVector)
     #return None
     return neuralNet.activate( inputVector )[0]
@@ -127,7 +129,7 @@ def getOriginalInputValuesFromTimestamp(timestampString):
     return (year, dayOfYear, secondOfDay, dayOfWeek)
 
 
-def convertDatetimeToNormalizedInputVector(entryTimestamp):
+def convertDatetimeToNormalizedInputVector(entryTimestamp, normalizationStats):
 
     # There are nine values in the input vector
     #
@@ -143,9 +145,9 @@ def convertDatetimeToNormalizedInputVector(entryTimestamp):
         entryTimestamp )
 
     returnSequence = [
-        gaussianNormalizeNumericInput( 'year', year ),
-        gaussianNormalizeNumericInput( 'dayOfYear', dayOfYear ),
-        gaussianNormalizeNumericInput( 'secondOfDay', secondOfDay ),
+        gaussianNormalizeNumericInput( 'year', year, normalizationStats ),
+        gaussianNormalizeNumericInput( 'dayOfYear', dayOfYear, normalizationStats ),
+        gaussianNormalizeNumericInput( 'secondOfDay', secondOfDay, normalizationStats ),
     ]
 
     returnSequence.extend(encodeDayOfWeek(dayOfWeek))
@@ -153,25 +155,7 @@ def convertDatetimeToNormalizedInputVector(entryTimestamp):
     return returnSequence
 
 
-def gaussianNormalizeNumericInput( inputType, inputValue ):
-
-    # Pulled from training activities data, 10 year run starting 2016-12-15
-    stats = {
-        'year': {
-            'mean':      2021.45870,
-            'stdev':        2.87825
-        },
-
-        'dayOfYear': {
-            'mean':       182.80361,
-            'stdev':      105.36360
-        },
-
-        'secondOfDay': {
-            'mean':     46422.07271,
-            'stdev':    20938.44370
-        }
-    }
+def gaussianNormalizeNumericInput( inputType, inputValue, stats ):
 
     if inputType not in stats:
         raise ValueError("Unknown numeric stat type {0}".format(